@@ -1,11 +1,18 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from app.config.settings import *
-from app.bot.telegram_sender import send_telegram_message
+from app.bot.telegram_sender import send_telegram_message, enqueue_telegram_message
+from app.bot.subscribers import add_subscriber, remove_subscriber, can_subscribe
+from app.bot.message_builder import TELEGRAM_MAX_CHARS
+from app.scanners.result_cache import SCAN_RESULTS
+from app.scanners.EMA_10_20_breakout import ema_momentum_messages
 from app.utils.symbol_formatter import format_symbol_string
 
 
 import asyncio
+import html
+import logging
+import math
 
 # =============================================
 # Disclaimer Footer (added)
@@ -20,8 +27,8 @@ FOOTER = (
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    Simple Telegram handler.
-    No scans, no indicators, no scanners.
+    Reply to plain text with the available commands. Scans are served only
+    through the commands (/ema, /alerts, /stock), never from free text.
     """
     text = update.message.text.lower()
 
@@ -29,8 +36,140 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 <b>🤖 Trading Bot Online</b>
 
 Received message:
-<pre>{text}</pre>
+<pre>{html.escape(text)}</pre>
 
-Scanner features are currently disabled.
+Commands:
+/ema — today's EMA momentum signals
+/alerts — today's quarterly-high breakouts
+/stock SYMBOL — price, EMAs and signal flags for one stock
+/subscribe, /unsubscribe — scan alerts in this chat
 """
     await update.message.reply_text(msg + FOOTER, parse_mode="HTML")
+
+
+def _target_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """This chat, or — from the operator chat only — the numeric chat ID given as argument."""
+    chat_id = str(update.effective_chat.id)
+    if context.args and chat_id == str(CHAT_ID) and context.args[0].lstrip("-").isdigit():
+        return context.args[0]
+    return chat_id
+
+
+async def handle_subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /subscribe — this chat receives broadcast scan output (allow-listed
+    chats only). From the operator chat, /subscribe CHAT_ID approves a chat.
+    """
+    chat_id = _target_chat(update, context)
+    if chat_id == str(update.effective_chat.id) and not can_subscribe(chat_id):
+        enqueue_telegram_message(
+            f"🔔 Subscribe request from chat <code>{chat_id}</code> — approve with /subscribe {chat_id}"
+        )
+        await update.message.reply_text(
+            "⛔ This chat is not on the subscriber allow-list. The operator has been asked to approve it."
+            + FOOTER, parse_mode="HTML"
+        )
+        return
+    try:
+        added = await asyncio.to_thread(add_subscriber, chat_id)
+    except Exception as e:
+        logging.error(f"❌ Subscribe failed for {chat_id}: {e}")
+        await update.message.reply_text("❌ Subscriber list unavailable — try again later." + FOOTER, parse_mode="HTML")
+        return
+    msg = f"✅ Chat {chat_id} subscribed to scan alerts." if added else f"ℹ️ Chat {chat_id} is already subscribed."
+    await update.message.reply_text(msg + FOOTER, parse_mode="HTML")
+
+
+async def handle_unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unsubscribe — stop broadcast scan output to this chat (the operator may name any chat)."""
+    chat_id = _target_chat(update, context)
+    try:
+        removed = await asyncio.to_thread(remove_subscriber, chat_id)
+    except Exception as e:
+        logging.error(f"❌ Unsubscribe failed for {chat_id}: {e}")
+        await update.message.reply_text("❌ Subscriber list unavailable — try again later." + FOOTER, parse_mode="HTML")
+        return
+    msg = f"👋 Chat {chat_id} unsubscribed from scan alerts." if removed else f"ℹ️ Chat {chat_id} is not subscribed."
+    await update.message.reply_text(msg + FOOTER, parse_mode="HTML")
+
+
+# =============================================
+# On-demand scan commands (served from SCAN_RESULTS)
+# =============================================
+async def _scan_result(update: Update):
+    """Cached result for today's data; scans (once, shared) only if inputs changed."""
+    try:
+        return await asyncio.to_thread(SCAN_RESULTS.get)
+    except Exception as e:
+        await update.message.reply_text(f"❌ Scan failed: {html.escape(str(e))}" + FOOTER, parse_mode="HTML")
+        return None
+
+
+async def _reply_messages(update: Update, messages, result):
+    """Reply with each message; as-of stamp + footer on the last (own message if it won't fit)."""
+    tail = f"\n\n🕒 As of {result.computed_at:%d-%b %H:%M:%S} IST" + FOOTER
+    messages = list(messages)
+    if len(messages[-1]) + len(tail) <= TELEGRAM_MAX_CHARS:
+        messages[-1] += tail
+    else:
+        messages.append(tail.strip())
+    for msg in messages:
+        await update.message.reply_text(msg, parse_mode="HTML")
+
+
+async def handle_ema(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/ema — today's EMA momentum signals."""
+    result = await _scan_result(update)
+    if result is None:
+        return
+    await _reply_messages(update, ema_momentum_messages(result.output("ema_momentum")), result)
+
+
+async def handle_alerts(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/alerts — today's top quarterly-high breakouts."""
+    result = await _scan_result(update)
+    if result is None:
+        return
+    alerts, _ = result.output("quarterly_alert") or ([], [])
+    msg = "🔔 <b>Quarterly High Breakouts</b>\n\n" + "\n".join(html.escape(a) for a in alerts) if alerts else "ℹ️ No breakout alerts today."
+    await _reply_messages(update, [msg], result)
+
+
+def _fmt(value, digits=2):
+    if value is None or not math.isfinite(value):
+        return "—"
+    return f"{value:,.{digits}f}"
+
+
+async def handle_stock(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/stock SYMBOL — latest price, EMAs and signal flags for one stock."""
+    if not context.args:
+        await update.message.reply_text("Usage: /stock SYMBOL" + FOOTER, parse_mode="HTML")
+        return
+
+    symbol = " ".join(context.args)
+    result = await _scan_result(update)
+    if result is None:
+        return
+
+    found = result.stock(symbol)
+    if found is None:
+        await update.message.reply_text(f"❓ {html.escape(symbol.upper())} is not in the scan universe." + FOOTER, parse_mode="HTML")
+        return
+
+    row, ind = found
+    ema_flag = "✅" if ind.get("ema_signal") else "—"
+    breakout_flag = "✅" if ind.get("quarterly_breakout") else "—"
+    msg = (
+        f"📈 <b>{html.escape(str(row['Stock Name']))}</b> ({html.escape(str(row['Setup_Case']))})\n\n"
+        f"LTP: {_fmt(ind.get('close'))}\n"
+        f"O / H / L: {_fmt(ind.get('open'))} / {_fmt(ind.get('high'))} / {_fmt(ind.get('low'))}\n"
+        f"Volume: {_fmt(ind.get('volume'), 0)}\n"
+        f"EMA 10 / 20 / 50: {_fmt(ind.get('ema10'))} / {_fmt(ind.get('ema20'))} / {_fmt(ind.get('ema50'))}\n"
+        f"Prev day body top: {_fmt(ind.get('prev_high'))}\n\n"
+        f"EMA momentum signal: {ema_flag}\n"
+        f"Quarterly breakout: {breakout_flag}"
+    )
+    if not ind:
+        msg += "\n\nℹ️ No live data for this stock in the last scan."
+    await _reply_messages(update, [msg], result)
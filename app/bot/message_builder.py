@@ -0,0 +1,131 @@
+# app/bot/message_builder.py
+"""
+Telegram message building.
+
+- chunk_records        : pack rendered records into as few messages as fit
+                         Telegram's 4096-character limit, splitting only on
+                         record boundaries (header on every part, footer on
+                         the last)
+- render_records       : one rendered string per DataFrame row (itertuples,
+                         no per-row Series; text values HTML-escaped)
+- NotificationCoalescer: folds bursts of small notifications sent within a
+                         short window into one digest message
+"""
+import html
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MAX_CHARS = 4096
+
+
+def split_text(text, limit, separator="\n"):
+    """A single over-long record → pieces ≤ limit, preferring `separator` breaks."""
+    pieces = []
+    while len(text) > limit:
+        cut = text.rfind(separator, 0, limit)
+        cut = limit if cut <= 0 else cut + len(separator)
+        pieces.append(text[:cut])
+        text = text[cut:]
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def chunk_records(records, header="", footer="", limit=TELEGRAM_MAX_CHARS, separator=""):
+    """
+    Args:
+        records (list[str]): pre-rendered records (kept whole where possible)
+        header (str): prefix of every message
+        footer (str): suffix of the last message (own message if it won't fit)
+        limit (int): max characters per message
+        separator (str): placed between records of the same message
+
+    Returns:
+        list[str] -> messages, each ≤ limit characters
+    """
+    room = limit - len(header)
+    messages, parts, size = [], [], 0
+
+    def emit():
+        nonlocal parts, size
+        if parts:
+            messages.append(header + separator.join(parts))
+        parts, size = [], 0
+
+    for record in records:
+        for piece in split_text(record, room) if len(record) > room else [record]:
+            extra = len(piece) + (len(separator) if parts else 0)
+            if size + extra > room:
+                emit()
+                extra = len(piece)
+            parts.append(piece)
+            size += extra
+    emit()
+
+    if footer:
+        if messages and len(messages[-1]) + len(separator) + len(footer) <= limit:
+            messages[-1] += separator + footer
+        else:
+            messages.extend(split_text(footer, limit))
+    return messages or ([header] if header else [])
+
+
+def render_records(df, template):
+    """
+    `template.format(**row)` for every row; column names with spaces use _
+    (e.g. {Stock_Name}). Text values are HTML-escaped, since templates are
+    sent with parse_mode="HTML" (a name like M&M would otherwise fail the
+    whole message).
+    """
+    columns = [str(c).replace(" ", "_") for c in df.columns]
+    return [
+        template.format(**{c: html.escape(v) if isinstance(v, str) else v for c, v in zip(columns, row)})
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+
+class NotificationCoalescer:
+    """
+    add() buffers a message; the first message of a burst starts a `window`
+    second timer, and everything added before it fires goes out as one
+    (chunked) digest through `send`. flush() sends the buffer immediately.
+    """
+
+    def __init__(self, send, window=2.0, limit=TELEGRAM_MAX_CHARS, separator="\n\n"):
+        self.send = send
+        self.window = window
+        self.limit = limit
+        self.separator = separator
+        self._buffer = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self.stats = {"messages": 0, "digests": 0}
+
+    def add(self, message: str):
+        with self._lock:
+            self._buffer.append(message)
+            self.stats["messages"] += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            buffered, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not buffered:
+            return
+
+        for message in chunk_records(buffered, limit=self.limit, separator=self.separator):
+            self.stats["digests"] += 1
+            try:
+                self.send(message)
+            except Exception as e:
+                logger.error(f"❌ Digest send failed: {e}")
+        if len(buffered) > 1:
+            logger.info(f"🗞️ Coalesced {len(buffered)} notifications")
@@ -3,9 +3,24 @@ import asyncio
 import logging
 import boto3
 from datetime import datetime, time
-from app.config.settings import IST, INSIDEBAR_SCAN_TIME
+from time import perf_counter
+from app.config.settings import (
+    IST,
+    INSIDEBAR_SCAN_TIME,
+    S3_BUCKET,
+    BREAKOUT_SIGNALS_KEY,
+    MARKET_OPEN_TIME,
+    MARKET_CLOSE_TIME,
+    TRIGGER_WATCH_ENABLED,
+    TRIGGER_WATCH_INTERVAL_SECS,
+)
 from app.config.dhan_auth import dhan
-from app.bot.telegram_sender import send_telegram_message
+from app.bot.telegram_sender import (
+    send_telegram_message,
+    send_telegram_digest,
+    flush_telegram,
+    broadcast_telegram_message,
+)
 
 from app.utils.get_instance_id import get_instance_id  # your existing function
 
@@ -14,7 +29,9 @@ from app.config.aws_s3 import read_csv_from_s3
 from app.strategy.stock_selector import select_best_stock,rank_stocks
 from app.strategy.nifty_filter import is_nifty_trade_allowed
 from app.execution.trade_executor import execute_trade
+from app.bot.warmup import WARM_STATE, ensure_warm, warm_candidates
 from app.broker.market_data import get_nifty_ltp_and_prev_close
+from app.scanners.trigger_watchlist import build_trigger_watchlist, watch_triggers
 import random
 
 
@@ -44,6 +61,9 @@ opposite_lock = asyncio.Lock()
 # EC2 Termination Scheduler
 # --------------------------
 def terminate_instance(instance_id, region="ap-south-1"):
+    # Blocking — async callers run it with asyncio.to_thread
+    # Queued alerts (incl. the termination notice) go out before the box does
+    flush_telegram()
     try:
         ec2 = boto3.client("ec2", region_name=region)
         ec2.terminate_instances(InstanceIds=[instance_id])
@@ -61,12 +81,58 @@ async def terminate_at(target_hour=10, target_minute=40):
         now = datetime.now()
         if now.hour == target_hour and now.minute == target_minute:
             logging.info(f"🕓 Time reached {target_hour}:{target_minute}, terminating instance...")
-            terminate_instance(instance_id)
+            # Blocking (Telegram flush + EC2 call) → off the event loop
+            await asyncio.to_thread(terminate_instance, instance_id)
             break
         await asyncio.sleep(20)
 
-BUCKET = "dhan-trading-data"
-CSV_KEY = "uploads/nifty_15m_breakout_signals.csv"
+# --------------------------
+# Trigger watchlist (pre-market build → intraday watch)
+# --------------------------
+async def run_trigger_watch():
+    """
+    Build today's trigger levels (EMA state + breakout history) before the
+    open, then re-check the universe every TRIGGER_WATCH_INTERVAL_SECS until the close;
+    fired triggers are broadcast to subscribers.
+    """
+    now = datetime.now(IST)
+    if not TRIGGER_WATCH_ENABLED or now.weekday() >= 5 or now.time() >= MARKET_CLOSE_TIME:
+        logging.info("ℹ️ Trigger watch skipped (disabled, weekend or after close)")
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+        watchlist = await loop.run_in_executor(None, build_trigger_watchlist, now.date())
+        if watchlist is None:
+            await send_telegram_message("❌ Trigger watchlist not built — mapping missing")
+            return
+
+        while datetime.now(IST).time() < MARKET_OPEN_TIME:
+            await asyncio.sleep(20)
+
+        names = watchlist.levels["stock"]
+
+        async def on_hits(hits):
+            lines = [f"🎯 EMA trigger → {names[iid]}" for iid in hits["ema"]]
+            lines += [f"🔔 Breakout trigger → {names[iid]}" for iid in hits["breakout"]]
+            broadcast_telegram_message("\n".join(lines))
+
+        logging.info("🎯 Trigger watch started")
+        await watch_triggers(
+            watchlist,
+            on_hits,
+            interval=TRIGGER_WATCH_INTERVAL_SECS,
+            should_stop=lambda: datetime.now(IST).time() >= MARKET_CLOSE_TIME,
+        )
+        logging.info("🎯 Trigger watch finished (market closed)")
+
+    except Exception as e:
+        logging.error(f"❌ Error in run_trigger_watch: {e}")
+        await send_telegram_message(f"❌ Trigger watch error: {e}")
+
+
+BUCKET = S3_BUCKET
+CSV_KEY = BREAKOUT_SIGNALS_KEY
 # --------------------------
 # Daily trade state
 # --------------------------
@@ -80,18 +146,24 @@ async def run_nifty_breakout_trade():
         logging.info("⚠️ Trade already executed today, skipping further attempts")
         return
 
+    nifty = None
     try:
-        logging.info("📥 Reading breakout signals from S3")
-        df = read_csv_from_s3(BUCKET, CSV_KEY)
+        loop = asyncio.get_running_loop()
 
-        ranked_stocks = rank_stocks(df)
+        # Nifty LTP loads while the warm state is checked / topped up
+        nifty = loop.run_in_executor(None, get_nifty_ltp_and_prev_close)
+        await loop.run_in_executor(None, ensure_warm)
+        logging.info(f"🔥 Trading from warm state | ages={WARM_STATE.ages()}")
+
+        logging.info("📥 Breakout signals (warm unless the CSV changed)")
+        ranked_stocks = await loop.run_in_executor(None, warm_candidates, BUCKET, CSV_KEY)
         if not ranked_stocks:
             logging.info("❌ No valid stocks for breakout today")
             await send_telegram_message("❌ No valid stocks for breakout today")
             return
 
         # 2️⃣ Nifty quotes
-        nifty_ltp, nifty_prev_close = get_nifty_ltp_and_prev_close()
+        nifty_ltp, nifty_prev_close = await nifty
         if not nifty_ltp or not nifty_prev_close:
             logging.error("❌ Failed to fetch Nifty quotes, skipping trade.")
             await send_telegram_message("❌ Failed to fetch Nifty quotes, skipping trade.")
@@ -101,7 +173,6 @@ async def run_nifty_breakout_trade():
         logging.info(f"📊 Nifty LTP: {nifty_ltp}, Prev Close: {nifty_prev_close}, Net Change: {net_change:+.2f}")
 
         # 3️⃣ Try each stock in ranked order
-        loop = asyncio.get_running_loop()
         for attempt, stock in enumerate(ranked_stocks, start=1):
             allowed = is_nifty_trade_allowed(stock["Signal"], nifty_ltp, nifty_prev_close)
             logging.info(
@@ -111,20 +182,24 @@ async def run_nifty_breakout_trade():
 
             if not allowed:
                 logging.info(f"❌ Nifty filter failed for {stock['Stock Name']}, skipping")
-                await send_telegram_message(
+                await send_telegram_digest(
                     f"❌ Trade skipped for {stock['Stock Name']} | Nifty filter not passed\n"
                     f"Nifty LTP: {nifty_ltp}, Prev Close: {nifty_prev_close}, Net Change: {net_change:+.2f}"
                 )
                 continue
 
+            signal_at = perf_counter()
             logging.info(f"🚀 Attempt {attempt}: Executing trade for {stock['Stock Name']} | {stock['Signal']}")
+            order = loop.run_in_executor(None, execute_trade, stock, dhan, signal_at)
+
+            # Notify while the order is in flight, not before it
             await send_telegram_message(
                 f"🚀 Attempt {attempt}: Executing trade for {stock['Stock Name']} | {stock['Signal']}\n"
                 f"Entry: {stock['Entry']}\nSL: {stock['SL']}\nQty: {stock['Quantity']}\n"
                 f"Nifty LTP: {nifty_ltp}, Prev Close: {nifty_prev_close}, Net Change: {net_change:+.2f}"
             )
 
-            success = await loop.run_in_executor(None, execute_trade, stock, dhan)
+            success = await order
             if success:
                 logging.info(f"✅ Trade executed successfully for {stock['Stock Name']} on attempt {attempt}")
                 await send_telegram_message(
@@ -134,17 +209,25 @@ async def run_nifty_breakout_trade():
                 break
             else:
                 logging.error(f"❌ Trade failed for {stock['Stock Name']} on attempt {attempt}")
-                await send_telegram_message(
+                await send_telegram_digest(
                     f"❌ Trade FAILED for {stock['Stock Name']} on attempt {attempt}, trying next best stock..."
                 )
 
         else:
             logging.error("❌ All trade attempts failed")
-            await send_telegram_message("❌ All trade attempts failed today")
+            await send_telegram_digest("❌ All trade attempts failed today")
 
     except Exception as e:
         logging.error(f"❌ Error in run_nifty_breakout_trade: {e}")
         await send_telegram_message(f"❌ Trade execution error: {e}")
+    finally:
+        # Early returns / errors leave the Nifty fetch unawaited: cancel it
+        # or read its outcome so a failure is never left unretrieved
+        if nifty is not None:
+            if not nifty.done():
+                nifty.cancel()
+            elif not nifty.cancelled():
+                nifty.exception()
 
 
 
@@ -163,4 +246,4 @@ async def terminate_after_delay(min_minutes=2, max_minutes=5):
 
     logging.info(f"🛑 {delay_minutes} minutes elapsed. Terminating EC2 {instance_id}...")
     await send_telegram_message(f"🛑 {delay_minutes} minutes elapsed. Terminating EC2 ...")
-    terminate_instance(instance_id)
+    await asyncio.to_thread(terminate_instance, instance_id)
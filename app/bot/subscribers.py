@@ -0,0 +1,125 @@
+# app/bot/subscribers.py
+"""
+Telegram subscriber registry.
+
+Chats / channels that receive broadcast scan output, persisted as JSON
+in S3 (instances are short-lived):
+
+    s3://{S3_BUCKET}/{TELEGRAM_SUBSCRIBERS_KEY}   {"chats": [chat_id, ...]}
+
+The operator chat (CHAT_ID) is always included. Chats join / leave with
+/subscribe and /unsubscribe (app/bot/handlers.py); a chat may subscribe
+itself only if it is in TELEGRAM_SUBSCRIBE_ALLOWED, otherwise the operator
+adds it.
+
+Only a missing object means "no subscribers yet". Any other read failure
+(S3 error, corrupt body) is never cached and never written back: broadcasts
+fall back to the operator chat until a retry succeeds, and add / remove
+raise instead of overwriting the stored list.
+"""
+import json
+import logging
+import threading
+import time
+
+from app.config.aws_s3 import get_s3_object, upload_bytes_to_s3
+from app.config.settings import (
+    S3_BUCKET,
+    CHAT_ID,
+    TELEGRAM_SUBSCRIBERS_KEY,
+    TELEGRAM_SUBSCRIBE_ALLOWED,
+    TELEGRAM_SUBSCRIBERS_RETRY_SECS,
+)
+
+logger = logging.getLogger(__name__)
+
+_SUBSCRIBERS = None   # set[str] once loaded
+_LOCK = threading.Lock()
+_RETRY_AT = 0.0       # monotonic; after a failed load, no new attempt before this
+
+
+def _load():
+    """Stored chats plus the operator chat. Raises on anything but a missing key."""
+    body = get_s3_object(S3_BUCKET, TELEGRAM_SUBSCRIBERS_KEY)
+    chats = {str(c) for c in json.loads(body)["chats"]} if body else set()
+    chats.add(str(CHAT_ID))
+    return chats
+
+
+def _save(chats):
+    body = json.dumps({"chats": sorted(chats)}).encode()
+    return upload_bytes_to_s3(body, S3_BUCKET, TELEGRAM_SUBSCRIBERS_KEY, content_type="application/json")
+
+
+def can_subscribe(chat_id) -> bool:
+    """Chats allowed to /subscribe themselves."""
+    return str(chat_id) == str(CHAT_ID) or str(chat_id) in TELEGRAM_SUBSCRIBE_ALLOWED
+
+
+def get_subscribers() -> list:
+    """Chat IDs that receive broadcasts (operator chat first)."""
+    global _SUBSCRIBERS, _RETRY_AT
+    operator = str(CHAT_ID)
+    with _LOCK:
+        if _SUBSCRIBERS is None:
+            if time.monotonic() < _RETRY_AT:
+                return [operator]
+            try:
+                _SUBSCRIBERS = _load()
+            except Exception as e:
+                _RETRY_AT = time.monotonic() + TELEGRAM_SUBSCRIBERS_RETRY_SECS
+                logger.error(
+                    f"❌ Subscriber list unreadable ({e}) — operator chat only, "
+                    f"retry in {TELEGRAM_SUBSCRIBERS_RETRY_SECS:.0f}s"
+                )
+                return [operator]
+            logger.info(f"👥 Telegram subscribers loaded | {len(_SUBSCRIBERS)} chat(s)")
+        chats = set(_SUBSCRIBERS)
+    return [operator] + sorted(chats - {operator})
+
+
+def _update(chat_id, change):
+    """
+    Re-read the stored list, apply `change(chats, chat_id)` and save it.
+    Returns change()'s verdict; raises if the list cannot be read or written
+    (the in-memory list is only replaced after a successful save).
+    """
+    global _SUBSCRIBERS
+    chat_id = str(chat_id)
+    with _LOCK:
+        chats = _load()
+        changed = change(chats, chat_id)
+        if changed and not _save(chats):
+            raise RuntimeError("subscriber list could not be saved")
+        _SUBSCRIBERS = chats
+    return changed
+
+
+def _add(chats, chat_id):
+    if chat_id in chats:
+        return False
+    chats.add(chat_id)
+    return True
+
+
+def _remove(chats, chat_id):
+    if chat_id == str(CHAT_ID) or chat_id not in chats:
+        return False
+    chats.discard(chat_id)
+    return True
+
+
+def add_subscriber(chat_id) -> bool:
+    """True if newly added. Raises if the stored list cannot be read or saved."""
+    added = _update(chat_id, _add)
+    if added:
+        logger.info(f"➕ Subscriber added: {chat_id}")
+    return added
+
+
+def remove_subscriber(chat_id) -> bool:
+    """True if it was subscribed. The operator chat cannot be removed. Raises like add_subscriber."""
+    removed = _update(chat_id, _remove)
+    if removed:
+        logger.info(f"➖ Subscriber removed: {chat_id}")
+    return removed
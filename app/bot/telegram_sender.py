@@ -1,22 +1,248 @@
 # app/bot/telegram_sender.py
-import os
-import logging
+"""
+Non-blocking Telegram delivery.
+
+Messages are queued and sent by one background thread that owns its own
+event loop and a pooled httpx.AsyncClient (keep-alive, one TLS handshake
+for the whole session), so callers on the PTB loop, in worker threads or
+in plain sync code all return immediately.
+
+Each chat has its own lane: messages to one chat go out in order, while
+different chats are served concurrently. Telegram's limits are enforced
+with token buckets — one global (TELEGRAM_GLOBAL_RATE_PER_SEC) plus one
+per chat (TELEGRAM_CHAT_RATE_PER_SEC for private chats,
+TELEGRAM_GROUP_RATE_PER_MIN for groups / channels) — so a broadcast to N
+chats takes ~N / global rate, not N round trips.
+
+Failed sends are retried: HTTP 429 pauses all sending for exactly
+Telegram's `parameters.retry_after`, network errors / 5xx back off with
+jitter.
+flush_telegram() blocks until the queue is drained — it runs before EC2
+termination and at interpreter exit so no alert is lost.
+
+Messages over Telegram's limit are split on line boundaries;
+send_telegram_digest() coalesces bursts of small notifications into one
+message per TELEGRAM_COALESCE_SECS window; broadcast_telegram_message()
+renders once and fans out to every subscriber (app/bot/subscribers.py).
+"""
 import asyncio
-import requests
-from app.config.settings import BOT_TOKEN, CHAT_ID
+import atexit
+import logging
+import threading
+import time
+
+import httpx
+
+from app.bot.message_builder import TELEGRAM_MAX_CHARS, NotificationCoalescer, split_text
+from app.bot.subscribers import get_subscribers
+from app.broker.quote_batching import backoff_delay
+from app.broker.rate_limiter import TokenBucket
+from app.config.settings import (
+    BOT_TOKEN,
+    CHAT_ID,
+    TELEGRAM_SEND_MAX_ATTEMPTS,
+    TELEGRAM_FLUSH_TIMEOUT_SECS,
+    TELEGRAM_COALESCE_SECS,
+    TELEGRAM_GLOBAL_RATE_PER_SEC,
+    TELEGRAM_CHAT_RATE_PER_SEC,
+    TELEGRAM_GROUP_RATE_PER_MIN,
+)
+
+logger = logging.getLogger(__name__)
 
 # Standard footer for all messages
 TELEGRAM_FOOTER = "\n\n⚠️ This is for educational purposes only. Not a buy/sell recommendation. Trade at your own risk."
+MESSAGE_LIMIT = TELEGRAM_MAX_CHARS - len(TELEGRAM_FOOTER)   # room left for the message body
 
-async def send_telegram_message(message: str):
-    # Append footer automatically
-    full_message = f"{message}{TELEGRAM_FOOTER}"
-    
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": full_message, "parse_mode": "HTML"}
-    
+
+class TelegramOutbox:
+    def __init__(self, token, max_attempts=TELEGRAM_SEND_MAX_ATTEMPTS):
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.max_attempts = max_attempts
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._started = threading.Lock()
+        self._ready = threading.Event()
+        self._pending = 0
+        self._drained = threading.Condition()
+        self._lanes = {}                 # chat_id -> asyncio.Queue (one drain task each)
+        self._paused_until = 0.0         # monotonic; set by a 429
+        self.global_bucket = TokenBucket(rate=TELEGRAM_GLOBAL_RATE_PER_SEC, capacity=TELEGRAM_GLOBAL_RATE_PER_SEC)
+        self.stats = {"sent": 0, "retried": 0, "dropped": 0}
+
+    # ---- public ----
+    def enqueue(self, payload: dict):
+        """Thread-safe; returns immediately."""
+        self._ensure_started()
+        with self._drained:
+            self._pending += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, payload)
+
+    def pending(self):
+        with self._drained:
+            return self._pending
+
+    def flush(self, timeout=TELEGRAM_FLUSH_TIMEOUT_SECS) -> bool:
+        """Block until every queued message is sent or dropped (False on timeout)."""
+        with self._drained:
+            done = self._drained.wait_for(lambda: self._pending == 0, timeout=timeout)
+        if not done:
+            logger.warning(f"⚠️ Telegram flush timed out | {self._pending} message(s) unsent")
+        return done
+
+    # ---- internals ----
+    def _ensure_started(self):
+        with self._started:
+            if self._thread is None or not self._thread.is_alive():
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._run, name="telegram-outbox", daemon=True)
+                self._thread.start()
+                self._ready.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._ready.set()
+        self._loop.run_until_complete(self._worker())
+
+    async def _worker(self):
+        limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+        async with httpx.AsyncClient(timeout=10, limits=limits) as client:
+            while True:
+                payload = await self._queue.get()
+                chat_id = str(payload["chat_id"])
+                lane = self._lanes.get(chat_id)
+                if lane is None:
+                    lane = self._lanes[chat_id] = asyncio.Queue()
+                    asyncio.create_task(self._drain(client, chat_id, lane))
+                lane.put_nowait(payload)
+
+    async def _drain(self, client, chat_id, lane):
+        """One chat's messages, in order, within its own and the global rate limit."""
+        bucket = _chat_bucket(chat_id)
+        while True:
+            payload = await lane.get()
+            try:
+                await bucket.acquire_async()
+                await self._deliver(client, payload)
+            except Exception as e:
+                logger.error(f"❌ Telegram lane {chat_id} error: {e}")
+            finally:
+                with self._drained:
+                    self._pending -= 1
+                    self._drained.notify_all()
+
+    async def _deliver(self, client, payload):
+        for attempt in range(1, self.max_attempts + 1):
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self.global_bucket.acquire_async()
+            try:
+                response = await client.post(self.url, data=payload)
+            except httpx.HTTPError as e:
+                delay = backoff_delay(attempt, base=1.0, cap=30.0)
+                logger.warning(f"⚠️ Telegram send error ({e}) | retry in {delay:.1f}s")
+            else:
+                if response.status_code == 200:
+                    self.stats["sent"] += 1
+                    logger.info(f"📩 Sent alert: {payload['text']}")
+                    return
+                if response.status_code == 429:
+                    delay = _retry_after(response) or backoff_delay(attempt, base=1.0, cap=30.0)
+                    # Flood control applies to the bot, not just this chat → every lane waits
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                    logger.warning(f"🐢 Telegram rate limited (chat {payload['chat_id']}) | retry after {delay:.1f}s")
+                elif response.status_code >= 500:
+                    delay = backoff_delay(attempt, base=1.0, cap=30.0)
+                    logger.warning(f"⚠️ Telegram {response.status_code} | retry in {delay:.1f}s")
+                else:
+                    # 400 / 403 etc. will not succeed on retry
+                    self.stats["dropped"] += 1
+                    logger.error(f"❌ Telegram rejected message ({response.status_code}): {response.text}")
+                    return
+
+            if attempt < self.max_attempts:
+                self.stats["retried"] += 1
+                await asyncio.sleep(delay)
+
+        self.stats["dropped"] += 1
+        logger.error(f"❌ Telegram send failed after {self.max_attempts} attempts: {payload['text'][:200]}")
+
+
+def _chat_bucket(chat_id):
+    # Negative IDs are groups / channels (20 msgs/min); positive are private chats
+    if str(chat_id).startswith("-"):
+        return TokenBucket(rate=TELEGRAM_GROUP_RATE_PER_MIN / 60, capacity=1)
+    return TokenBucket(rate=TELEGRAM_CHAT_RATE_PER_SEC, capacity=1)
+
+
+def _retry_after(response):
     try:
-        requests.post(url, data=payload, timeout=5)
-        logging.info(f"📩 Sent alert: {full_message}")
-    except Exception as e:
-        logging.error(f"❌ Telegram send error: {e}")
+        return float(response.json().get("parameters", {}).get("retry_after"))
+    except Exception:
+        return None
+
+
+# One outbox per process
+TELEGRAM_OUTBOX = TelegramOutbox(BOT_TOKEN)
+
+
+def _render(message: str) -> list:
+    # Append footer automatically; over-long bodies go out as several messages
+    return [f"{part}{TELEGRAM_FOOTER}" for part in split_text(message, MESSAGE_LIMIT)]
+
+
+def _enqueue(message: str, chat_id=CHAT_ID):
+    for text in _render(message):
+        TELEGRAM_OUTBOX.enqueue({"chat_id": chat_id, "text": text, "parse_mode": "HTML"})
+
+
+# Bursts of small status notifications → one digest message
+TELEGRAM_DIGEST = NotificationCoalescer(_enqueue, window=TELEGRAM_COALESCE_SECS, limit=MESSAGE_LIMIT)
+
+
+def enqueue_telegram_message(message: str, chat_id=CHAT_ID):
+    """Queue `message` (+ footer) for delivery; safe from any thread, never blocks."""
+    TELEGRAM_DIGEST.flush()   # keep order: pending digest lines go first
+    _enqueue(message, chat_id)
+
+
+async def send_telegram_message(message: str):
+    # Delivery happens in the background
+    enqueue_telegram_message(message)
+
+
+def broadcast_telegram_message(message: str, chat_ids=None) -> int:
+    """
+    Render `message` once and queue it for every subscriber (or `chat_ids`);
+    chats are served concurrently within Telegram's limits. Never blocks.
+
+    Returns:
+        int -> number of chats queued
+    """
+    chat_ids = chat_ids if chat_ids is not None else get_subscribers()
+    texts = _render(message)
+    TELEGRAM_DIGEST.flush()
+    for chat_id in chat_ids:
+        for text in texts:
+            TELEGRAM_OUTBOX.enqueue({"chat_id": chat_id, "text": text, "parse_mode": "HTML"})
+    return len(chat_ids)
+
+
+async def send_telegram_digest(message: str):
+    """Low-urgency status line: coalesced with others sent in the same window."""
+    TELEGRAM_DIGEST.add(message)
+
+
+def flush_telegram(timeout=TELEGRAM_FLUSH_TIMEOUT_SECS) -> bool:
+    """Wait for queued messages to go out (call before shutdown)."""
+    TELEGRAM_DIGEST.flush()
+    if TELEGRAM_OUTBOX.pending() == 0:
+        return True
+    return TELEGRAM_OUTBOX.flush(timeout)
+
+
+atexit.register(flush_telegram)
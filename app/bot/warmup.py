@@ -0,0 +1,218 @@
+# app/bot/warmup.py
+"""
+Pre-market warm-up for the breakout trade path.
+
+Loads, in parallel, everything run_nifty_breakout_trade needs:
+  - fund        : Dhan fund limits (also opens + validates the Dhan HTTPS session)
+  - leverage    : nifty_mapping.csv leverage map (S3)
+  - candidates  : ranked nifty_15m_breakout_signals.csv (S3, with its ETag)
+  - nifty       : Nifty prev close (Dhan quote)
+
+Each item records when it was loaded, how long it took and whether its
+check passed, so the trade path can use it or reload only what is stale.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.config.settings import (
+    IST,
+    S3_BUCKET,
+    BREAKOUT_SIGNALS_KEY,
+    WARMUP_TIME,
+    WARMUP_MAX_AGE_SECS,
+)
+from app.config.aws_s3 import read_csv_from_s3, head_s3_etag
+from app.broker.fund_manager import init_fund_cache
+from app.broker.leverage_manager import init_leverage_cache
+from app.broker.market_data import get_nifty_ltp_and_prev_close
+from app.strategy.stock_selector import rank_stocks
+from app.bot.telegram_sender import send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------
+# Warm state
+# ------------------------------
+class WarmItem:
+    def __init__(self, name, value=None, ok=False, took_ms=0.0, error=None):
+        self.name = name
+        self.value = value
+        self.ok = ok
+        self.took_ms = took_ms
+        self.error = error
+        self.loaded_at = time.monotonic()
+        self.loaded_at_ist = datetime.now(IST)
+
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+
+class WarmState:
+    """Thread-safe store of warm items; one per process (WARM_STATE)."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+        self.duration_ms = None     # last full (pre-market) warm-up
+        self.completed_at = None
+        self.refresh_ms = None      # last partial top-up (ensure_warm)
+        self.refreshed_at = None
+
+    def put(self, item):
+        with self._lock:
+            self._items[item.name] = item
+
+    def item(self, name):
+        with self._lock:
+            return self._items.get(name)
+
+    def get(self, name, max_age=WARMUP_MAX_AGE_SECS):
+        """Warm value, or None if missing / failed its check / older than max_age."""
+        item = self.item(name)
+        if item is None or not item.ok or item.age() > max_age:
+            return None
+        return item.value
+
+    def ages(self):
+        """{name: seconds since loaded}."""
+        with self._lock:
+            return {name: round(item.age(), 1) for name, item in self._items.items()}
+
+    def is_ready(self):
+        with self._lock:
+            return bool(self._items) and all(item.ok for item in self._items.values())
+
+    def report(self):
+        lines = [f"🔥 <b>Trade warm-up</b> ({self.duration_ms or 0:.0f} ms)"]
+        if self.refresh_ms is not None:
+            lines.append(f"🔄 Last refresh: {self.refresh_ms:.0f} ms at {self.refreshed_at:%H:%M:%S}")
+        with self._lock:
+            items = list(self._items.values())
+        for item in items:
+            status = "✅" if item.ok else "❌"
+            detail = f" — {item.error}" if item.error else ""
+            lines.append(
+                f"{status} {item.name}: {item.took_ms:.0f} ms, age {item.age():.0f}s{detail}"
+            )
+        return "\n".join(lines)
+
+
+WARM_STATE = WarmState()
+
+
+# ------------------------------
+# Loaders (value, check-error or None)
+# ------------------------------
+def _load_fund():
+    fund = init_fund_cache(force=True)
+    return fund, None if fund > 0 else "available fund is zero (Dhan session/token?)"
+
+
+def _load_leverage():
+    leverage = init_leverage_cache(force=True)
+    return len(leverage), None if leverage else "leverage map empty"
+
+
+def _load_candidates(bucket=S3_BUCKET, key=BREAKOUT_SIGNALS_KEY):
+    etag = head_s3_etag(bucket, key)
+    ranked = rank_stocks(read_csv_from_s3(bucket, key))
+    return {"etag": etag, "ranked": ranked}, None if ranked else "no ranked candidates"
+
+
+def _load_nifty():
+    _, prev_close = get_nifty_ltp_and_prev_close()
+    return prev_close, None if prev_close else "Nifty prev close unavailable"
+
+
+LOADERS = {
+    "fund": _load_fund,
+    "leverage": _load_leverage,
+    "candidates": _load_candidates,
+    "nifty": _load_nifty,
+}
+
+
+def _run_loader(name, loader):
+    start = time.perf_counter()
+    try:
+        value, error = loader()
+    except Exception as e:
+        value, error = None, str(e)
+    item = WarmItem(name, value, ok=error is None, took_ms=(time.perf_counter() - start) * 1000, error=error)
+    WARM_STATE.put(item)
+    return item
+
+
+def warm_up(names=None):
+    """
+    Load the given items (default: all) in parallel into WARM_STATE.
+    A full warm-up sets duration_ms; a partial one (ensure_warm's top-up)
+    sets refresh_ms instead, so the pre-market figure is kept.
+
+    Returns:
+        WarmState
+    """
+    full = names is None
+    names = list(names or LOADERS)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="warmup") as pool:
+        items = list(pool.map(lambda n: _run_loader(n, LOADERS[n]), names))
+
+    took_ms = (time.perf_counter() - start) * 1000
+    if full:
+        WARM_STATE.duration_ms = took_ms
+        WARM_STATE.completed_at = datetime.now(IST)
+    else:
+        WARM_STATE.refresh_ms = took_ms
+        WARM_STATE.refreshed_at = datetime.now(IST)
+
+    failed = [item.name for item in items if not item.ok]
+    if failed:
+        logger.warning(f"⚠️ Warm-up finished in {took_ms:.0f} ms | {names} | failed={failed}")
+    else:
+        logger.info(f"🔥 Warm-up finished in {took_ms:.0f} ms | {WARM_STATE.ages()}")
+    return WARM_STATE
+
+
+def ensure_warm(max_age=WARMUP_MAX_AGE_SECS):
+    """Reload only the items that are missing, failed or older than max_age."""
+    stale = [name for name in LOADERS if WARM_STATE.get(name, max_age) is None]
+    if stale:
+        logger.info(f"🔄 Warm-up refresh: {stale}")
+        warm_up(stale)
+    return WARM_STATE
+
+
+def warm_candidates(bucket=S3_BUCKET, key=BREAKOUT_SIGNALS_KEY):
+    """
+    Ranked candidates from the warm state, as long as the signals CSV has
+    not been rewritten since (ETag check); otherwise re-read and re-rank.
+    """
+    cached = WARM_STATE.get("candidates")
+    if cached is not None and cached["etag"] and cached["etag"] == head_s3_etag(bucket, key):
+        return cached["ranked"]
+
+    logger.info("📥 Breakout signals not warm (or changed since warm-up), re-reading")
+    item = _run_loader("candidates", lambda: _load_candidates(bucket, key))
+    return item.value["ranked"] if item.value else []
+
+
+async def run_pre_market_warmup(at=WARMUP_TIME):
+    """Wait until `at` (IST) and warm the trade path; reports to Telegram."""
+    while datetime.now(IST).time() < at:
+        await asyncio.sleep(20)
+
+    loop = asyncio.get_running_loop()
+    state = await loop.run_in_executor(None, warm_up)
+    await send_telegram_message(state.report())
+
+
+if __name__ == "__main__":
+    from app.config import logging_config  # noqa: F401
+    print(warm_up().report())
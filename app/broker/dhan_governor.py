@@ -0,0 +1,307 @@
+# app/broker/dhan_governor.py
+"""
+Single request governor in front of the Dhan SDK.
+
+Every SDK call made through `dhan` (app.config.dhan_auth) is queued here:
+  - per-endpoint token buckets enforce Dhan's rate limits
+    (order / quote / data / non-trading APIs are limited separately)
+  - calls are dispatched by priority lane, so an order modification never
+    waits behind a bulk quote sweep; a lane whose endpoint has no token
+    left is skipped rather than blocking the others
+  - a call is only dispatched when a worker is free for it, and
+    DHAN_GOVERNOR_RESERVED_WORKERS workers are held back for the order and
+    monitor lanes, so slow or hung bulk calls cannot occupy every worker
+  - queue depth and wait times are tracked per lane
+
+Callers keep the plain SDK interface (dhan.quote_data(...) blocks and
+returns the response). Use `with dhan_priority(PRIORITY_MONITOR):` to
+raise the lane of a normally low-priority call.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.broker.rate_limiter import TokenBucket
+from app.config.settings import (
+    DHAN_ORDER_RATE_PER_SEC,
+    DHAN_QUOTE_RATE_PER_SEC,
+    DHAN_DATA_RATE_PER_SEC,
+    DHAN_NON_TRADING_RATE_PER_SEC,
+    DHAN_GOVERNOR_WORKERS,
+    DHAN_GOVERNOR_RESERVED_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Priority lanes (lower runs first)
+# ------------------------------
+PRIORITY_ORDER = 0      # place / modify / cancel
+PRIORITY_MONITOR = 1    # LTP polls for open positions, trade-path quotes
+PRIORITY_ACCOUNT = 2    # fund limits, positions, order book
+PRIORITY_BULK = 3       # scanner quote sweeps, historical data
+
+URGENT_LANES = {PRIORITY_ORDER, PRIORITY_MONITOR}   # may use the reserved workers
+
+LANE_NAMES = {
+    PRIORITY_ORDER: "order",
+    PRIORITY_MONITOR: "monitor",
+    PRIORITY_ACCOUNT: "account",
+    PRIORITY_BULK: "bulk",
+}
+
+# ------------------------------
+# Endpoint classes (Dhan rate-limit groups)
+# ------------------------------
+ORDER_METHODS = {
+    "place_order", "modify_order", "cancel_order", "place_slice_order",
+    "place_super_order", "modify_super_order", "cancel_super_order",
+    "place_forever", "modify_forever", "cancel_forever",
+}
+QUOTE_METHODS = {"quote_data", "ticker_data", "ohlc_data"}
+DATA_METHODS = {"historical_daily_data", "intraday_minute_data", "option_chain", "expiry_list"}
+
+DEFAULT_PRIORITY = {
+    "order": PRIORITY_ORDER,
+    "quote": PRIORITY_BULK,
+    "data": PRIORITY_BULK,
+    "non_trading": PRIORITY_ACCOUNT,
+}
+
+_PRIORITY = contextvars.ContextVar("dhan_priority", default=None)
+
+
+@contextmanager
+def dhan_priority(priority):
+    """Run the enclosed Dhan calls in `priority`'s lane (this thread / task only)."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def endpoint_for(method_name):
+    if method_name in ORDER_METHODS:
+        return "order"
+    if method_name in QUOTE_METHODS:
+        return "quote"
+    if method_name in DATA_METHODS:
+        return "data"
+    return "non_trading"
+
+
+class _Request:
+    __slots__ = ("endpoint", "name", "fn", "args", "kwargs", "priority", "future", "queued_at")
+
+    def __init__(self, endpoint, name, fn, args, kwargs, priority):
+        self.endpoint = endpoint
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.future = Future()
+        self.queued_at = time.monotonic()
+
+
+# ------------------------------
+# Governor
+# ------------------------------
+class DhanGovernor:
+    def __init__(self, buckets: dict, workers=DHAN_GOVERNOR_WORKERS, reserved=DHAN_GOVERNOR_RESERVED_WORKERS):
+        self.buckets = buckets                              # endpoint -> TokenBucket
+        self._lanes = {p: deque() for p in LANE_NAMES}      # priority -> deque[_Request]
+        self._cond = threading.Condition()
+        self.workers = workers
+        self.shared_workers = max(1, workers - reserved)    # usable by the account / bulk lanes
+        self._in_flight = {p: 0 for p in LANE_NAMES}        # priority -> calls executing
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dhan-gov")
+        self._thread = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            lane: {"calls": 0, "errors": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for lane in LANE_NAMES.values()
+        }
+
+    # ---- public ----
+    def submit(self, endpoint, name, fn, args=(), kwargs=None, priority=None) -> Future:
+        if priority is None:
+            priority = _PRIORITY.get()
+        if priority is None:
+            priority = DEFAULT_PRIORITY.get(endpoint, PRIORITY_ACCOUNT)
+
+        request = _Request(endpoint, name, fn, args, kwargs or {}, priority)
+        with self._cond:
+            self._ensure_started()
+            self._lanes[priority].append(request)
+            self._cond.notify()
+        return request.future
+
+    def call(self, endpoint, name, fn, *args, **kwargs):
+        """Blocking submit(); returns fn's result or raises its exception."""
+        return self.submit(endpoint, name, fn, args, kwargs).result()
+
+    def has_spare(self, endpoint) -> bool:
+        """True if a call to `endpoint` would run now without delaying queued ones."""
+        with self._cond:
+            queued = any(r.endpoint == endpoint for lane in self._lanes.values() for r in lane)
+        return not queued and self.buckets[endpoint].time_until_available() == 0
+
+    def queue_depth(self):
+        with self._cond:
+            return {LANE_NAMES[p]: len(q) for p, q in self._lanes.items()}
+
+    def stats(self):
+        """Per-lane calls / errors / avg + max queue wait (ms) and current depth."""
+        depth = self.queue_depth()
+        with self._stats_lock:
+            return {
+                lane: {
+                    "depth": depth[lane],
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "wait_avg_ms": round(s["wait_total"] / s["calls"] * 1000, 1) if s["calls"] else 0.0,
+                    "wait_max_ms": round(s["wait_max"] * 1000, 1),
+                }
+                for lane, s in self._stats.items()
+            }
+
+    def log_stats(self):
+        for lane, s in self.stats().items():
+            if s["calls"] or s["depth"]:
+                logger.info(
+                    f"🚦 Dhan lane {lane} | depth={s['depth']} calls={s['calls']} errors={s['errors']} "
+                    f"wait avg={s['wait_avg_ms']} ms max={s['wait_max_ms']} ms"
+                )
+
+    # ---- internals ----
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._dispatch_loop, name="dhan-governor", daemon=True)
+            self._thread.start()
+
+    def _has_worker(self, priority):
+        busy = sum(self._in_flight.values())
+        if busy >= self.workers:
+            return False
+        if priority in URGENT_LANES:
+            return True
+        shared_busy = sum(n for p, n in self._in_flight.items() if p not in URGENT_LANES)
+        return shared_busy < self.shared_workers
+
+    def _take_ready(self):
+        """
+        Highest-priority queued request with a free worker and a token now.
+        Cancelled requests are dropped without spending a token.
+        Returns (request, None) or (None, seconds until a token frees up;
+        None = wait for a new request or a finished call).
+        """
+        empty = set()
+        for priority in sorted(self._lanes):
+            lane = self._lanes[priority]
+            for request in [r for r in lane if r.future.cancelled()]:
+                lane.remove(request)
+            if not lane or not self._has_worker(priority):
+                continue
+            for i, request in enumerate(lane):
+                if request.endpoint in empty:
+                    continue
+                if self.buckets[request.endpoint].try_acquire():
+                    del lane[i]
+                    self._in_flight[priority] += 1
+                    return request, None
+                empty.add(request.endpoint)
+
+        if not empty:
+            return None, None   # nothing runnable until a request arrives or a call finishes
+        return None, min(self.buckets[e].time_until_available() for e in empty)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                request, wait = self._take_ready()
+                while request is None:
+                    self._cond.wait(timeout=wait)
+                    request, wait = self._take_ready()
+
+            waited = time.monotonic() - request.queued_at
+            self._record(request, waited)
+            self._pool.submit(self._execute, request)
+
+    def _execute(self, request):
+        try:
+            if not request.future.set_running_or_notify_cancel():
+                return
+            # Dispatch / completion times ride on the future (service time = finished - started)
+            request.future.started_at = time.monotonic()
+            try:
+                result = request.fn(*request.args, **request.kwargs)
+                request.future.finished_at = time.monotonic()
+                request.future.set_result(result)
+            except BaseException as e:
+                with self._stats_lock:
+                    self._stats[LANE_NAMES[request.priority]]["errors"] += 1
+                request.future.set_exception(e)
+        finally:
+            with self._cond:
+                self._in_flight[request.priority] -= 1
+                self._cond.notify()
+
+    def _record(self, request, waited):
+        with self._stats_lock:
+            s = self._stats[LANE_NAMES[request.priority]]
+            s["calls"] += 1
+            s["wait_total"] += waited
+            s["wait_max"] = max(s["wait_max"], waited)
+        if waited > 2:
+            logger.warning(
+                f"🐢 Dhan {request.name} waited {waited:.1f}s in lane {LANE_NAMES[request.priority]} "
+                f"| depth={self.queue_depth()}"
+            )
+
+
+class GovernedDhan:
+    """
+    Drop-in stand-in for a dhanhq client: SDK methods are routed through
+    the governor, everything else (dhan.BUY, dhan.NSE, ...) passes through.
+    """
+
+    def __init__(self, client, governor):
+        self._client = client
+        self._governor = governor
+
+    @property
+    def governor(self):
+        return self._governor
+
+    def submit(self, name, *args, **kwargs) -> Future:
+        """Non-blocking SDK call: Future with .started_at / .finished_at once run."""
+        return self._governor.submit(endpoint_for(name), name, getattr(self._client, name), args, kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_") or isinstance(attr, type):
+            return attr
+
+        endpoint = endpoint_for(name)
+
+        def governed(*args, **kwargs):
+            return self._governor.call(endpoint, name, attr, *args, **kwargs)
+
+        governed.__name__ = name
+        return governed
+
+
+def build_dhan_governor():
+    return DhanGovernor({
+        "order": TokenBucket(rate=DHAN_ORDER_RATE_PER_SEC, capacity=DHAN_ORDER_RATE_PER_SEC),
+        "quote": TokenBucket(rate=DHAN_QUOTE_RATE_PER_SEC, capacity=1),
+        "data": TokenBucket(rate=DHAN_DATA_RATE_PER_SEC, capacity=DHAN_DATA_RATE_PER_SEC),
+        "non_trading": TokenBucket(rate=DHAN_NON_TRADING_RATE_PER_SEC, capacity=DHAN_NON_TRADING_RATE_PER_SEC),
+    })
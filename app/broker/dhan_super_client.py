@@ -3,6 +3,7 @@
 import logging
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from app.config.dhan_auth import dhan  # DHAN SDK with enums
 from app.broker.super_order import SuperOrder
 from app.broker.market_data import get_ltp
@@ -11,6 +12,19 @@ from app.broker.leverage_manager import init_leverage_cache
 from app.broker.position_sizing import calculate_position_size
 
 
+# Pre-trade lookups are independent: fund limits (Dhan), leverage map (S3), LTP (Dhan)
+_PRE_TRADE_POOL = ThreadPoolExecutor(max_workers=3, thread_name_prefix="pre-trade")
+
+
+def _fetch_ltp(security_id, name, max_retries, ltp_sleep):
+    ltp = None
+    for attempt in range(max_retries):
+        ltp = get_ltp(security_id)
+        if ltp is not None:
+            break
+        logging.warning(f"LTP fetch failed for {name}, retry {attempt + 1}/{max_retries}")
+        time.sleep(ltp_sleep)
+    return ltp
 
 
 class DhanSuperBroker:
@@ -22,7 +36,8 @@ class DhanSuperBroker:
     def __init__(self, dhan_context):
         self.super = SuperOrder(dhan_context)
 
-    def place_trade(self, stock, trailing_multiplier=0.5, max_ltp_retries=3, ltp_sleep=1):
+    def place_trade(self, stock, trailing_multiplier=0.5, max_ltp_retries=3, ltp_sleep=1,
+                    signal_at=None):
         """
         Place a Super Order on DHAN with robust LTP fetching, trailing stop-loss,
         and calculated target if not provided.
@@ -33,16 +48,20 @@ class DhanSuperBroker:
             trailing_multiplier (float): fraction of risk to use for trailing jump
             max_ltp_retries (int): max attempts to fetch LTP if None
             ltp_sleep (int/float): seconds to wait between retries
+            signal_at (float): time.perf_counter() at the trade decision;
+                               signal→ack latency is measured from here
 
         Returns:
              dict: {
             "order_id": str,
             "entry": float,
             "sl": float,
-            "qty": int
+            "qty": int,
+            "latency_ms": float
         } or None if failed
     
         """
+        signal_at = signal_at or time.perf_counter()
         try:
             # Extract stock info
             name = stock.get("Stock Name", "UNKNOWN")
@@ -54,27 +73,22 @@ class DhanSuperBroker:
             side_str = stock["Signal"].upper()  # "BUY" or "SELL"
             side_enum = dhan.BUY if side_str == "BUY" else dhan.SELL
             # -------------------------------
-            # Init fund & leverage cache (SAFE)
-            # -------------------------------
-            init_fund_cache()
-            init_leverage_cache()
-
-            # -------------------------------
-            # Fetch LTP with retries
+            # Fund, leverage & LTP in parallel
+            # (fund / leverage are no-ops once app.bot.warmup has run)
             # -------------------------------
-            ltp = None
-            for attempt in range(max_ltp_retries):
-                ltp = get_ltp(stock["Security ID"])
-                if ltp is not None:
-                    break
-                logging.warning(f"LTP fetch failed for {name}, retry {attempt + 1}/{max_ltp_retries}")
-                time.sleep(ltp_sleep)
+            fund = _PRE_TRADE_POOL.submit(init_fund_cache)
+            leverage = _PRE_TRADE_POOL.submit(init_leverage_cache)
+            ltp_future = _PRE_TRADE_POOL.submit(
+                _fetch_ltp, stock["Security ID"], name, max_ltp_retries, ltp_sleep
+            )
+            fund.result()
+            leverage.result()
+            ltp = ltp_future.result()
 
             if ltp is None:
                 logging.error(f"❌ Unable to fetch LTP for {name}. Aborting order.")
                 return None
-            
-            
+            prepared_at = time.perf_counter()
 
             # -------------------------------
             # Skip order if price already crossed entry
@@ -110,24 +124,6 @@ class DhanSuperBroker:
                 # Use entry as base for target (safer than LTP)
                 target = round(ltp + 1.5 * risk if side_str == "BUY" else ltp - 1.5 * risk, 2)
 
-            # -------------------------------
-            # Prepare payload for logging
-            # -------------------------------
-            order_payload = {
-                "transactionType": side_str,
-                "exchangeSegment": "NSE",
-                "productType": "INTRADAY",
-                "orderType": "LIMIT",
-                "securityId": instrument_id,
-                "quantity": qty,
-                "price": ltp,
-                "targetPrice": target,
-                "stopLossPrice": sl,
-                "trailingJump": trailing_jump,
-                "correlationId": f"{name}_AUTO"
-            }
-            logging.info("📦 DHAN SuperOrder Payload:\n%s", json.dumps(order_payload, indent=2))
-
             # -------------------------------
             # Place Super Order (using DHAN enums)
             # -------------------------------
@@ -144,6 +140,25 @@ class DhanSuperBroker:
                 trailingJump=trailing_jump,
                 tag=f"{name}_AUTO"
             )
+            acked_at = time.perf_counter()
+
+            # -------------------------------
+            # Payload log (kept off the critical path)
+            # -------------------------------
+            order_payload = {
+                "transactionType": side_str,
+                "exchangeSegment": "NSE",
+                "productType": "INTRADAY",
+                "orderType": "LIMIT",
+                "securityId": instrument_id,
+                "quantity": qty,
+                "price": ltp,
+                "targetPrice": target,
+                "stopLossPrice": sl,
+                "trailingJump": trailing_jump,
+                "correlationId": f"{name}_AUTO"
+            }
+            logging.info("📦 DHAN SuperOrder Payload:\n%s", json.dumps(order_payload, indent=2))
 
             # Convert response if string
             if isinstance(resp, str):
@@ -154,12 +169,18 @@ class DhanSuperBroker:
                 return None
 
             order_id = resp["data"]["orderId"]
+            latency_ms = (acked_at - signal_at) * 1000
             logging.info(f"✅ Super Order placed for {name} | Entry: {ltp}, SL: {sl}, Target: {target} | ID: {order_id}")
+            logging.info(
+                f"⏱️ Signal→ack {latency_ms:.0f} ms | {name} | "
+                f"prep={(prepared_at - signal_at) * 1000:.0f} ms, order={(acked_at - prepared_at) * 1000:.0f} ms"
+            )
             return {
             "order_id": order_id,
             "entry": ltp,
             "sl": sl,
-            "qty": qty
+            "qty": qty,
+            "latency_ms": latency_ms
         }
 
         except Exception:
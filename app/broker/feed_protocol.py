@@ -0,0 +1,80 @@
+# app/broker/feed_protocol.py
+"""
+Dhan v2 Live Market Feed wire format (little-endian). Shared by LiveFeed
+and the offline stand-in server; no app imports so both run anywhere.
+
+    request    JSON {"RequestCode": 15, "InstrumentCount": n,
+                     "InstrumentList": [{"ExchangeSegment": "NSE_EQ", "SecurityId": "1333"}]}
+    header     <B H B I   feed code | message length | segment | security id
+    ticker     <f I       LTP | last trade time        (feed code 2)
+    disconnect <H         reason                        (feed code 50)
+"""
+import json
+import struct
+import time
+
+SEGMENT_CODES = {
+    "IDX_I": 0, "NSE_EQ": 1, "NSE_FNO": 2, "NSE_CURRENCY": 3,
+    "BSE_EQ": 4, "MCX_COMM": 5, "BSE_CURRENCY": 7, "BSE_FNO": 8,
+}
+SEGMENT_NAMES = {code: name for name, code in SEGMENT_CODES.items()}
+
+REQUEST_SUBSCRIBE_TICKER = 15
+REQUEST_UNSUBSCRIBE_TICKER = 16
+FEED_TICKER = 2
+FEED_DISCONNECT = 50
+MAX_INSTRUMENTS_PER_REQUEST = 100
+
+HEADER = struct.Struct("<BHBI")
+TICKER = struct.Struct("<fI")
+DISCONNECT = struct.Struct("<H")
+
+
+# ------------------------------
+# Protocol helpers
+# ------------------------------
+def subscription_messages(instruments, request_code=REQUEST_SUBSCRIBE_TICKER):
+    """[(segment, security_id), ...] → JSON requests of ≤ 100 instruments each."""
+    instruments = list(instruments)
+    messages = []
+    for i in range(0, len(instruments), MAX_INSTRUMENTS_PER_REQUEST):
+        chunk = instruments[i:i + MAX_INSTRUMENTS_PER_REQUEST]
+        messages.append(json.dumps({
+            "RequestCode": request_code,
+            "InstrumentCount": len(chunk),
+            "InstrumentList": [
+                {"ExchangeSegment": segment, "SecurityId": str(sec_id)} for segment, sec_id in chunk
+            ],
+        }))
+    return messages
+
+
+def encode_ticker(segment, security_id, ltp, ltt=None):
+    """Ticker packet bytes (used by the stub server)."""
+    body = TICKER.pack(float(ltp), int(ltt if ltt is not None else time.time()))
+    return HEADER.pack(FEED_TICKER, HEADER.size + len(body), SEGMENT_CODES[segment], int(security_id)) + body
+
+
+def parse_packets(message: bytes):
+    """
+    Binary frame → list of (feed_code, segment, security_id, payload dict).
+    A frame may carry several packets back to back.
+    """
+    packets = []
+    offset = 0
+    while offset + HEADER.size <= len(message):
+        code, length, segment_code, sec_id = HEADER.unpack_from(message, offset)
+        if length < HEADER.size:
+            break
+        body_at = offset + HEADER.size
+        payload = {}
+
+        if code == FEED_TICKER and body_at + TICKER.size <= len(message):
+            ltp, ltt = TICKER.unpack_from(message, body_at)
+            payload = {"ltp": round(ltp, 2), "ltt": ltt}
+        elif code == FEED_DISCONNECT and body_at + DISCONNECT.size <= len(message):
+            payload = {"reason": DISCONNECT.unpack_from(message, body_at)[0]}
+
+        packets.append((code, SEGMENT_NAMES.get(segment_code, str(segment_code)), str(sec_id), payload))
+        offset += length
+    return packets
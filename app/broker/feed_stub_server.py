@@ -0,0 +1,107 @@
+# app/broker/feed_stub_server.py
+"""
+Offline stand-in for Dhan's Live Market Feed.
+
+Speaks the same binary protocol (feed_protocol.py): accepts ticker
+subscribe / unsubscribe requests and streams random-walk ticker packets
+for every subscribed instrument. --drop-every forces periodic disconnects
+to exercise LiveFeed's reconnect + resubscribe path.
+
+    python -m app.broker.feed_stub_server --port 8765 --interval 0.2
+    DHAN_FEED_URL=ws://127.0.0.1:8765 python -m app.main
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+import websockets
+
+from app.broker.feed_protocol import (
+    REQUEST_SUBSCRIBE_TICKER,
+    REQUEST_UNSUBSCRIBE_TICKER,
+    encode_ticker,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StubFeedServer:
+    def __init__(self, host="127.0.0.1", port=8765, interval=0.2,
+                 start_price=100.0, drop_every=None, prices=None):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.start_price = start_price
+        self.drop_every = drop_every
+        self.prices = dict(prices or {})   # (segment, sec_id) -> price; settable from tests
+        self.connections = 0
+        self._server = None
+
+    async def _handler(self, ws, path=None):
+        self.connections += 1
+        subscribed = set()
+
+        async def receive():
+            async for message in ws:
+                request = json.loads(message)
+                keys = {
+                    (item["ExchangeSegment"], str(item["SecurityId"]))
+                    for item in request.get("InstrumentList", [])
+                }
+                if request.get("RequestCode") == REQUEST_SUBSCRIBE_TICKER:
+                    subscribed.update(keys)
+                elif request.get("RequestCode") == REQUEST_UNSUBSCRIBE_TICKER:
+                    subscribed.difference_update(keys)
+
+        async def stream():
+            elapsed = 0.0
+            while True:
+                await asyncio.sleep(self.interval)
+                elapsed += self.interval
+                if self.drop_every and elapsed >= self.drop_every:
+                    await ws.close()
+                    return
+                frame = b""
+                for key in list(subscribed):
+                    price = self.prices.get(key, self.start_price)
+                    price = max(0.05, price * (1 + random.gauss(0, 0.001)))
+                    self.prices[key] = price
+                    frame += encode_ticker(key[0], key[1], price)
+                if frame:
+                    await ws.send(frame)
+
+        tasks = [asyncio.ensure_future(receive()), asyncio.ensure_future(stream())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        logger.info(f"🧪 Stub feed listening on ws://{self.host}:{self.port}")
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Offline Dhan live feed stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.2)
+    parser.add_argument("--drop-every", type=float, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(StubFeedServer(args.host, args.port, args.interval,
+                               drop_every=args.drop_every).serve_forever())
@@ -0,0 +1,191 @@
+# app/broker/live_feed.py
+"""
+Streaming LTP feed over Dhan's v2 Live Market Feed WebSocket
+(wire format in feed_protocol.py).
+
+LiveFeed runs its own event loop in a daemon thread, reconnects with
+backoff and re-subscribes everything on every new connection. Callbacks
+are invoked on the feed thread as callback(security_id: str, ltp: float, ltt: int).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+import websockets
+
+from app.broker.feed_protocol import (
+    FEED_DISCONNECT,
+    FEED_TICKER,
+    REQUEST_UNSUBSCRIBE_TICKER,
+    parse_packets,
+    subscription_messages,
+)
+
+logger = logging.getLogger(__name__)
+
+# ws://127.0.0.1:8765 to run against app/broker/feed_stub_server.py
+DHAN_FEED_URL = os.getenv("DHAN_FEED_URL", "wss://api-feed.dhan.co")
+
+
+# ------------------------------
+# Feed client
+# ------------------------------
+class LiveFeed:
+    def __init__(self, url=DHAN_FEED_URL, client_id=None, access_token=None,
+                 reconnect_delay=1.0, max_reconnect_delay=30.0):
+        self.url = url
+        self.client_id = client_id
+        self.access_token = access_token
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._callbacks = {}    # (segment, sec_id) -> [callback, ...]
+        self._last = {}         # (segment, sec_id) -> (ltp, received_at)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._ws = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self.connected = threading.Event()
+        self.reconnects = 0
+
+    # ---- public, thread-safe ----
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run_thread, name="live-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def subscribe(self, security_id, callback, segment="NSE_EQ"):
+        key = (segment, str(security_id))
+        with self._lock:
+            is_new = key not in self._callbacks
+            self._callbacks.setdefault(key, []).append(callback)
+        if is_new:
+            self._send_threadsafe(subscription_messages([key]))
+
+    def unsubscribe(self, security_id, callback=None, segment="NSE_EQ"):
+        key = (segment, str(security_id))
+        with self._lock:
+            callbacks = self._callbacks.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if callback is None or not callbacks:
+                self._callbacks.pop(key, None)
+                gone = True
+            else:
+                gone = False
+        if gone:
+            self._send_threadsafe(subscription_messages([key], REQUEST_UNSUBSCRIBE_TICKER))
+
+    def last_tick(self, security_id, segment="NSE_EQ"):
+        """(ltp, seconds since received) or (None, None)."""
+        entry = self._last.get((segment, str(security_id)))
+        if entry is None:
+            return None, None
+        return entry[0], time.monotonic() - entry[1]
+
+    # ---- internals ----
+    def _connect_url(self):
+        if not self.access_token:
+            return self.url
+        query = urlencode({
+            "version": 2, "token": self.access_token,
+            "clientId": self.client_id, "authType": 2,
+        })
+        return f"{self.url}?{query}"
+
+    def _send_threadsafe(self, messages):
+        if self._loop is None or not self.connected.is_set():
+            return   # sent on (re)connect
+        asyncio.run_coroutine_threadsafe(self._send(messages), self._loop)
+
+    async def _send(self, messages):
+        try:
+            for message in messages:
+                await self._ws.send(message)
+        except Exception as e:
+            logger.warning(f"⚠️ Live feed send failed (will resubscribe on reconnect): {e}")
+
+    def _dispatch(self, segment, sec_id, ltp, ltt):
+        key = (segment, sec_id)
+        self._last[key] = (ltp, time.monotonic())
+        with self._lock:
+            callbacks = list(self._callbacks.get(key, ()))
+        for callback in callbacks:
+            try:
+                callback(sec_id, ltp, ltt)
+            except Exception:
+                logger.exception(f"❌ Live feed callback failed for {sec_id}")
+
+    def _run_thread(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.run())
+        finally:
+            self._loop.close()
+
+    async def run(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(self._connect_url(), max_size=2 ** 20) as ws:
+                    self._ws = ws
+                    # Mark connected first: a subscribe racing with this
+                    # snapshot is then sent twice rather than not at all
+                    self.connected.set()
+                    with self._lock:
+                        keys = list(self._callbacks)
+                    for message in subscription_messages(keys):
+                        await ws.send(message)
+                    delay = self.reconnect_delay
+                    logger.info(f"📶 Live feed connected | subscribed={len(keys)}")
+
+                    async for message in ws:
+                        if isinstance(message, str):
+                            continue
+                        for code, segment, sec_id, payload in parse_packets(message):
+                            if code == FEED_TICKER and payload:
+                                self._dispatch(segment, sec_id, payload["ltp"], payload["ltt"])
+                            elif code == FEED_DISCONNECT:
+                                logger.warning(f"⚠️ Live feed disconnect packet: {payload}")
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"⚠️ Live feed dropped: {e}")
+            finally:
+                self.connected.clear()
+                self._ws = None
+
+            if self._stopped.is_set():
+                break
+            self.reconnects += 1
+            logger.info(f"🔄 Live feed reconnecting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+_FEED = None
+_FEED_LOCK = threading.Lock()
+
+
+def get_live_feed():
+    """Process-wide started LiveFeed (credentials from SSM via dhan_auth)."""
+    global _FEED
+    with _FEED_LOCK:
+        if _FEED is None:
+            from app.config.dhan_auth import get_dhan_credentials
+            client_id, access_token = get_dhan_credentials()
+            _FEED = LiveFeed(client_id=client_id, access_token=access_token).start()
+    return _FEED
@@ -1,18 +1,76 @@
 #app/broker/market_data.py
 from app.config.dhan_auth import dhan
+from app.config.settings import (
+    DHAN_QUOTE_BATCH_SIZE,
+    DHAN_QUOTE_MIN_BATCH_SIZE,
+    DHAN_QUOTE_MAX_IN_FLIGHT,
+    QUOTE_TARGET_LATENCY_SECS,
+    QUOTE_HEDGE_FACTOR,
+    QUOTE_CACHE_TTL,
+)
+from app.broker.dhan_governor import dhan_priority, PRIORITY_MONITOR
+from app.broker.quote_cache import QuoteCache
+from app.broker.quote_batching import (
+    AdaptiveBatchSizer,
+    backoff_delay,
+    hedged_call,
+    hedged_call_async,
+)
+import asyncio
 import time
 import logging
 logger = logging.getLogger(__name__)
 import json
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
+# Shared across every quote path in the process
+# (the quote rate limit itself is enforced by the Dhan governor)
+QUOTE_CACHE = QuoteCache(ttl=QUOTE_CACHE_TTL)
+QUOTE_BATCH_SIZER = AdaptiveBatchSizer(
+    max_size=DHAN_QUOTE_BATCH_SIZE,
+    min_size=DHAN_QUOTE_MIN_BATCH_SIZE,
+    target_latency=QUOTE_TARGET_LATENCY_SECS,
+)
+
+
+def _parse_quote_response(quote_data, segment):
+    """Dhan quote payload → {security_id: quote} for one segment (raises if malformed)."""
+    if isinstance(quote_data, str):
+        quote_data = json.loads(quote_data)
+
+    segment_quotes = (
+        quote_data.get("data", {})
+        .get("data", {})
+        .get(segment)
+    )
+
+    if not isinstance(segment_quotes, dict):
+        raise ValueError(f"Invalid quote payload: {quote_data}")
+    return segment_quotes
+
+def _submit_batch(batch_ids, segment):
+    """Queue one quote request on the Dhan governor → Future."""
+    return dhan.submit("quote_data", securities={segment: batch_ids})
+
+
 # ==========================================================
 # DHAN QUOTE WITH RETRY (GENERIC SEGMENT)
 # ==========================================================
 def get_quotes_with_retry(security_ids, segment, retry_delay=1, max_retries=10):
     """
-    Fetch DHAN quotes with retry + batching (max 1000 per request)
+    Fetch DHAN quotes with adaptive batching + hedged retries.
+
+    - Batch size follows QUOTE_BATCH_SIZER (max 1000, shrinks on slow /
+      failing batches, grows back when healthy).
+    - A batch still running QUOTE_HEDGE_FACTOR × the median latency gets a
+      duplicate request when the quote rate limit has a spare token; the
+      first success wins.
+    - Failed batches are re-split at the current size and retried with
+      jittered exponential backoff (retry_delay is the base delay, capped
+      at 8s), up to max_retries attempts per batch.
+      Batches that already succeeded are never fetched again.
 
     Args:
         security_ids : list[int | str]
@@ -25,71 +83,172 @@ def get_quotes_with_retry(security_ids, segment, retry_delay=1, max_retries=10):
     if not isinstance(security_ids, list):
         security_ids = [security_ids]
 
-    BATCH_SIZE = 1000
+    sizer = QUOTE_BATCH_SIZER
     all_quotes = {}
+    remaining = list(security_ids)
+    retries = deque()            # (batch_ids, attempt) waiting for another go
+    failed = 0
+    batch_no = 0
+    start = time.perf_counter()
+
+    while remaining or retries:
+        if retries:
+            batch_ids, attempt = retries.popleft()
+            delay = backoff_delay(attempt, base=retry_delay)
+            logger.info(f"⏳ Retrying {len(batch_ids)} instruments in {delay:.2f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+        else:
+            batch_ids, remaining = sizer.split(remaining)
+            attempt = 0
+        batch_no += 1
+
+        logger.info(
+            f"📡 Fetching DHAN quotes for {segment} | batch {batch_no} "
+            f"({len(batch_ids)} instruments, attempt {attempt + 1})"
+        )
+        try:
+            quote_data, latency = hedged_call(
+                lambda: _submit_batch(batch_ids, segment),
+                sizer.hedge_after(QUOTE_HEDGE_FACTOR),
+                on_hedge=lambda: _on_hedge(sizer, batch_no),
+                can_hedge=_can_hedge,
+            )
+            segment_quotes = _parse_quote_response(quote_data, segment)
+        except Exception as e:
+            sizer.record_failure()
+            logger.error(f"❌ Batch {batch_no} failed (attempt {attempt + 1}) for {segment}: {e}")
 
-    # Split into batches of 1000
-    for i in range(0, len(security_ids), BATCH_SIZE):
-        batch_ids = security_ids[i:i + BATCH_SIZE]
-
-        logger.info(f"📦 Processing batch {i//BATCH_SIZE + 1} "
-                    f"({len(batch_ids)} instruments)")
-
-        for attempt in range(1, max_retries + 1):
-            try:
-                logger.info(
-                    f"📡 Fetching DHAN quotes for {segment} "
-                    f"{len(batch_ids)} instruments (attempt {attempt})"
-                )
-
-                quote_data = dhan.quote_data(
-                    securities={segment: batch_ids}
-                )
-
-                if isinstance(quote_data, str):
-                    quote_data = json.loads(quote_data)
-
-                segment_quotes = (
-                    quote_data.get("data", {})
-                    .get("data", {})
-                    .get(segment)
-                )
-
-                if not isinstance(segment_quotes, dict):
-                    raise ValueError(f"Invalid quote payload: {quote_data}")
-
-                # Merge batch result
-                all_quotes.update(segment_quotes)
-
-                logger.info(
-                    f"✅ Batch success ({len(segment_quotes)} instruments)"
-                )
-                break  # exit retry loop if success
-
-            except Exception as e:
-                logger.error(
-                    f"❌ Batch failed (attempt {attempt}) for {segment}: {e}",
-                    exc_info=True
-                )
-
-                if attempt < max_retries:
-                    logger.info(f"⏳ Retrying in {retry_delay} second...")
-                    time.sleep(retry_delay)
-                else:
-                    logger.error("🛑 Max retries reached for this batch")
-        time.sleep(1)
+            if attempt + 1 < max_retries:
+                # Re-split at the (now smaller) size so one bad batch costs less next time
+                parts = [batch_ids[i:i + sizer.size] for i in range(0, len(batch_ids), sizer.size)]
+                retries.extend((part, attempt + 1) for part in parts)
+            else:
+                failed += len(batch_ids)
+                logger.error(f"🛑 Max retries reached for batch {batch_no} ({len(batch_ids)} instruments)")
+            continue
+
+        sizer.record_success(latency)
+
+        # Merge batch result
+        all_quotes.update(segment_quotes)
+        QUOTE_CACHE.put_many(segment, segment_quotes)
+        logger.info(
+            f"✅ Batch {batch_no} success ({len(segment_quotes)} instruments, {latency:.2f}s) "
+            f"| next size={sizer.size}"
+        )
 
     if not all_quotes:
         return None
 
-    logger.info(f"🎯 Total instruments fetched: {len(all_quotes)}")
+    logger.info(
+        f"🎯 Total instruments fetched: {len(all_quotes)} | failed={failed} "
+        f"| {time.perf_counter() - start:.2f}s | sizer={sizer.stats}"
+    )
     return all_quotes
+
+
+def _can_hedge():
+    # A hedge must not take the quote token the next real batch is waiting for
+    return dhan.governor.has_spare("quote")
+
+
+def _on_hedge(sizer, batch_no):
+    sizer.record_hedge()
+    logger.warning(f"🐢 Batch {batch_no} is a straggler — sending a hedged duplicate")
+
+
+# ==========================================================
+# DHAN QUOTES — ASYNC, CONCURRENT BATCHES
+# ==========================================================
+async def get_quotes_async(security_ids, segment, max_in_flight=DHAN_QUOTE_MAX_IN_FLIGHT,
+                           retry_delay=1, max_retries=10):
+    """
+    Same result as get_quotes_with_retry, but batches overlap: up to
+    `max_in_flight` requests are outstanding while the Dhan governor paces
+    request starts at Dhan's quote rate. Batch size, straggler hedging and
+    jittered backoff follow QUOTE_BATCH_SIZER as in get_quotes_with_retry;
+    requests run on the governor's workers so the event loop stays free.
+
+    Returns:
+        dict -> {security_id: quote_data} or None
+    """
+    if not isinstance(security_ids, list):
+        security_ids = [security_ids]
+
+    size = QUOTE_BATCH_SIZER.size
+    batches = [
+        security_ids[i:i + size]
+        for i in range(0, len(security_ids), size)
+    ]
+    in_flight = asyncio.Semaphore(max_in_flight)
+    start = time.perf_counter()
+
+    async def fetch(batch_no, batch_ids):
+        async with in_flight:
+            for attempt in range(1, max_retries + 1):
+                try:
+                    quote_data, latency = await hedged_call_async(
+                        lambda: _submit_batch(batch_ids, segment),
+                        QUOTE_BATCH_SIZER.hedge_after(QUOTE_HEDGE_FACTOR),
+                        on_hedge=lambda: _on_hedge(QUOTE_BATCH_SIZER, batch_no),
+                        can_hedge=_can_hedge,
+                    )
+                    segment_quotes = _parse_quote_response(quote_data, segment)
+                    QUOTE_BATCH_SIZER.record_success(latency)
+                    QUOTE_CACHE.put_many(segment, segment_quotes)
+                    logger.info(
+                        f"✅ Async batch {batch_no} success ({len(segment_quotes)} instruments, "
+                        f"{latency:.2f}s, attempt {attempt})"
+                    )
+                    return segment_quotes
+                except Exception as e:
+                    QUOTE_BATCH_SIZER.record_failure()
+                    logger.error(f"❌ Async batch {batch_no} failed (attempt {attempt}) for {segment}: {e}")
+                    if attempt < max_retries:
+                        await asyncio.sleep(backoff_delay(attempt, base=retry_delay))
+            logger.error(f"🛑 Max retries reached for async batch {batch_no}")
+            return {}
+
+    results = await asyncio.gather(
+        *(fetch(n, batch) for n, batch in enumerate(batches, start=1))
+    )
+
+    all_quotes = {}
+    for segment_quotes in results:
+        all_quotes.update(segment_quotes)
+
+    if not all_quotes:
+        return None
+
+    logger.info(
+        f"🎯 Async quotes fetched: {len(all_quotes)} instruments | "
+        f"{len(batches)} batches | {time.perf_counter() - start:.2f}s"
+    )
+    return all_quotes
+
+
+def get_quotes_cached(security_ids, segment, ttl=None):
+    """
+    get_quotes_with_retry through the shared QUOTE_CACHE: IDs quoted within
+    `ttl` seconds (default QUOTE_CACHE_TTL) cost nothing, and concurrent
+    callers asking for the same IDs share one request.
+
+    Returns:
+        dict -> {security_id: quote_data} or None
+    """
+    if not isinstance(security_ids, list):
+        security_ids = [security_ids]
+
+    quotes = QUOTE_CACHE.fetch(segment, security_ids, get_quotes_with_retry, ttl=ttl)
+    return quotes or None
+
+
 def get_ltp_and_change(security_ids, segment):
     """
     Returns:
         {security_id: (ltp, net_change)}
     """
-    quotes = get_quotes_with_retry(security_ids, segment)
+    quotes = get_quotes_cached(security_ids, segment)
 
     if not quotes:
         return {sec_id: (None, None) for sec_id in security_ids}
@@ -118,7 +277,8 @@ def get_nifty_ltp_and_prev_close():
     """
     NIFTY_ID = 13
 
-    quotes = get_quotes_with_retry([NIFTY_ID], segment="IDX_I")
+    with dhan_priority(PRIORITY_MONITOR):
+        quotes = get_quotes_cached([NIFTY_ID], segment="IDX_I")
 
     if not quotes:
         return None, None
@@ -140,9 +300,30 @@ def get_nifty_ltp_and_prev_close():
 
 
 
+def _fetch_quote_once(security_ids, segment):
+    """Single un-retried quote call (retries are the caller's business)."""
+    resp = dhan.quote_data(securities={segment: list(security_ids)})
+
+    data = resp.get("data", {})
+    if not isinstance(data, dict):
+        raise ValueError(f"Unexpected 'data' type: {type(data)}")
+
+    inner_data = data.get("data", {})
+    if not isinstance(inner_data, dict):
+        raise ValueError(f"Unexpected 'data.data' type: {type(inner_data)}")
+
+    segment_data = inner_data.get(segment, {})
+    if not isinstance(segment_data, dict):
+        raise ValueError(f"Unexpected segment data type: {type(segment_data)} | value: {segment_data}")
+
+    return segment_data
+
+
 def get_ltp(security_id, segment="NSE_EQ", retry_delay=1, max_attempts=7):
     """
     Fetch LTP for a single security with retry and detailed logging.
+    The first attempt is served from QUOTE_CACHE when a fresh quote is
+    already there; retries always go to Dhan.
 
     Args:
         security_id (str/int): Instrument/security ID
@@ -155,21 +336,10 @@ def get_ltp(security_id, segment="NSE_EQ", retry_delay=1, max_attempts=7):
     """
     for attempt in range(1, max_attempts + 1):
         try:
-            resp = dhan.quote_data(securities={segment: [security_id]})
-
-            data = resp.get("data", {})
-            if not isinstance(data, dict):
-                raise ValueError(f"Unexpected 'data' type: {type(data)}")
-
-            inner_data = data.get("data", {})
-            if not isinstance(inner_data, dict):
-                raise ValueError(f"Unexpected 'data.data' type: {type(inner_data)}")
-
-            segment_data = inner_data.get(segment, {})
-            if not isinstance(segment_data, dict):
-                raise ValueError(f"Unexpected segment data type: {type(segment_data)} | value: {segment_data}")
-
-            quote = segment_data.get(str(security_id))
+            with dhan_priority(PRIORITY_MONITOR):
+                quote = QUOTE_CACHE.fetch(
+                    segment, [security_id], _fetch_quote_once, ttl=None if attempt == 1 else 0
+                ).get(str(security_id))
             if not quote or not isinstance(quote, dict):
                 raise ValueError(f"Empty or invalid quote: {quote}")
 
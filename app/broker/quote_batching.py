@@ -0,0 +1,150 @@
+# app/broker/quote_batching.py
+"""
+Building blocks for resilient quote snapshots:
+
+- AdaptiveBatchSizer : batch size follows observed latency / errors
+                       (halve on failure, shrink when slow, grow when fast)
+- backoff_delay      : exponential backoff with full jitter
+- hedged_call        : re-issue a straggler request once it has been
+                       running well past the median latency, but only when
+                       the rate limit has a spare token; first success wins
+                       and the loser is cancelled (or ignored if running)
+
+Latency here is service time (dispatch → response), not time spent queued
+behind the Dhan governor's rate limit.
+"""
+import asyncio
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+class AdaptiveBatchSizer:
+    def __init__(self, max_size, min_size=50, target_latency=2.0, window=50):
+        """
+        Args:
+            max_size (int): hard cap (Dhan: 1000 instruments per request)
+            min_size (int): never shrink below this
+            target_latency (float): seconds; slower batches shrink the size
+            window (int): latencies kept for the median
+        """
+        self.max_size = int(max_size)
+        self.min_size = int(min(min_size, max_size))
+        self.target_latency = target_latency
+        self.size = self.max_size
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.stats = {"ok": 0, "errors": 0, "hedged": 0}
+
+    def record_success(self, latency):
+        with self._lock:
+            self.stats["ok"] += 1
+            self._latencies.append(latency)
+            if latency > self.target_latency:
+                self.size = max(self.min_size, int(self.size * 0.75))
+            else:
+                self.size = min(self.max_size, int(self.size * 1.25) + 1)
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["errors"] += 1
+            self.size = max(self.min_size, self.size // 2)
+
+    def record_hedge(self):
+        with self._lock:
+            self.stats["hedged"] += 1
+
+    def median_latency(self):
+        with self._lock:
+            return statistics.median(self._latencies) if self._latencies else None
+
+    def hedge_after(self, factor=2.0):
+        """Seconds after which a batch counts as a straggler."""
+        median = self.median_latency()
+        return factor * (median if median is not None else self.target_latency)
+
+    def split(self, ids):
+        """Next batch at the current size + the rest."""
+        size = self.size
+        return ids[:size], ids[size:]
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Full-jitter exponential backoff for retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _running_for(future):
+    started = getattr(future, "started_at", None)
+    return 0.0 if started is None else time.monotonic() - started
+
+
+def _service_time(future):
+    return future.finished_at - future.started_at
+
+
+def hedged_call(submit, hedge_after, on_hedge=None, can_hedge=None, poll=0.05):
+    """
+    submit() → Future (from GovernedDhan.submit). If that request has been
+    *executing* (not merely queued behind the rate limit) for longer than
+    `hedge_after` seconds, and can_hedge() allows it (e.g. the quote bucket
+    has a spare token), submit a duplicate; the first success wins. The
+    other request is cancelled if still queued, otherwise its result is
+    ignored.
+
+    Returns:
+        (result, service seconds of the winning request)
+    Raises the last error if every attempt failed.
+    """
+    futures = [submit()]
+    while not futures[0].done():
+        if _running_for(futures[0]) > hedge_after and (can_hedge is None or can_hedge()):
+            if on_hedge:
+                on_hedge()
+            futures.append(submit())
+            break
+        wait(futures, timeout=poll)
+
+    error = None
+    try:
+        while futures:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), _service_time(future)
+                error = future.exception()
+            futures = list(pending)
+        raise error
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def hedged_call_async(submit, hedge_after, on_hedge=None, can_hedge=None, poll=0.05):
+    """hedged_call for coroutines: same rules, awaits instead of blocking."""
+    futures = [submit()]
+    while not futures[0].done():
+        if _running_for(futures[0]) > hedge_after and (can_hedge is None or can_hedge()):
+            if on_hedge:
+                on_hedge()
+            futures.append(submit())
+            break
+        await asyncio.sleep(poll)
+
+    error = None
+    pending = [asyncio.wrap_future(f) for f in futures]
+    by_wrapper = dict(zip(pending, futures))
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), _service_time(by_wrapper[task])
+                error = task.exception()
+        raise error
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,115 @@
+# app/broker/quote_cache.py
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteCache:
+    """
+    Process-wide quote snapshot keyed by (segment, security_id).
+
+    - Any fetch (bulk or single) fills the cache; lookups within `ttl`
+      seconds are served from memory. Quotes without a last_price are
+      never cached, so the next lookup refetches them.
+    - Concurrent requests for the same IDs are merged: the first caller
+      fetches, the others wait on its result instead of calling Dhan again.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}     # (segment, sec_id) -> (fetched_at, quote)
+        self._inflight = {}    # (segment, sec_id) -> Future
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def put_many(self, segment, quotes: dict, fetched_at=None):
+        fetched_at = fetched_at or time.monotonic()
+        with self._lock:
+            for sec_id, quote in quotes.items():
+                if isinstance(quote, dict) and quote.get("last_price") is not None:
+                    self._entries[(segment, str(sec_id))] = (fetched_at, quote)
+
+    def get(self, segment, security_id, ttl=None):
+        """Fresh cached quote or None."""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get((segment, str(security_id)))
+        if entry and time.monotonic() - entry[0] <= ttl:
+            return entry[1]
+        return None
+
+    def age(self, segment, security_id):
+        """Seconds since the cached quote was fetched (None if never)."""
+        with self._lock:
+            entry = self._entries.get((segment, str(security_id)))
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def fetch(self, segment, security_ids, fetch_fn, ttl=None) -> dict:
+        """
+        Quotes for security_ids, fetching only what is stale or missing.
+
+        Args:
+            segment      : "NSE_EQ", "IDX_I", ...
+            security_ids : list[int | str]
+            fetch_fn     : fetch_fn(ids, segment) -> {security_id: quote} or None
+            ttl          : freshness override in seconds (0 = always refetch)
+
+        Returns:
+            dict -> {security_id (str): quote} for the IDs that could be resolved
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        result, owned, waiting = {}, [], {}
+
+        with self._lock:
+            for sec_id in dict.fromkeys(str(s) for s in security_ids):
+                key = (segment, sec_id)
+                entry = self._entries.get(key)
+                if entry and now - entry[0] <= ttl:
+                    result[sec_id] = entry[1]
+                    self.stats["hits"] += 1
+                elif key in self._inflight:
+                    waiting[sec_id] = self._inflight[key]
+                    self.stats["coalesced"] += 1
+                else:
+                    self._inflight[key] = Future()
+                    owned.append(sec_id)
+                    self.stats["misses"] += 1
+
+        if owned:
+            error = None
+            quotes = {}
+            try:
+                quotes = {str(k): v for k, v in (fetch_fn(owned, segment) or {}).items()}
+                self.put_many(segment, quotes)
+            except Exception as e:
+                error = e
+            finally:
+                with self._lock:
+                    futures = [self._inflight.pop((segment, sec_id)) for sec_id in owned]
+                for sec_id, future in zip(owned, futures):
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(quotes.get(sec_id))
+
+            if error is not None:
+                raise error
+            result.update({sec_id: quotes[sec_id] for sec_id in owned if sec_id in quotes})
+
+        for sec_id, future in waiting.items():
+            try:
+                quote = future.result()
+            except Exception:
+                quote = None
+            if quote is not None:
+                result[sec_id] = quote
+
+        return result
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return 0.0 if total == 0 else (self.stats["hits"] + self.stats["coalesced"]) / total
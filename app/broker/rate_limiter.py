@@ -0,0 +1,66 @@
+# app/broker/rate_limiter.py
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket usable from threads and coroutines alike.
+
+    Callers reserve a slot up front (the bucket may go negative) and then
+    wait until that slot comes due, so concurrent callers queue fairly
+    instead of polling.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate (float): tokens added per second
+            capacity (float): burst size
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take `tokens` now; returns seconds to wait before using them."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take `tokens` only if they are available right now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self._tokens
+            return 0.0 if missing <= 0 else missing / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Blocking acquire. Returns the time spent waiting."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Non-blocking acquire for coroutines. Returns the time spent waiting."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -4,11 +4,23 @@ import pandas as pd
 import io
 import os
 import logging
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 S3_BUCKET = os.getenv("S3_BUCKET", "dhan-trading-data")
 
-s3 = boto3.client("s3", region_name=AWS_REGION)
+# Shared HTTP pool — sized for the bulk EOD readers (default botocore pool is 10)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+
+s3 = boto3.client(
+    "s3",
+    region_name=AWS_REGION,
+    config=Config(
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+    ),
+)
 
 def read_csv_from_s3(bucket: str, key: str) -> pd.DataFrame:
     """
@@ -31,29 +43,73 @@ def read_csv_from_s3(bucket: str, key: str) -> pd.DataFrame:
         logging.error(f"❌ Error reading CSV from S3: {e}")
         return pd.DataFrame()
 
-def list_s3_files(bucket: str, prefix: str):
+def read_many_from_s3(bucket: str, keys, parser, max_workers: int = S3_MAX_POOL_CONNECTIONS):
     """
-    List all files under a specific S3 prefix.
+    Fetch and parse many S3 objects concurrently over the shared client pool.
 
     Args:
         bucket (str): S3 bucket name
-        prefix (str): folder/prefix path
+        keys (list): S3 object keys
+        parser (callable): parser(bucket, key) -> parsed object
+        max_workers (int): max requests in flight (capped by the pool size)
 
     Returns:
-        list: List of object keys
+        list: parsed objects, in the same order as keys
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    workers = max(1, min(max_workers, S3_MAX_POOL_CONNECTIONS, len(keys)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-read") as pool:
+        return list(pool.map(lambda key: parser(bucket, key), keys))
+
+
+def read_many_csv_from_s3(bucket: str, keys, max_workers: int = S3_MAX_POOL_CONNECTIONS):
+    """
+    Concurrent read_csv_from_s3 for many keys.
+
+    Returns:
+        list[pd.DataFrame]: one DataFrame per key (empty on failure), in key order
+    """
+    return read_many_from_s3(bucket, keys, read_csv_from_s3, max_workers=max_workers)
+
+def list_s3_objects(bucket: str, prefix: str):
+    """
+    List all objects under a prefix with their metadata.
+
+    Returns:
+        list: [{"key", "etag", "size", "last_modified"}, ...] ([] on failure)
     """
     try:
         paginator = s3.get_paginator("list_objects_v2")
-        keys = []
+        objects = []
         for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-            contents = page.get("Contents", [])
-            for obj in contents:
-                keys.append(obj["Key"])
-        return keys
+            for obj in page.get("Contents", []):
+                objects.append({
+                    "key": obj["Key"],
+                    "etag": obj["ETag"].strip('"'),
+                    "size": obj["Size"],
+                    "last_modified": obj["LastModified"],
+                })
+        return objects
     except Exception as e:
-        logging.error(f"❌ Error listing S3 files: {e}")
+        logging.error(f"❌ Error listing S3 objects: {e}")
         return []
 
+def list_s3_files(bucket: str, prefix: str):
+    """
+    List all files under a specific S3 prefix.
+
+    Args:
+        bucket (str): S3 bucket name
+        prefix (str): folder/prefix path
+
+    Returns:
+        list: List of object keys
+    """
+    return [obj["key"] for obj in list_s3_objects(bucket, prefix)]
+
 def upload_csv_to_s3(df, bucket, key):
     try:
         if df is None or df.empty:
@@ -76,3 +132,65 @@ def upload_csv_to_s3(df, bucket, key):
         logging.error(f"❌ Upload failed: {e}")
 
 
+def upload_bytes_to_s3(body: bytes, bucket: str, key: str, content_type="application/octet-stream"):
+    try:
+        s3.put_object(Bucket=bucket, Key=key, Body=body, ContentType=content_type)
+        logging.info(f"✅ Uploaded to s3://{bucket}/{key} ({len(body)} bytes)")
+        return True
+    except Exception as e:
+        logging.error(f"❌ Upload failed: {e}")
+        return False
+
+
+def read_bytes_from_s3(bucket: str, key: str):
+    """
+    Reads a raw S3 object. Returns bytes or None if missing / failed.
+    """
+    try:
+        obj = s3.get_object(Bucket=bucket, Key=key)
+        return obj["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        logging.warning(f"⚠️ S3 key not found: s3://{bucket}/{key}")
+        return None
+    except Exception as e:
+        logging.error(f"❌ Error reading s3://{bucket}/{key}: {e}")
+        return None
+
+
+def get_s3_object(bucket: str, key: str):
+    """
+    Raw bytes of s3://bucket/key, or None only if the key does not exist.
+    Any other failure raises — for read-modify-write callers that must not
+    mistake an outage for an empty object.
+    """
+    try:
+        return s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+
+
+def head_s3_etag(bucket: str, key: str):
+    """ETag of s3://bucket/key without downloading it (None if missing / failed)."""
+    try:
+        return s3.head_object(Bucket=bucket, Key=key)["ETag"]
+    except Exception as e:
+        logging.warning(f"⚠️ HEAD failed for s3://{bucket}/{key}: {e}")
+        return None
+
+
+def download_s3_file(bucket: str, key: str, path: str):
+    """
+    Download an object to `path` atomically (temp file + rename), so a
+    reader never sees a half-written file. Returns bytes written or None.
+    """
+    tmp_path = f"{path}.part"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        s3.download_file(bucket, key, tmp_path)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+    except Exception as e:
+        logging.error(f"❌ Download failed for s3://{bucket}/{key}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
@@ -1,15 +1,22 @@
 # app/config/dhan_auth.py
 from dhanhq import DhanContext, dhanhq
 from app.config.aws_ssm import get_param
+from app.broker.dhan_governor import GovernedDhan, build_dhan_governor
 
 _client_id = None
 _access_token = None
 
-def get_dhan_client():
+def get_dhan_credentials():
     global _client_id, _access_token
     if not _client_id or not _access_token:
         _client_id = get_param("/dhan/client_id")
         _access_token = get_param("/dhan/access_token")
-    return dhanhq(DhanContext(_client_id, _access_token))
+    return _client_id, _access_token
+
+def get_dhan_client():
+    client_id, access_token = get_dhan_credentials()
+    return dhanhq(DhanContext(client_id, access_token))
 
-dhan = get_dhan_client()
+# Every SDK call goes through one rate-limited, prioritised governor
+dhan_governor = build_dhan_governor()
+dhan = GovernedDhan(get_dhan_client(), dhan_governor)
@@ -16,11 +16,64 @@ AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 S3_BUCKET = os.getenv("S3_BUCKET", "dhan-trading-data")
 MAP_FILE_KEY = "uploads/mapping.csv"
 NIFTYMAP_FILE_KEY="uploads/nifty_mapping.csv"
+BREAKOUT_SIGNALS_KEY = "uploads/nifty_15m_breakout_signals.csv"
 # S3 keys
 CANDLE_FILE_KEY = "uploads/inside_bar_15min_data_RS80.csv"   # 15-min candle CSV in S3
 FILTERED_FILE_KEY = "uploads/inside_bar_15min_RS80.csv"  # optional filtered output
 EOD_DATA_PREFIX = "eod_data"   # 👈 folder in S3
 
+# --- EOD Loading ---
+EOD_DATE_FORMAT = os.getenv("EOD_DATE_FORMAT", "%Y-%m-%d")   # eod_data "date" column (ISO 8601 also accepted)
+EOD_LOAD_CONCURRENCY = int(os.getenv("EOD_LOAD_CONCURRENCY", "32"))  # parallel S3 reads
+EOD_TAIL_READS_ENABLED = os.getenv("EOD_TAIL_READS_ENABLED", "1") == "1"   # ranged GETs of just the last N rows
+EOD_MIRROR_ENABLED = os.getenv("EOD_MIRROR_ENABLED", "0") == "1"   # only on long-lived hosts / persistent volumes
+EOD_MIRROR_DIR = os.getenv("EOD_MIRROR_DIR", "data/eod_mirror")    # local copy of eod_data/ + manifest
+EOD_MIRROR_MAX_AGE_HOURS = float(os.getenv("EOD_MIRROR_MAX_AGE_HOURS", "1"))   # older → delta sync before reading
+EOD_MIRROR_RETRY_SECS = float(os.getenv("EOD_MIRROR_RETRY_SECS", "300"))   # after a failed sync, read S3 this long before retrying
+EOD_FRAME_CACHE_ENABLED = os.getenv("EOD_FRAME_CACHE_ENABLED", "1") == "1"
+EOD_FRAME_CACHE_MB = int(os.getenv("EOD_FRAME_CACHE_MB", "512"))   # memory budget for parsed frames kept between scans
+EOD_PANEL_KEY = "eod_panel/eod_panel.parquet"   # last N candles of every instrument
+EOD_PANEL_DAYS = int(os.getenv("EOD_PANEL_DAYS", "250"))
+EOD_PANEL_ENABLED = os.getenv("EOD_PANEL_ENABLED", "1") == "1"
+EOD_CUBE_DIR = os.getenv("EOD_CUBE_DIR", "data/eod_cube")   # local memory-mapped cube
+EOD_CUBE_ENABLED = os.getenv("EOD_CUBE_ENABLED", "1") == "1"
+EMA_STATE_KEY = "eod_state/ema_state.parquet"   # yesterday's EMAs per instrument
+EMA_STATE_ENABLED = os.getenv("EMA_STATE_ENABLED", "1") == "1"
+
+# --- Dhan API limits ---
+DHAN_QUOTE_RATE_PER_SEC = float(os.getenv("DHAN_QUOTE_RATE_PER_SEC", "1"))   # Market Quote API: 1 req/sec
+DHAN_QUOTE_BATCH_SIZE = 1000                                                 # max instruments per quote request
+DHAN_QUOTE_MIN_BATCH_SIZE = int(os.getenv("DHAN_QUOTE_MIN_BATCH_SIZE", "100"))  # adaptive sizing floor
+QUOTE_TARGET_LATENCY_SECS = float(os.getenv("QUOTE_TARGET_LATENCY_SECS", "2"))  # slower batches shrink
+QUOTE_HEDGE_FACTOR = float(os.getenv("QUOTE_HEDGE_FACTOR", "2"))   # hedge batches slower than N × median
+DHAN_QUOTE_MAX_IN_FLIGHT = int(os.getenv("DHAN_QUOTE_MAX_IN_FLIGHT", "4"))
+SCAN_CHUNK_SIZE = int(os.getenv("SCAN_CHUNK_SIZE", "1000"))   # instruments per scan pipeline chunk (quotes → history → rules)
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "2"))   # seconds a quote counts as fresh
+DHAN_ORDER_RATE_PER_SEC = float(os.getenv("DHAN_ORDER_RATE_PER_SEC", "10"))          # Order APIs
+DHAN_DATA_RATE_PER_SEC = float(os.getenv("DHAN_DATA_RATE_PER_SEC", "5"))             # Historical / Data APIs
+DHAN_NON_TRADING_RATE_PER_SEC = float(os.getenv("DHAN_NON_TRADING_RATE_PER_SEC", "20"))  # Funds, positions, ...
+DHAN_GOVERNOR_WORKERS = int(os.getenv("DHAN_GOVERNOR_WORKERS", "8"))   # concurrent in-flight SDK calls
+DHAN_GOVERNOR_RESERVED_WORKERS = int(os.getenv("DHAN_GOVERNOR_RESERVED_WORKERS", "2"))   # of those, only for order / monitor calls
+
+# --- Live Market Feed (WebSocket) ---
+LIVE_FEED_ENABLED = os.getenv("LIVE_FEED_ENABLED", "1") == "1"
+LIVE_FEED_STALE_SECS = float(os.getenv("LIVE_FEED_STALE_SECS", "5"))  # no tick this long → poll get_ltp
+POSITION_MONITOR_INTERVAL = float(os.getenv("POSITION_MONITOR_INTERVAL", "2"))  # seconds between monitor cycles
+
+# --- Pre-market warm-up ---
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "0") == "1"   # schedule run_pre_market_warmup on start
+WARMUP_TIME = time(9, 20)   # before the 15-min breakout window
+WARMUP_MAX_AGE_SECS = float(os.getenv("WARMUP_MAX_AGE_SECS", "1800"))  # older warm items are reloaded
+
+# --- On-demand scan results (/ema, /alerts, /stock) ---
+MARKET_OPEN_TIME = time(9, 15)
+MARKET_CLOSE_TIME = time(15, 30)
+SCAN_RESULT_TTL_SECS = float(os.getenv("SCAN_RESULT_TTL_SECS", "300"))   # live-quote staleness allowed while the market is open
+
+# --- Trigger watchlist (pre-market levels, intraday watch) ---
+TRIGGER_WATCH_ENABLED = os.getenv("TRIGGER_WATCH_ENABLED", "0") == "1"   # keeps the instance up until the close
+TRIGGER_WATCH_INTERVAL_SECS = float(os.getenv("TRIGGER_WATCH_INTERVAL_SECS", "5"))   # seconds between universe re-checks
+
 # --- Logs ---
 LOG_DIR = "logs"
 
@@ -29,6 +82,17 @@ LOG_DIR = "logs"
 # =========================
 BOT_TOKEN = get_param("/trading-bot/telegram/BOT_TOKEN", decrypt=True)
 CHAT_ID = get_param("/trading-bot/telegram/CHAT_ID")
+TELEGRAM_SEND_MAX_ATTEMPTS = int(os.getenv("TELEGRAM_SEND_MAX_ATTEMPTS", "5"))
+TELEGRAM_FLUSH_TIMEOUT_SECS = float(os.getenv("TELEGRAM_FLUSH_TIMEOUT_SECS", "15"))   # max wait for queued alerts at shutdown
+TELEGRAM_COALESCE_SECS = float(os.getenv("TELEGRAM_COALESCE_SECS", "2"))   # window for digesting status notifications
+TELEGRAM_GLOBAL_RATE_PER_SEC = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SEC", "30"))   # Bot API: ~30 msgs/sec overall
+TELEGRAM_CHAT_RATE_PER_SEC = float(os.getenv("TELEGRAM_CHAT_RATE_PER_SEC", "1"))       # ~1 msg/sec per private chat
+TELEGRAM_GROUP_RATE_PER_MIN = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MIN", "20"))    # 20 msgs/min per group / channel
+TELEGRAM_SUBSCRIBERS_KEY = "config/telegram_subscribers.json"   # broadcast chat list
+TELEGRAM_SUBSCRIBE_ALLOWED = {   # chats that may /subscribe themselves; the operator chat can add any chat
+    c.strip() for c in os.getenv("TELEGRAM_SUBSCRIBE_ALLOWED", "").split(",") if c.strip()
+}
+TELEGRAM_SUBSCRIBERS_RETRY_SECS = float(os.getenv("TELEGRAM_SUBSCRIBERS_RETRY_SECS", "60"))   # after a failed load, operator only this long
 
 # --- Telegram Keywords ---
 TRIGGER_KEYWORDS = ["scanner", "scan", "momentum", "interday", "intraday"]
@@ -0,0 +1,226 @@
+# app/data/eod_cube.py
+"""
+Local, memory-mapped OHLCV cube: instrument × day × field.
+
+    {EOD_CUBE_DIR}/ohlcv.npy   float64 (n_instruments, days, 5)  open/high/low/close/volume
+    {EOD_CUBE_DIR}/dates.npy   datetime64[D] (n_instruments, days)
+    {EOD_CUBE_DIR}/index.json  instrument_ids (row order), fields, days, built_at, as_of
+
+Each row is right-aligned on that instrument's own candles: day -1 is its
+latest candle, shorter histories are NaN/NaT padded on the left.  That is
+the same "last N rows" view the scanners take with df.tail(N).
+
+The cube is fresh while its latest candle (as_of) is at least the previous
+session, however long the process has been up. The process-wide handle is
+reopened whenever index.json is replaced (a rebuild by any process).
+
+Build:  python -m app.data.eod_cube
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import EOD_CUBE_DIR, EOD_PANEL_DAYS
+from app.data.eod_panel import OHLCV_COLUMNS, covers_previous_session
+
+logger = logging.getLogger(__name__)
+
+FIELDS = OHLCV_COLUMNS
+_CUBE = None
+
+
+# ==============================
+# BUILD
+# ==============================
+def write_eod_cube(frames: dict, days=EOD_PANEL_DAYS, path=EOD_CUBE_DIR):
+    """
+    Write {instrument_id: EOD frame} as a cube. The new cube is written next
+    to the old one and swapped in, so open readers never see a half file.
+    """
+    frames = {int(iid): df for iid, df in frames.items() if df is not None and not df.empty}
+    ids = list(frames)
+
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    ohlcv = np.lib.format.open_memmap(
+        os.path.join(tmp_path, "ohlcv.npy"), mode="w+",
+        dtype=np.float64, shape=(len(ids), days, len(FIELDS))
+    )
+    dates = np.lib.format.open_memmap(
+        os.path.join(tmp_path, "dates.npy"), mode="w+",
+        dtype="datetime64[D]", shape=(len(ids), days)
+    )
+    ohlcv[:] = np.nan
+    dates[:] = np.datetime64("NaT")
+
+    for row, iid in enumerate(ids):
+        df = frames[iid].tail(days)
+        n = len(df)
+        ohlcv[row, days - n:, :] = df.reindex(columns=FIELDS).to_numpy(dtype=np.float64)
+        dates[row, days - n:] = df.index.values.astype("datetime64[D]")
+
+    ohlcv.flush()
+    dates.flush()
+    last = dates[:, -1][~np.isnat(dates[:, -1])]
+    as_of = str(last.max()) if last.size else None
+    del ohlcv, dates
+
+    with open(os.path.join(tmp_path, "index.json"), "w") as f:
+        json.dump({
+            "instrument_ids": ids,
+            "fields": FIELDS,
+            "days": days,
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "as_of": as_of,
+        }, f)
+
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.isdir(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    logger.info(f"🧊 EOD cube written | instruments={len(ids)} | days={days} | {path}")
+
+
+def build_eod_cube(days=EOD_PANEL_DAYS, path=EOD_CUBE_DIR):
+    """Build the local cube from S3 (panel first, per-instrument CSVs otherwise)."""
+    from app.data.eod_history import load_eod_history
+    from app.data.eod_panel import list_eod_instruments
+
+    start = time.perf_counter()
+    frames = load_eod_history(list_eod_instruments(), rows=days, use_cube=False)
+    write_eod_cube(frames, days, path)
+    reset_eod_cube()
+    logger.info(f"🧊 EOD cube build took {time.perf_counter() - start:.1f}s")
+
+
+# ==============================
+# READ
+# ==============================
+class EodCube:
+    """
+    Read-only view over a cube directory. Nothing is loaded up front —
+    slices are paged in from disk by the OS on access.
+    """
+
+    def __init__(self, path=EOD_CUBE_DIR, stamp=None):
+        with open(os.path.join(path, "index.json")) as f:
+            meta = json.load(f)
+
+        self.path = path
+        self.fields = meta["fields"]
+        self.days = meta["days"]
+        self.built_at = datetime.fromisoformat(meta["built_at"])
+        self.instrument_ids = meta["instrument_ids"]
+        self.index = {iid: row for row, iid in enumerate(self.instrument_ids)}
+
+        self.stamp = stamp   # index.json identity it was opened from (see get_eod_cube)
+
+        self.ohlcv = np.load(os.path.join(path, "ohlcv.npy"), mmap_mode="r")
+        self.dates = np.load(os.path.join(path, "dates.npy"), mmap_mode="r")
+
+        if "as_of" in meta:
+            as_of = meta["as_of"]
+        else:   # cube written before as_of was stored
+            last = self.dates[:, -1][~np.isnat(self.dates[:, -1])]
+            as_of = str(last.max()) if last.size else None
+        self.as_of = np.datetime64(as_of, "D") if as_of else None
+
+    def __contains__(self, instrument_id):
+        return int(instrument_id) in self.index
+
+    def field_index(self, name):
+        return self.fields.index(name)
+
+    def rows(self, instrument_ids):
+        """(present_ids, row numbers) for the IDs that are in the cube."""
+        present = [int(i) for i in instrument_ids if int(i) in self.index]
+        return present, np.fromiter((self.index[i] for i in present), dtype=np.int64, count=len(present))
+
+    def window(self, instrument_ids, days):
+        """
+        Last `days` candles for a subset of instruments.
+
+        Returns:
+            (present_ids, ohlcv[len(present_ids), days, field], dates[len(present_ids), days])
+        """
+        days = min(days, self.days)
+        present, rows = self.rows(instrument_ids)
+        return present, self.ohlcv[rows, -days:, :], self.dates[rows, -days:]
+
+    def frame(self, instrument_id, days=None) -> pd.DataFrame:
+        """
+        One instrument as a DataFrame (same shape as the EOD loader). The
+        values are a read-only view of the memory map, not a copy: candles
+        are right-aligned, so the valid ones are a contiguous tail.
+        """
+        row = self.index.get(int(instrument_id))
+        if row is None:
+            return pd.DataFrame()
+
+        days = min(days or self.days, self.days)
+        dates = self.dates[row, -days:]
+        n = int((~np.isnat(dates)).sum())
+        if not n:
+            return pd.DataFrame(columns=self.fields)
+
+        df = pd.DataFrame(self.ohlcv[row, -n:, :], columns=self.fields, copy=False)
+        df.index = pd.DatetimeIndex(dates[-n:], name="date")
+        return df
+
+    def is_fresh(self, now=None):
+        """True if the cube holds at least the previous session's candle."""
+        return covers_previous_session(self.as_of, now)
+
+
+def _index_stamp(path):
+    """Identity of index.json (a rebuild swaps in a new file), or None if absent."""
+    try:
+        st = os.stat(os.path.join(path, "index.json"))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def get_eod_cube(path=EOD_CUBE_DIR):
+    """
+    Process-wide cube handle, or None if no cube has been built. Reopened
+    when index.json changes, so a cube rebuilt by another process is
+    picked up instead of the renamed-away files.
+    """
+    global _CUBE
+
+    stamp = _index_stamp(path)
+    if stamp is None:
+        _CUBE = None
+    elif _CUBE is None or _CUBE.stamp != stamp:
+        try:
+            _CUBE = EodCube(path, stamp)
+            logger.info(
+                f"🧊 EOD cube opened | instruments={len(_CUBE.instrument_ids)} | "
+                f"days={_CUBE.days} | as of {_CUBE.as_of}"
+            )
+        except Exception as e:
+            logger.error(f"❌ EOD cube unreadable ({path}): {e}")
+            _CUBE = None
+    return _CUBE
+
+
+def reset_eod_cube():
+    global _CUBE
+    _CUBE = None
+
+
+if __name__ == "__main__":
+    from app.config import logging_config  # noqa: F401
+    build_eod_cube()
@@ -0,0 +1,133 @@
+# app/data/eod_history.py
+"""
+Single entry point the scanners use to get EOD history.
+
+Source order:
+    1. local memory-mapped EOD cube (no network, no parsing; frames are
+       read-only views of the map, not copies)
+    2. EOD panel (one GET for the whole universe, cached in-process by ETag;
+       skipped when it is older than the previous session)
+    3. per-instrument eod_data/{id}.csv for anything still missing — from the
+       local delta-synced mirror (eod_mirror.py), else S3 (concurrent); parsed
+       frames are reused across scans while their ETag holds (frame_cache.py)
+"""
+import logging
+import numpy as np
+import pandas as pd
+
+from app.config.settings import EOD_PANEL_ENABLED, EOD_PANEL_DAYS, EOD_CUBE_ENABLED
+from app.data.eod_loader import load_eod_frames, eod_versions
+from app.data.eod_panel import get_eod_panel, is_panel_fresh, panel_as_of, split_panel, OHLCV_COLUMNS
+from app.data.eod_cube import get_eod_cube
+
+logger = logging.getLogger(__name__)
+
+
+def get_fresh_cube(rows):
+    """The local cube if enabled, fresh and deep enough for `rows` candles."""
+    if not EOD_CUBE_ENABLED or rows is None:
+        return None
+
+    cube = get_eod_cube()
+    if cube is None or cube.days < rows or not cube.is_fresh():
+        return None
+    return cube
+
+
+def load_eod_history(instrument_ids, rows=None, use_cube=True, load_panel=get_eod_panel,
+                     load_versions=eod_versions) -> dict:
+    """
+    Args:
+        instrument_ids (list): Instrument IDs
+        rows (int): last N candles per instrument (None = everything the source has)
+        use_cube (bool): allow the local cube (off when rebuilding the cube itself)
+        load_panel (callable): () -> panel DataFrame (e.g. a scan run's shared copy)
+        load_versions (callable): eod_data/ ETag listing for the frame cache
+            (see load_eod_frames)
+
+    Returns:
+        dict -> {instrument_id: DataFrame} in instrument_ids order.
+        Columns: open, high, low, close, volume — date index, oldest first.
+        Instruments with no data map to an empty DataFrame.
+    """
+    instrument_ids = [int(i) for i in instrument_ids]
+    frames = {}
+
+    cube = get_fresh_cube(rows) if use_cube else None
+    if cube is not None:
+        for iid in instrument_ids:
+            if iid in cube:
+                frames[iid] = cube.frame(iid, rows)
+        logger.info(f"🧊 EOD cube hit | {len(frames)}/{len(instrument_ids)} instruments")
+
+    # Panel holds EOD_PANEL_DAYS candles — only usable if that covers the request
+    missing = [iid for iid in instrument_ids if iid not in frames]
+    if missing and EOD_PANEL_ENABLED and (rows is not None and rows <= EOD_PANEL_DAYS):
+        panel = load_panel()
+        if is_panel_fresh(panel):
+            panel_frames = split_panel(panel, missing, rows)
+            frames.update(panel_frames)
+            logger.info(f"📦 EOD panel hit | {len(panel_frames)}/{len(missing)} instruments")
+        elif not panel.empty:
+            logger.warning(f"⚠️ EOD panel stale (as of {panel_as_of(panel)}) — reading eod_data/ instead")
+
+    missing = [iid for iid in instrument_ids if iid not in frames]
+    if missing:
+        frames.update(load_eod_frames(missing, rows=rows, load_versions=load_versions))
+
+    return {iid: frames.get(iid, pd.DataFrame()) for iid in instrument_ids}
+
+
+def frames_to_ohlcv(frames, instrument_ids, window):
+    """
+    {instrument_id: EOD frame} → (ohlcv[N, window, 5], last_dates[N]).
+    Row i is instrument_ids[i], right-aligned on its own candles;
+    missing instruments are all-NaN with a NaT last date.
+    """
+    ohlcv = np.full((len(instrument_ids), window, len(OHLCV_COLUMNS)), np.nan)
+    last_dates = np.full(len(instrument_ids), np.datetime64("NaT"), dtype="datetime64[D]")
+
+    for row, iid in enumerate(instrument_ids):
+        df = frames.get(iid)
+        if df is None or df.empty:
+            continue
+        df = df.tail(window)
+        ohlcv[row, window - len(df):, :] = df.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=np.float64)
+        last_dates[row] = np.datetime64(df.index[-1], "D")
+
+    return ohlcv, last_dates
+
+
+def load_eod_ohlcv(instrument_ids, rows, load_history=None):
+    """
+    Matrix form of load_eod_history for vectorised scanners.
+
+    Instruments in a fresh local cube are sliced straight out of the
+    memory map; only the rest go through DataFrames, fetched by
+    `load_history(ids, rows)` when given (e.g. a scan run's shared loader).
+
+    Returns:
+        (ohlcv[N, rows, 5], last_dates[N]) — row i is instrument_ids[i]
+    """
+    instrument_ids = [int(i) for i in instrument_ids]
+    ohlcv = np.full((len(instrument_ids), rows, len(OHLCV_COLUMNS)), np.nan)
+    last_dates = np.full(len(instrument_ids), np.datetime64("NaT"), dtype="datetime64[D]")
+    in_cube = np.zeros(len(instrument_ids), dtype=bool)
+
+    cube = get_fresh_cube(rows)
+    if cube is not None:
+        in_cube = np.fromiter((iid in cube for iid in instrument_ids), dtype=bool, count=len(instrument_ids))
+        _, window, dates = cube.window(instrument_ids, rows)
+        ohlcv[in_cube] = window
+        last_dates[in_cube] = dates[:, -1]
+        logger.info(f"🧊 EOD cube hit | {int(in_cube.sum())}/{len(instrument_ids)} instruments")
+
+    missing = [iid for iid, hit in zip(instrument_ids, in_cube) if not hit]
+    if missing:
+        if load_history is None:
+            frames = load_eod_history(missing, rows=rows, use_cube=False)
+        else:
+            frames = load_history(missing, rows)
+        ohlcv[~in_cube], last_dates[~in_cube] = frames_to_ohlcv(frames, missing, rows)
+
+    return ohlcv, last_dates
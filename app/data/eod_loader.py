@@ -0,0 +1,151 @@
+# app/data/eod_loader.py
+import logging
+import time
+import pandas as pd
+
+from app.config.aws_s3 import read_csv_from_s3, read_many_from_s3, list_s3_objects
+from app.config.settings import (
+    S3_BUCKET,
+    EOD_DATA_PREFIX,
+    EOD_LOAD_CONCURRENCY,
+    EOD_TAIL_READS_ENABLED,
+    EOD_MIRROR_ENABLED,
+    EOD_FRAME_CACHE_ENABLED,
+)
+from app.data.eod_reader import read_eod_from_s3, read_eod_tail_from_s3, tail_read_stats
+from app.data.eod_mirror import ensure_eod_mirror, read_eod_from_mirror
+from app.data.frame_cache import EOD_FRAME_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+def eod_key(instrument_id) -> str:
+    return f"{EOD_DATA_PREFIX}/{instrument_id}.csv"
+
+
+def prepare_eod_frame(df: pd.DataFrame, rows=None) -> pd.DataFrame:
+    """
+    Normalise a raw EOD CSV: lowercase columns, date index, oldest → newest.
+    Keeps only the last `rows` candles when given.
+    """
+    if df.empty:
+        return df
+
+    df.columns = df.columns.str.lower()
+    df["date"] = pd.to_datetime(df["date"])
+    df.set_index("date", inplace=True)
+    df.sort_index(inplace=True)
+
+    if rows:
+        df = df.tail(rows).copy()
+    return df
+
+
+def _read_eod(bucket, key, rows, use_mirror=False):
+    if use_mirror:
+        try:
+            df = read_eod_from_mirror(key, rows)
+            if df is not None:
+                return df
+        except Exception as e:
+            logger.warning(f"⚠️ Mirror read failed for {key} ({e}); reading from S3")
+
+    # Only the last `rows` candles are needed → fetch just the end of the object
+    if rows and EOD_TAIL_READS_ENABLED:
+        try:
+            return read_eod_tail_from_s3(bucket, key, rows)
+        except Exception as e:
+            logger.warning(f"⚠️ Tail read failed for {key} ({e}); reading whole object")
+
+    try:
+        return read_eod_from_s3(bucket, key, rows)
+    except Exception as e:
+        logger.warning(f"⚠️ Typed EOD parse failed for {key} ({e}); using generic parse")
+
+    df = read_csv_from_s3(bucket, key)
+    try:
+        return prepare_eod_frame(df, rows)
+    except Exception as e:
+        logger.error(f"❌ EOD parse failed for {key}: {e}")
+        return pd.DataFrame()
+
+
+def eod_versions(manifest=None) -> dict:
+    """
+    {key: etag} for eod_data/ — from the mirror manifest when it is in use
+    (already current), else one LIST of the prefix.
+    """
+    if manifest:
+        return {key: entry["etag"] for key, entry in manifest["objects"].items()}
+    return {o["key"]: o["etag"] for o in list_s3_objects(S3_BUCKET, f"{EOD_DATA_PREFIX}/")}
+
+
+def load_eod_frames(instrument_ids, rows=None, max_workers=EOD_LOAD_CONCURRENCY, load_versions=eod_versions):
+    """
+    Load EOD history for many instruments with bounded S3 concurrency.
+
+    Args:
+        instrument_ids (list): Instrument IDs (mapping order)
+        rows (int): keep only the last N candles per instrument
+        max_workers (int): max S3 requests in flight
+        load_versions (callable): (manifest) -> {key: etag} for the frame
+            cache; a scan run passes one that lists eod_data/ once per run
+
+    Returns:
+        dict -> {instrument_id: DataFrame} in the same order as instrument_ids.
+        Missing / unreadable files map to an empty DataFrame.
+        Frames may come from the shared in-process cache — treat as read-only.
+    """
+    instrument_ids = list(instrument_ids)
+    start = time.perf_counter()
+
+    # Local mirror first (delta-synced if stale); S3 for anything not mirrored,
+    # or for everything while the mirror is stale and cannot be synced
+    manifest = None
+    if EOD_MIRROR_ENABLED:
+        try:
+            manifest = ensure_eod_mirror()
+        except Exception as e:
+            logger.warning(f"⚠️ EOD mirror unavailable ({e}); reading from S3")
+    use_mirror = bool(manifest and manifest["objects"])
+
+    keys = {iid: eod_key(iid) for iid in instrument_ids}
+    frames = {}
+
+    # Parsed frames from earlier scans, as long as the object's ETag is unchanged
+    versions = {}
+    if EOD_FRAME_CACHE_ENABLED:
+        try:
+            versions = load_versions(manifest if use_mirror else None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not list EOD versions ({e}); bypassing frame cache")
+        for iid, key in keys.items():
+            if key in versions:
+                df = EOD_FRAME_CACHE.get(key, versions[key], rows)
+                if df is not None:
+                    frames[iid] = df
+
+    missing = [iid for iid in instrument_ids if iid not in frames]
+    if missing:
+        loaded = read_many_from_s3(
+            S3_BUCKET,
+            [keys[iid] for iid in missing],
+            lambda bucket, key: _read_eod(bucket, key, rows, use_mirror),
+            max_workers=max_workers,
+        )
+        for iid, df in zip(missing, loaded):
+            frames[iid] = df
+            if EOD_FRAME_CACHE_ENABLED:
+                EOD_FRAME_CACHE.put(keys[iid], versions.get(keys[iid]), rows, df)
+
+    found = sum(1 for df in frames.values() if not df.empty)
+    logger.info(
+        f"📂 EOD loaded | {found}/{len(instrument_ids)} instruments | "
+        f"cached={len(instrument_ids) - len(missing)} | workers={max_workers} | "
+        f"mirror={use_mirror} | {time.perf_counter() - start:.1f}s"
+    )
+    if EOD_FRAME_CACHE_ENABLED:
+        logger.info(f"🧠 EOD frame cache | {EOD_FRAME_CACHE.summary()}")
+    if missing and rows and EOD_TAIL_READS_ENABLED and not use_mirror:
+        logger.info(f"✂️ EOD tail reads | {tail_read_stats()}")
+    return {iid: frames[iid] for iid in instrument_ids}
@@ -0,0 +1,189 @@
+# app/data/eod_mirror.py
+"""
+Local disk mirror of s3://{S3_BUCKET}/eod_data/ with delta sync.
+
+    {EOD_MIRROR_DIR}/eod_data/{id}.csv   byte-for-byte copies of the S3 objects
+    {EOD_MIRROR_DIR}/manifest.json       {"synced_at", "objects": {key: {etag, size}}}
+
+A sync lists the prefix once and downloads (in parallel) only objects
+whose ETag / size differ from the manifest or whose local copy is
+missing; objects deleted upstream are removed locally. With the mirror
+on a persistent volume (or restored from a snapshot) a daily run only
+transfers the day's changes.
+
+Off by default (EOD_MIRROR_ENABLED): on a short-lived instance the first
+sync downloads every full CSV, which costs more than the ranged tail
+reads it replaces. If a sync fails the mirror is reported stale
+(ensure_eod_mirror returns None), readers use S3, and the sync is not
+retried for EOD_MIRROR_RETRY_SECS.
+
+Sync:  python -m app.data.eod_mirror
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.config.aws_s3 import list_s3_objects, download_s3_file
+from app.config.settings import (
+    S3_BUCKET,
+    EOD_DATA_PREFIX,
+    EOD_LOAD_CONCURRENCY,
+    EOD_MIRROR_DIR,
+    EOD_MIRROR_MAX_AGE_HOURS,
+    EOD_MIRROR_RETRY_SECS,
+)
+from app.data.eod_reader import read_eod_csv
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST = None
+_SYNC_LOCK = threading.Lock()
+_RETRY_AT = 0.0   # monotonic; after a failed sync, no new attempt before this
+
+
+# ==============================
+# MANIFEST
+# ==============================
+def manifest_path(root=EOD_MIRROR_DIR):
+    return os.path.join(root, "manifest.json")
+
+
+def local_path(key, root=EOD_MIRROR_DIR):
+    return os.path.join(root, *key.split("/"))
+
+
+def load_manifest(root=EOD_MIRROR_DIR) -> dict:
+    try:
+        with open(manifest_path(root)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"synced_at": None, "objects": {}}
+    except Exception as e:
+        logger.warning(f"⚠️ Unreadable mirror manifest ({e}) — starting from empty")
+        return {"synced_at": None, "objects": {}}
+
+
+def save_manifest(manifest, root=EOD_MIRROR_DIR):
+    os.makedirs(root, exist_ok=True)
+    tmp_path = f"{manifest_path(root)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path(root))
+
+
+# ==============================
+# SYNC
+# ==============================
+def _is_current(obj, entry, root):
+    if not entry or entry["etag"] != obj["etag"] or entry["size"] != obj["size"]:
+        return False
+    path = local_path(obj["key"], root)
+    return os.path.exists(path) and os.path.getsize(path) == obj["size"]
+
+
+def sync_eod_mirror(prefix=EOD_DATA_PREFIX, root=EOD_MIRROR_DIR, max_workers=EOD_LOAD_CONCURRENCY) -> dict:
+    """
+    Bring the local mirror in line with S3, transferring only what changed.
+
+    Returns:
+        dict -> {"listed", "changed", "downloaded", "failed", "deleted", "bytes", "seconds"}
+    """
+    global _MANIFEST
+    start = time.perf_counter()
+
+    objects = [o for o in list_s3_objects(S3_BUCKET, f"{prefix}/") if o["key"].endswith(".csv")]
+    if not objects:
+        logger.error(f"❌ Mirror sync skipped — nothing listed under s3://{S3_BUCKET}/{prefix}/")
+        return {"listed": 0, "changed": 0, "downloaded": 0, "failed": 0, "deleted": 0, "bytes": 0,
+                "seconds": round(time.perf_counter() - start, 1)}
+
+    manifest = load_manifest(root)
+    known = manifest["objects"]
+    changed = [o for o in objects if not _is_current(o, known.get(o["key"]), root)]
+
+    def fetch(obj):
+        return obj, download_s3_file(S3_BUCKET, obj["key"], local_path(obj["key"], root))
+
+    downloaded, failed, transferred = 0, 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for obj, size in pool.map(fetch, changed):
+            if size is None:
+                failed += 1
+                known.pop(obj["key"], None)   # retried next sync
+                continue
+            known[obj["key"]] = {"etag": obj["etag"], "size": obj["size"]}
+            downloaded += 1
+            transferred += size
+
+    listed_keys = {o["key"] for o in objects}
+    deleted = [key for key in known if key not in listed_keys]
+    for key in deleted:
+        known.pop(key)
+        try:
+            os.remove(local_path(key, root))
+        except FileNotFoundError:
+            pass
+
+    manifest["synced_at"] = datetime.now().isoformat()
+    save_manifest(manifest, root)
+    _MANIFEST = manifest
+
+    stats = {
+        "listed": len(objects), "changed": len(changed), "downloaded": downloaded,
+        "failed": failed, "deleted": len(deleted), "bytes": transferred,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+    logger.info(f"🪞 EOD mirror synced | {stats}")
+    return stats
+
+
+def ensure_eod_mirror(max_age_hours=EOD_MIRROR_MAX_AGE_HOURS, root=EOD_MIRROR_DIR):
+    """
+    Manifest of a mirror synced within `max_age_hours` (delta-syncs first if
+    older), or None when it is stale and could not be synced — read S3 then.
+    """
+    global _MANIFEST, _RETRY_AT
+    with _SYNC_LOCK:
+        manifest = _MANIFEST or load_manifest(root)
+        synced_at = manifest.get("synced_at")
+        fresh = synced_at and datetime.now() - datetime.fromisoformat(synced_at) <= timedelta(hours=max_age_hours)
+        if not fresh:
+            if time.monotonic() < _RETRY_AT:
+                return None
+            if not sync_eod_mirror(root=root)["listed"]:
+                _RETRY_AT = time.monotonic() + EOD_MIRROR_RETRY_SECS
+                logger.warning(
+                    f"⚠️ EOD mirror stale (sync failed) — reading S3, next sync in {EOD_MIRROR_RETRY_SECS:.0f}s"
+                )
+                return None
+            manifest = load_manifest(root)
+        _MANIFEST = manifest
+    return manifest
+
+
+# ==============================
+# READ
+# ==============================
+def read_eod_from_mirror(key, rows=None, root=EOD_MIRROR_DIR):
+    """Typed EOD frame from the local copy of `key`, or None if not mirrored."""
+    manifest = _MANIFEST or load_manifest(root)
+    if key not in manifest["objects"]:
+        return None
+
+    try:
+        with open(local_path(key, root), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    return read_eod_csv(data, rows) if data else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    from app.config import logging_config  # noqa: F401
+    print(sync_eod_mirror())
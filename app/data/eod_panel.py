@@ -0,0 +1,177 @@
+# app/data/eod_panel.py
+"""
+EOD panel: one Parquet object holding the last N daily candles of every
+instrument, long format, sorted by (instrument_id, date).
+
+    instrument_id | date | open | high | low | close | volume
+
+Built after the EOD update (python -m app.data.eod_panel) and read by the
+scanners with a single GET instead of one CSV per instrument. The parsed
+panel is kept in-process and re-read only when its ETag changes; a panel
+whose last candle is older than the previous session is reported stale so
+callers fall back to eod_data/.
+"""
+import io
+import logging
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.config.aws_s3 import list_s3_files, read_bytes_from_s3, upload_bytes_to_s3, head_s3_etag
+from app.config.settings import IST, S3_BUCKET, EOD_DATA_PREFIX, EOD_PANEL_KEY, EOD_PANEL_DAYS
+from app.data.eod_loader import load_eod_frames
+
+logger = logging.getLogger(__name__)
+
+_PANEL = None   # (etag, panel) — last panel read in this process
+_PANEL_LOCK = threading.Lock()
+
+PANEL_COLUMNS = ["instrument_id", "date", "open", "high", "low", "close", "volume"]
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+# ==============================
+# BUILD
+# ==============================
+def list_eod_instruments(prefix=EOD_DATA_PREFIX):
+    """Instrument IDs that have an eod_data/{id}.csv object."""
+    ids = []
+    for key in list_s3_files(S3_BUCKET, f"{prefix}/"):
+        name = key.rsplit("/", 1)[-1]
+        if name.endswith(".csv") and name[:-4].isdigit():
+            ids.append(int(name[:-4]))
+    return sorted(ids)
+
+
+def frames_to_panel(frames: dict, days=EOD_PANEL_DAYS) -> pd.DataFrame:
+    """{instrument_id: EOD frame (date index)} → long panel DataFrame."""
+    parts = []
+    for iid, df in frames.items():
+        if df is None or df.empty:
+            continue
+        part = df.reindex(columns=OHLCV_COLUMNS).tail(days).reset_index()
+        part = part.rename(columns={part.columns[0]: "date"})
+        part.insert(0, "instrument_id", int(iid))
+        parts.append(part)
+
+    if not parts:
+        return pd.DataFrame(columns=PANEL_COLUMNS)
+
+    panel = pd.concat(parts, ignore_index=True)
+    panel.sort_values(["instrument_id", "date"], inplace=True, ignore_index=True)
+    return panel[PANEL_COLUMNS]
+
+
+def build_eod_panel(instrument_ids=None, days=EOD_PANEL_DAYS, key=EOD_PANEL_KEY):
+    """
+    Read every per-instrument EOD CSV, keep the last `days` candles and
+    upload them as a single Parquet panel.
+
+    Returns:
+        pd.DataFrame: the panel that was uploaded (empty on failure)
+    """
+    start = time.perf_counter()
+    if instrument_ids is None:
+        instrument_ids = list_eod_instruments()
+
+    frames = load_eod_frames(instrument_ids, rows=days)
+    panel = frames_to_panel(frames, days)
+
+    if panel.empty:
+        logger.error("❌ EOD panel empty — nothing uploaded")
+        return panel
+
+    buffer = io.BytesIO()
+    panel.to_parquet(buffer, index=False)
+    upload_bytes_to_s3(buffer.getvalue(), S3_BUCKET, key)
+
+    logger.info(
+        f"📦 EOD panel built | instruments={panel['instrument_id'].nunique()} | "
+        f"rows={len(panel)} | days={days} | {time.perf_counter() - start:.1f}s"
+    )
+    return panel
+
+
+# ==============================
+# READ
+# ==============================
+def load_eod_panel(key=EOD_PANEL_KEY) -> pd.DataFrame:
+    """Fetch the whole panel with one GET. Empty DataFrame if missing."""
+    body = read_bytes_from_s3(S3_BUCKET, key)
+    if not body:
+        return pd.DataFrame(columns=PANEL_COLUMNS)
+
+    try:
+        return pd.read_parquet(io.BytesIO(body))
+    except Exception as e:
+        logger.error(f"❌ EOD panel unreadable ({key}): {e}")
+        return pd.DataFrame(columns=PANEL_COLUMNS)
+
+
+def get_eod_panel(key=EOD_PANEL_KEY) -> pd.DataFrame:
+    """
+    load_eod_panel, shared in-process: one HEAD per call, the GET and parse
+    only when the object's ETag changed. Treat the result as read-only.
+    """
+    global _PANEL
+    etag = head_s3_etag(S3_BUCKET, key)
+    with _PANEL_LOCK:
+        if _PANEL is not None and etag is not None and _PANEL[0] == etag:
+            return _PANEL[1]
+        panel = load_eod_panel(key)
+        _PANEL = (etag, panel)
+    if not panel.empty:
+        logger.info(f"📦 EOD panel loaded | rows={len(panel)} | as of {panel_as_of(panel)}")
+    return panel
+
+
+def panel_as_of(panel: pd.DataFrame):
+    """Date of the panel's latest candle (None if empty)."""
+    if panel.empty:
+        return None
+    return pd.Timestamp(panel["date"].max()).date()
+
+
+def covers_previous_session(as_of, now=None) -> bool:
+    """True if data whose latest candle is `as_of` holds the previous session."""
+    if as_of is None:
+        return False
+    today = np.datetime64((now or datetime.now(IST)).date(), "D")
+    prev_session = np.busday_offset(today, -1, roll="backward")
+    return np.datetime64(as_of, "D") >= prev_session
+
+
+def is_panel_fresh(panel: pd.DataFrame, now=None) -> bool:
+    """True if the panel holds at least the previous session's candle."""
+    return covers_previous_session(panel_as_of(panel), now)
+
+
+def split_panel(panel: pd.DataFrame, instrument_ids=None, rows=None) -> dict:
+    """
+    Long panel → {instrument_id: frame} with the same shape as the
+    per-instrument loader (lowercase OHLCV columns, date index).
+    Only the requested instrument IDs are returned, in the given order.
+    """
+    if panel.empty:
+        return {}
+
+    if instrument_ids is not None:
+        wanted = [int(i) for i in instrument_ids]
+        panel = panel[panel["instrument_id"].isin(wanted)]
+
+    frames = {}
+    for iid, group in panel.groupby("instrument_id", sort=False):
+        df = group.drop(columns="instrument_id").set_index("date")
+        frames[int(iid)] = df.tail(rows).copy() if rows else df
+
+    if instrument_ids is None:
+        return frames
+    return {iid: frames[iid] for iid in wanted if iid in frames}
+
+
+if __name__ == "__main__":
+    from app.config import logging_config  # noqa: F401
+    build_eod_panel()
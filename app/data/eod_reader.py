@@ -0,0 +1,197 @@
+# app/data/eod_reader.py
+"""
+Schema-aware EOD CSV reader.
+
+The per-instrument files in eod_data/ all share one layout, so nothing
+needs to be inferred:
+
+    date | open | high | low | close | volume   (header case varies)
+
+read_eod_csv hands the S3 response bytes to Arrow's CSV reader with
+fixed types (float64 prices, int64 volume), only those six columns and a
+known date format, then slices to the last N rows before pandas sees it.
+Files that do not fit the schema raise, and the loader falls back to the
+generic parse, so one odd file never drops an instrument.
+"""
+import logging
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from app.config.aws_s3 import s3
+from app.config.settings import EOD_DATE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+EOD_COLUMNS = ["date"] + PRICE_COLUMNS + ["volume"]
+
+
+# Arrow types per schema column. Prices are float64 — the same values the
+# generic pandas parse produces — so the EMA engine's bit-identical match
+# with the per-stock ta EMAs (and every close > ema comparison) holds.
+EOD_ARROW_TYPES = {
+    **{name: pa.float64() for name in PRICE_COLUMNS},
+    "volume": pa.int64(),
+    "date": pa.timestamp("ns"),
+}
+
+
+class UnsortedEod(ValueError):
+    """Rows are not in date order (so a tail read is not the latest rows)."""
+
+
+def _header_columns(data: bytes) -> dict:
+    """Schema name → header name as written in this file (case / spaces vary)."""
+    end = data.find(b"\n")
+    header = data[: end if end >= 0 else len(data)].decode("utf-8-sig").strip()
+    actual = {c.strip().lower(): c for c in header.split(",")}
+    missing = [c for c in EOD_COLUMNS if c not in actual]
+    if missing:
+        raise ValueError(f"EOD columns missing: {missing}")
+    return {c: actual[c] for c in EOD_COLUMNS}
+
+
+def read_eod_csv(data: bytes, rows=None, date_format=EOD_DATE_FORMAT, require_sorted=False) -> pd.DataFrame:
+    """
+    Parse one EOD CSV body. With require_sorted, rows out of date order
+    raise UnsortedEod instead of being sorted.
+
+    Returns:
+        DataFrame indexed by date with float64 open/high/low/close and
+        int64 volume. Raises on files that do not fit the schema.
+    """
+    names = _header_columns(data)
+    table = pacsv.read_csv(
+        pa.py_buffer(data),   # zero-copy view of the response bytes
+        read_options=pacsv.ReadOptions(use_threads=False),   # files are already read in parallel
+        convert_options=pacsv.ConvertOptions(
+            include_columns=list(names.values()),
+            column_types={names[c]: t for c, t in EOD_ARROW_TYPES.items()},
+            timestamp_parsers=[date_format, pacsv.ISO8601],
+        ),
+    )
+    if rows and table.num_rows > rows and _is_sorted(table, names["date"]):
+        table = table.slice(table.num_rows - rows)
+
+    df = table.rename_columns([c.strip().lower() for c in table.column_names]).to_pandas()
+    df.set_index("date", inplace=True)
+
+    # Files are written in date order; only sort the odd one that is not
+    if not df.index.is_monotonic_increasing:
+        if require_sorted:
+            raise UnsortedEod("EOD rows are not in date order")
+        df.sort_index(inplace=True)
+    if rows:
+        df = df.iloc[-rows:]
+    return df
+
+
+def _is_sorted(table, date_column) -> bool:
+    dates = table.column(date_column)
+    return pc.all(pc.greater_equal(dates.slice(1), dates.slice(0, len(dates) - 1))).as_py() is not False
+
+
+def read_eod_from_s3(bucket: str, key: str, rows=None) -> pd.DataFrame:
+    """
+    Typed EOD frame for s3://bucket/key, parsed from the response bytes
+    (no BytesIO copy). Empty DataFrame if the object is missing; raises if
+    the file does not fit the schema.
+    """
+    try:
+        data = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        logger.error(f"❌ S3 key not found: s3://{bucket}/{key}")
+        return pd.DataFrame()
+
+    return read_eod_csv(data, rows)
+
+
+# ==============================
+# TAIL-ONLY RANGED READS
+# ==============================
+_HEADERS = {}              # key -> header line (bytes); headers never change for a key
+_ROW_BYTES = [80.0]        # running estimate of bytes per CSV row, refined from every read
+_STATS = {"objects": 0, "bytes": 0, "grown": 0, "full": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(**deltas):
+    with _STATS_LOCK:
+        for name, delta in deltas.items():
+            _STATS[name] += delta
+
+
+def _header(bucket, key, probe=1024):
+    header = _HEADERS.get(key)
+    if header is None:
+        head = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{probe - 1}")["Body"].read()
+        end = head.find(b"\n")
+        if end < 0:
+            raise ValueError(f"No header line in the first {probe} bytes of {key}")
+        header = head[:end].rstrip(b"\r")
+        _HEADERS[key] = header
+        _count(bytes=len(head))
+    return header
+
+
+def _get_suffix(bucket, key, length):
+    """Last `length` bytes of the object → (bytes, starts_at_zero)."""
+    obj = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=-{length}")
+    data = obj["Body"].read()
+    _count(bytes=len(data))
+    content_range = obj.get("ContentRange")   # "bytes 1000-1999/2000"
+    start = int(content_range.split()[1].split("-")[0]) if content_range else 0
+    return data, start == 0
+
+
+def read_eod_tail_from_s3(bucket: str, key: str, rows: int, slack=1.5, max_grows=4) -> pd.DataFrame:
+    """
+    Typed frame of the last `rows` candles of s3://bucket/key, fetching only
+    the end of the object with a suffix Range GET and re-attaching the
+    (cached) header. The range doubles until enough complete rows arrive or
+    the whole object has been read.
+
+    Assumes the file is in date order (as eod_data is written); raises
+    UnsortedEod otherwise so the caller can fall back to a full read.
+    """
+    length = int(rows * _ROW_BYTES[0] * slack) + 256
+
+    for _ in range(max_grows + 1):
+        try:
+            data, whole = _get_suffix(bucket, key, length)
+        except s3.exceptions.NoSuchKey:
+            logger.error(f"❌ S3 key not found: s3://{bucket}/{key}")
+            return pd.DataFrame()
+
+        if whole:
+            _count(objects=1, full=1)
+            return read_eod_csv(data, rows)
+
+        # First line is (almost always) cut mid-row
+        lines = data[data.find(b"\n") + 1:]
+        complete = lines.count(b"\n") + (0 if lines.endswith(b"\n") else 1)
+        if complete >= rows:
+            break
+        _count(grown=1)
+        length *= 2
+    else:
+        raise ValueError(f"Tail of {key} still short of {rows} rows after {max_grows} grows")
+
+    with _STATS_LOCK:
+        # read_many_from_s3 runs this from pool threads: update the estimate atomically
+        _ROW_BYTES[0] = 0.8 * _ROW_BYTES[0] + 0.2 * (len(lines) / max(complete, 1))
+        _STATS["objects"] += 1
+
+    return read_eod_csv(_header(bucket, key) + b"\n" + lines, rows, require_sorted=True)
+
+
+def tail_read_stats() -> dict:
+    """Objects read, bytes transferred and how often a range had to grow."""
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+        stats["row_bytes"] = round(_ROW_BYTES[0], 1)
+    stats["bytes_per_object"] = stats["bytes"] // stats["objects"] if stats["objects"] else 0
+    return stats
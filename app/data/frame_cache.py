@@ -0,0 +1,93 @@
+# app/data/frame_cache.py
+"""
+In-process LRU of parsed per-instrument EOD frames.
+
+Entries are keyed by S3 key and tagged with the object's ETag, so a
+frame is only served while S3 (or the mirror manifest) still reports the
+same version. The cache holds at most `max_bytes` of frame memory and
+evicts least-recently-used entries beyond that.
+
+Frames handed out are shared — treat them as read-only (copy before
+adding columns or rows).
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from app.config.settings import EOD_FRAME_CACHE_MB
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self.bytes = 0
+        self._entries = OrderedDict()   # key -> (version, rows, df, nbytes)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, key, version, rows=None):
+        """
+        Cached frame for `key` at `version` with at least `rows` candles
+        (rows=None needs the full history), else None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            cached_version, cached_rows, df, _ = entry
+            if cached_version != version:
+                self._drop(key)
+                self.stats["stale"] += 1
+                return None
+            # A tail of N rows cannot serve a request for more (unless it is the whole file)
+            if cached_rows is not None and (rows is None or rows > cached_rows) and len(df) >= cached_rows:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return df.iloc[-rows:] if rows else df
+
+    def put(self, key, version, rows, df):
+        if version is None or df is None or df.empty:
+            return
+        nbytes = int(df.memory_usage(index=True, deep=False).sum())
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, rows, df, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        _, _, _, nbytes = self._entries.pop(key)
+        self.bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"] + self.stats["stale"]
+        return 0.0 if total == 0 else self.stats["hits"] / total
+
+    def summary(self):
+        return (
+            f"entries={len(self._entries)} | {self.bytes / 2**20:.1f}/{self.max_bytes / 2**20:.0f} MiB | "
+            f"hit rate={self.hit_rate():.0%} | {self.stats}"
+        )
+
+
+# Shared by every scanner in the process
+EOD_FRAME_CACHE = FrameCache(EOD_FRAME_CACHE_MB * 2**20)
@@ -0,0 +1,203 @@
+# app/execution/position_monitor.py
+"""
+One monitor for every open position.
+
+Positions are registered after their Super Order is placed. A single
+daemon thread then, per cycle:
+  - takes the latest streamed tick for each position (LiveFeed, if enabled)
+  - fetches every position without a fresh tick in ONE batched quote call
+  - dispatches PARTIAL_BOOK / TRAIL_SL / EXIT_TRADE per position
+
+API calls and threads stay constant however many trades are open.
+"""
+import logging
+import threading
+import time
+
+from app.execution.position_manager import PositionManager
+from app.broker.market_data import get_quotes_cached
+from app.broker.live_feed import get_live_feed
+from app.broker.dhan_governor import dhan_priority, PRIORITY_MONITOR
+from app.config.settings import (
+    LIVE_FEED_ENABLED,
+    LIVE_FEED_STALE_SECS,
+    POSITION_MONITOR_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MonitoredPosition:
+    def __init__(self, stock, broker, order_info, segment="NSE_EQ"):
+        self.stock = stock
+        self.name = stock["Stock Name"]
+        self.security_id = str(stock["Security ID"])
+        self.segment = segment
+        self.side = stock["Signal"].upper()
+        self.broker = broker
+        self.order_id = order_info["order_id"]
+        self.entry = order_info["entry"]
+        self.qty = order_info["qty"]
+        self.pm = PositionManager(
+            entry=order_info["entry"],
+            sl=order_info["sl"],
+            qty=order_info["qty"],
+            side=self.side,
+        )
+        # Ticks can arrive sub-second — act on each level once
+        self.handled = set()
+        self.closed = False
+
+
+class PositionMonitor:
+    def __init__(self, interval=POSITION_MONITOR_INTERVAL, use_feed=LIVE_FEED_ENABLED,
+                 stale_after=LIVE_FEED_STALE_SECS):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.feed = get_live_feed() if use_feed else None
+
+        self._positions = {}        # order_id -> MonitoredPosition
+        self._ticks = {}            # security_id -> (ltp, received_at)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.stats = {"cycles": 0, "quote_calls": 0, "feed_ticks": 0, "actions": 0}
+
+    # ---- public, thread-safe ----
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="position-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def add(self, stock, broker, order_info, segment="NSE_EQ"):
+        position = MonitoredPosition(stock, broker, order_info, segment)
+        with self._lock:
+            self._positions[position.order_id] = position
+        if self.feed is not None:
+            self.feed.subscribe(position.security_id, self._on_tick, segment)
+        logger.info(
+            f"👀 Monitoring {position.name} | order={position.order_id} | open={len(self._positions)}"
+        )
+        self.start()
+        return position
+
+    def remove(self, order_id):
+        with self._lock:
+            position = self._positions.pop(order_id, None)
+            still_used = position is not None and any(
+                p.security_id == position.security_id for p in self._positions.values()
+            )
+        if position is None:
+            return
+        position.closed = True
+        if self.feed is not None and not still_used:
+            self.feed.unsubscribe(position.security_id, self._on_tick, position.segment)
+        logger.info(f"📴 Stopped monitoring {position.name} | open={len(self._positions)}")
+
+    def open_positions(self):
+        with self._lock:
+            return list(self._positions.values())
+
+    # ---- internals ----
+    def _on_tick(self, security_id, ltp, ltt):
+        self._ticks[security_id] = (ltp, time.monotonic())
+        self.stats["feed_ticks"] += 1
+        self._wakeup.set()
+
+    def _latest_prices(self, positions):
+        """security_id -> ltp: fresh ticks first, one batched quote for the rest."""
+        now = time.monotonic()
+        prices, stale = {}, {}
+        for position in positions:
+            tick = self._ticks.get(position.security_id)
+            if tick and now - tick[1] <= self.stale_after:
+                prices[position.security_id] = tick[0]
+            else:
+                stale.setdefault(position.segment, []).append(position.security_id)
+
+        for segment, ids in stale.items():
+            ids = list(dict.fromkeys(ids))
+            self.stats["quote_calls"] += 1
+            try:
+                with dhan_priority(PRIORITY_MONITOR):
+                    quotes = get_quotes_cached(ids, segment, ttl=self.interval / 2) or {}
+            except Exception as e:
+                logger.error(f"❌ Position quote batch failed ({len(ids)} ids): {e}")
+                continue
+            for sec_id in ids:
+                ltp = (quotes.get(sec_id) or {}).get("last_price")
+                if ltp is not None:
+                    prices[sec_id] = float(ltp)
+        return prices
+
+    def _dispatch(self, position, ltp):
+        action = position.pm.process_ltp(ltp)
+        if action is None or action in position.handled:
+            return
+
+        name = position.name
+        try:
+            # 1R reached → partial book
+            if action == "PARTIAL_BOOK":
+                logger.info(f"🔹 1R reached for {name} | Partial booking half qty")
+                position.broker.partial_book(position.order_id, position.qty // 2)
+
+            # 1.5R reached → trail SL
+            elif action == "TRAIL_SL":
+                logger.info(f"🔁 1.5R reached for {name} | Trailing SL to entry")
+                position.broker.trail_sl(position.order_id, position.entry)
+
+            # Full exit logic → separate condition
+            elif action == "EXIT_TRADE":
+                logger.info(f"🛑 EXIT_TRADE triggered for {name} | Exiting at MARKET STOP_LOSS")
+                position.broker.exit_trade_market(position.order_id, side=position.side, ltp=ltp)
+                logger.info(f"✅ Trade fully exited for {name}")
+                self.remove(position.order_id)
+        except Exception as e:
+            logger.error(f"❌ {action} failed for {name}: {e}")
+            return
+
+        position.handled.add(action)
+        self.stats["actions"] += 1
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+
+            positions = self.open_positions()
+            if not positions:
+                continue
+
+            self.stats["cycles"] += 1
+            prices = self._latest_prices(positions)
+            for position in positions:
+                ltp = prices.get(position.security_id)
+                if ltp and not position.closed:
+                    logger.debug(f"📈 LTP Monitor | {position.name} | LTP={ltp}")
+                    self._dispatch(position, ltp)
+
+
+_MONITOR = None
+_MONITOR_LOCK = threading.Lock()
+
+
+def get_position_monitor():
+    """Process-wide PositionMonitor shared by every execute_trade call."""
+    global _MONITOR
+    with _MONITOR_LOCK:
+        if _MONITOR is None:
+            _MONITOR = PositionMonitor()
+    return _MONITOR
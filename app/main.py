@@ -1,22 +1,35 @@
+import asyncio
 import logging
 import os
+from functools import partial
 
 from telegram.ext import (
     ApplicationBuilder,
+    CommandHandler,
     MessageHandler,
     filters,
 )
 
-from app.bot.handlers import handle_message
+from app.bot.handlers import (
+    handle_message,
+    handle_subscribe,
+    handle_unsubscribe,
+    handle_ema,
+    handle_alerts,
+    handle_stock,
+)
 from app.bot.scheduler import (
     terminate_at,
     run_nifty_breakout_trade,
+    run_trigger_watch,
 )
 from app.config.aws_ssm import get_param
+from app.config.settings import TRIGGER_WATCH_ENABLED, WARMUP_ENABLED
 
-from app.scanners.EMA_10_20_breakout import ema_price_cross
-from app.bot.telegram_sender import send_telegram_message
+from app.scanners.result_cache import SCAN_RESULTS
+from app.bot.telegram_sender import send_telegram_message, flush_telegram
 from app.bot.scheduler import terminate_after_delay
+from app.bot.warmup import run_pre_market_warmup
 
 
 # ───────────────────────────────
@@ -83,59 +96,49 @@ BOT_TOKEN = get_param("/trading-bot/telegram/BOT_TOKEN")
 # ───────────────────────────────
 
 
-async def post_init(app):
-    logger.info("🚀 Starting background jobs")
-
-    # Existing jobs
-    #app.create_task(run_nifty_breakout_trade())
-    #app.create_task(terminate_at(target_hour=12, target_minute=30))
-
-    # 🔥 RUN EMA SCANNER IMMEDIATELY ON START
+async def run_startup_scan():
+    """
+    Every EOD scanner in a worker thread, so the PTB loop keeps serving
+    updates; signals stream to Telegram chunk by chunk as they are found.
+    """
     try:
-        logger.info("📊 Running EMA EOD scan on startup")
-
-        today_df = ema_price_cross(
-        )
+        logger.info("📊 Running EOD scanners on startup")
 
-        if today_df is not None and not today_df.empty:
+        # One pass: mapping, quotes and history shared by every registered
+        # scanner; each publishes and sends its own Telegram alert. The result
+        # is cached, so /ema, /alerts and /stock answer from it afterwards
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(SCAN_RESULTS.get, notify=True, publish=True))
+        logger.info("✅ EOD scanners finished")
 
-            message = "📊 <b>EMA Momentum Stocks (BUY Setup)</b>\n\n"
-            symbols_for_copy = []
-
-            for _, row in today_df.iterrows():
-                message += (
-                    f"🔹 <b>{row['Stock Name']}</b>\n"
-                    f"Price: ₹{row['Price']}\n"
-                    f"Setup: {row['Setup_Case']}\n\n"
-                )
-
-                symbols_for_copy.append(
-                    f"NSE:{row['Stock Name'].replace(' ', '').upper()}-EQ"
-                )
+    except Exception as e:
+        logger.error(f"❌ EMA startup error: {e}")
+        await send_telegram_message(f"❌ EMA Scan Error: {e}")
 
-            copy_line = ",".join(symbols_for_copy)
 
-            message += (
-                "📋 <b>FYERS Copy:</b>\n"
-                f"<code>{copy_line}</code>"
-            )
+async def scan_then_terminate(watch=None):
+    await run_startup_scan()
+    if watch is not None:
+        await watch   # intraday trigger watch runs until the close
+    await terminate_after_delay(min_minutes=3, max_minutes=5)
 
-            await send_telegram_message(message)
-            logger.info("✅ EMA startup alert sent")
 
-        else:
-            await send_telegram_message(
-                "📊 EMA Scan Completed\nNo momentum signals found."
-            )
-            logger.info("ℹ️ No EMA signals found on startup")
+async def post_init(app):
+    logger.info("🚀 Starting background jobs")
 
-    except Exception as e:
-        logger.error(f"❌ EMA startup error: {e}")
-        await send_telegram_message(f"❌ EMA Scan Error: {e}")
+    # Existing jobs
+    if WARMUP_ENABLED:
+        app.create_task(run_pre_market_warmup())   # hot state before the breakout window
+    #app.create_task(run_nifty_breakout_trade())
+    #app.create_task(terminate_at(target_hour=12, target_minute=30))
 
-    
+    # Pre-market trigger levels, then the intraday watch until the close
+    watch = app.create_task(run_trigger_watch()) if TRIGGER_WATCH_ENABLED else None
 
-    app.create_task(terminate_after_delay(min_minutes=3, max_minutes=5))
+    # 🔥 RUN EMA SCANNER IMMEDIATELY ON START (off the event loop);
+    # the termination countdown starts once it — and the watch, if
+    # enabled — has finished
+    app.create_task(scan_then_terminate(watch))
 
 
 # ───────────────────────────────
@@ -151,6 +154,11 @@ def main():
         .build()
     )
 
+    app.add_handler(CommandHandler("subscribe", handle_subscribe))
+    app.add_handler(CommandHandler("unsubscribe", handle_unsubscribe))
+    app.add_handler(CommandHandler("ema", handle_ema))
+    app.add_handler(CommandHandler("alerts", handle_alerts))
+    app.add_handler(CommandHandler("stock", handle_stock))
     app.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
     )
@@ -158,6 +166,9 @@ def main():
     logger.info("🤖 Telegram bot started")
     app.run_polling()
 
+    # Deliver anything still queued before the process exits
+    flush_telegram()
+
 
 # ───────────────────────────────
 # Entry
@@ -2,27 +2,37 @@
 # File: app/scanners/EMA_10_20_breakout.py
 # ==========================================================
 
+import html
 import logging
+import numpy as np
 import pandas as pd
-from ta.trend import EMAIndicator
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 # Activate global logging
 from app.config import logging_config
 
 from app.config.aws_s3 import read_csv_from_s3, upload_csv_to_s3
 from app.config.settings import (
-    IST,
     S3_BUCKET,
-    MAP_FILE_KEY,
-    EOD_DATA_PREFIX
+    EMA_STATE_ENABLED,
 )
-from app.config.dhan_auth import dhan
-from app.broker.market_data import get_quotes_with_retry
+from app.bot.message_builder import chunk_records, render_records
+from app.bot.telegram_sender import MESSAGE_LIMIT, broadcast_telegram_message
+from app.data.eod_history import load_eod_ohlcv
+from app.scanners.ema_engine import (
+    CANDLE_WINDOW,
+    apply_live_candles,
+    ema_cross_signals,
+    live_candles,
+)
+from app.scanners.ema_state import ema_signals_from_state, load_ema_state, state_coverage
+from app.scanners.registry import Scanner, register_scanner
 
 logger = logging.getLogger(__name__)
 
 OUTPUT_KEY = "uploads/ema_momentum_EOD.csv"
+STREAM_BATCH = 10   # signals per streamed Telegram message
+INDICATOR_FIELDS = ("open", "high", "low", "close", "volume", "ema10", "ema20", "ema50")
 
 
 # ==============================
@@ -33,141 +43,116 @@ def is_market_day(timestamp):
     return timestamp.weekday() < 5
 
 # ------------------------------
-# Update Today Candle
+# Signals from EOD history
 # ------------------------------
-def update_today_candle(df, today, live):
-    if "ohlc" not in live:
-        logger.warning("Live data missing OHLC")
-        return df
-
-    ohlc = live["ohlc"]
-    df.loc[today] = {
-        "open": ohlc.get("open", 0),
-        "high": ohlc.get("high", 0),
-        "low": ohlc.get("low", 0),
-        "close": live.get("last_price", 0),
-        "volume": live.get("volume", 0),
-    }
-    df.sort_index(inplace=True)
-    return df.tail(120)
+def history_signals(instrument_ids, market_caps, candles, today, load_ohlcv=load_eod_ohlcv):
+    """
+    Full-window scan: last CANDLE_WINDOW candles (+ today's live candle
+    when given) through the vectorised EMA engine.
+    """
+    ohlcv, last_dates = load_ohlcv(instrument_ids, CANDLE_WINDOW)
 
-# ==============================
-# EMA PRICE CROSS SCANNER
-# ==============================
-def ema_price_cross():
-    logger.info("🚀 EMA PRICE CROSS SCANNER STARTED")
+    no_data = np.isnat(last_dates)
+    if no_data.any():
+        logger.warning(f"{int(no_data.sum())} stocks skipped — No EOD data")
 
-    scan_time = datetime.now(IST)
-    scan_time_str = scan_time.strftime("%Y-%m-%d %H:%M:%S")
-    today = pd.Timestamp(scan_time.date())
-    weekday = scan_time.weekday()  # Monday=0, Sunday=6
+    # Update today candle only on trading days
+    if candles is not None:
+        apply_live_candles(ohlcv, last_dates, candles, today)
 
-    # ---- Load Mapping ----
-    df_map = read_csv_from_s3(S3_BUCKET, MAP_FILE_KEY)
+    result = ema_cross_signals(ohlcv, market_caps)
 
-    if df_map.empty:
-        logger.error("Mapping file empty or not found")
-        upload_csv_to_s3(pd.DataFrame(), S3_BUCKET, OUTPUT_KEY)
+    short = ~no_data & ~result["enough_candles"]
+    if short.any():
+        logger.warning(f"{int(short.sum())} stocks skipped — Not enough candles")
+    return result
+
+# ==============================
+# EMA PRICE CROSS SCANNER
+# ==============================
+def ema_history_ids(ctx, instrument_ids):
+    """
+    Instruments whose history the runner should prefetch: those the EMA
+    state cannot serve today. State-covered ones without a live quote are
+    loaded lazily by evaluate (ctx.ohlcv).
+    """
+    if not (ctx.is_trading_day and EMA_STATE_ENABLED):
+        return instrument_ids
+    covered = state_coverage(ctx.shared("ema_state"), instrument_ids, ctx.today)
+    return [iid for iid, ok in zip(instrument_ids, covered) if not ok]
+
+
+def evaluate_ema_momentum(ctx, df_map):
+    """Rules over one chunk of the run's shared mapping / quotes / history → its matches."""
+    instrument_ids = df_map["Instrument ID"].tolist()
+    if not instrument_ids:
         return pd.DataFrame()
 
-    df_map = df_map.dropna(
-        subset=["Stock Name", "Instrument ID", "Market Cap", "Setup_Case"]
-    )
+    market_caps = df_map["Market Cap"].astype(float).to_numpy()
+    candles = live_candles(ctx.live_data, instrument_ids) if ctx.is_trading_day else None
+
+    # ---- Today's EMAs from yesterday's persisted state (O(1) per stock) ----
+    result, from_state = {}, np.zeros(len(instrument_ids), dtype=bool)
+    if candles is not None and EMA_STATE_ENABLED:
+        result, from_state = ema_signals_from_state(
+            ctx.shared("ema_state"), instrument_ids, candles, market_caps, ctx.today
+        )
+        logger.info(f"🧮 EMA state used for {int(from_state.sum())}/{len(instrument_ids)} stocks")
+
+    # ---- Everything else: full history window ----
+    rest = np.flatnonzero(~from_state)
+    if rest.size or not result:
+        history = history_signals(
+            [instrument_ids[i] for i in rest],
+            market_caps[rest],
+            candles[rest] if candles is not None else None,
+            ctx.today,
+            load_ohlcv=ctx.ohlcv,
+        )
+        if not result:
+            result = history
+        else:
+            for name, values in history.items():
+                result[name][rest] = values
 
-    df_map["Instrument ID"] = df_map["Instrument ID"].astype(int)
-    instrument_ids = df_map["Instrument ID"].tolist()
-    logger.info(f"Mapping loaded | Total stocks: {len(instrument_ids)}")
-     # ------------------------------
-    # Get Live Data on Trading Days only
-    # ------------------------------
-    live_data = {}
-    if weekday < 5:  # Monday=0 ... Friday=4
-        live_data = get_quotes_with_retry(instrument_ids, "NSE_EQ") or {}
-        logger.info(f"Total live quotes received: {len(live_data)}")
-    else:
-        logger.info("Weekend detected — using only EOD data")
+    logger.info(
+        f"Cross10={int(result['cross_ema10'].sum())} | "
+        f"Cross20={int(result['cross_ema20'].sum())} | "
+        f"Align={int(result['cond_alignment'].sum())} | "
+        f"Filters={int(result['cond_filters'].sum())}"
+    )
 
-    
+    # Latest candle + EMAs per instrument, for on-demand lookups (/stock);
+    # instruments without data or enough candles have no real reading
+    for pos in np.flatnonzero(result["enough_candles"]):
+        values = {name: float(result[name][pos]) for name in INDICATOR_FIELDS}
+        if np.isfinite(list(values.values())).all():
+            ctx.record(instrument_ids[pos], **values, ema_signal=bool(result["signal"][pos]))
 
     matched = []
-
-    # ---- Scan Each Stock ----
-    for _, row in df_map.iterrows():
+    for pos in np.flatnonzero(result["signal"]):
+        row = df_map.iloc[pos]
         stock = row["Stock Name"]
-        instrument_id = row["Instrument ID"]
-        market_cap = float(row["Market Cap"])
-        setup_case = row["Setup_Case"]
-
-        eod_key = f"{EOD_DATA_PREFIX}/{instrument_id}.csv"
-        df = read_csv_from_s3(S3_BUCKET, eod_key)
+        logger.info(f"🚀 EMA MOMENTUM SIGNAL → {stock}")
 
-        if df.empty:
-            logger.warning(f"{stock} skipped — No EOD data")
-            continue
-
-        try:
-            df.columns = df.columns.str.lower()
-            df["date"] = pd.to_datetime(df["date"])
-            df.set_index("date", inplace=True)
-             # Update today candle only on trading days
-            if weekday < 5:
-                live = live_data.get(str(instrument_id))
-                if live:
-                    df = update_today_candle(df, today, live)
-
-            # Only take last 120 candles
-            df = df.tail(120)
-
-            if len(df) < 50:
-                logger.warning(f"{stock} skipped — Not enough candles")
-                continue
-
-            # ---- EMA Calculation ----
-            df["ema10"] = EMAIndicator(df["close"], 10).ema_indicator()
-            df["ema20"] = EMAIndicator(df["close"], 20).ema_indicator()
-            df["ema50"] = EMAIndicator(df["close"], 50).ema_indicator()
-
-            latest = df.iloc[-1]
-            prev = df.iloc[-2]
-
-            # ---- EMA CROSS CONDITIONS ----
-            cross_ema10 = prev["close"] <= prev["ema10"] and latest["close"] > latest["ema10"]
-            cross_ema20 = prev["close"] <= prev["ema20"] and latest["close"] > latest["ema20"]
-
-            cond_price_cross = cross_ema10 or cross_ema20
-            cond_alignment = latest["ema10"] > latest["ema20"] > latest["ema50"]
-            cond_filters = market_cap > 500 and latest["volume"] > 70000
-
-            logger.info(
-                f"{stock} | Cross10={cross_ema10} | "
-                f"Cross20={cross_ema20} | "
-                f"Align={cond_alignment} | "
-                f"MCap={market_cap} | "
-                f"Vol={latest['volume']}"
-            )
-
-            if cond_price_cross and cond_alignment and cond_filters:
-                logger.info(f"🚀 EMA MOMENTUM SIGNAL → {stock}")
-
-                matched.append({
-                    "Stock Name": stock,
-                    "Security ID": instrument_id,
-                    "Market Cap": market_cap,
-                    "Open": round(latest["open"], 2),
-                    "Price": round(latest["close"], 2),
-                    "High": round(latest["high"], 2),
-                    "Low": round(latest["low"], 2),
-                    "Setup_Case": setup_case,
-                    "Scan Time": scan_time_str
-                })
+        matched.append({
+            "Stock Name": stock,
+            "Security ID": row["Instrument ID"],
+            "Market Cap": market_caps[pos],
+            "Open": round(result["open"][pos], 2),
+            "Price": round(result["close"][pos], 2),
+            "High": round(result["high"][pos], 2),
+            "Low": round(result["low"][pos], 2),
+            "Setup_Case": row["Setup_Case"],
+            "Scan Time": ctx.scan_time_str
+        })
 
-        except Exception as e:
-            logger.error(f"{stock} failed: {e}")
+    return pd.DataFrame(matched)
 
-    logger.info(f"Total matched stocks today: {len(matched)}")
 
-    # ---- Prepare DataFrame ----
-    today_df = pd.DataFrame(matched)
+def publish_ema_momentum(today_df, ctx):
+    """Merge today's matches into this week's file on S3; returns today's matches."""
+    logger.info(f"Total matched stocks today: {len(today_df)}")
 
     # ---- Weekly storage ----
     result_df = today_df.copy()
@@ -183,7 +168,7 @@ def ema_price_cross():
             existing_df["Scan Time"] = pd.to_datetime(existing_df["Scan Time"])
             result_df["Scan Time"] = pd.to_datetime(result_df["Scan Time"])
 
-            today_date = scan_time.date()
+            today_date = ctx.scan_time.date()
             week_start = today_date - timedelta(days=today_date.weekday())
             existing_df = existing_df[existing_df["Scan Time"].dt.date >= week_start]
 
@@ -212,6 +197,70 @@ def ema_price_cross():
     return today_df
 
 
+SIGNAL_CARD = "🔹 <b>{Stock_Name}</b>\nPrice: ₹{Price}\nSetup: {Setup_Case}\n\n"
+
+
+def _fyers_copy(today_df):
+    """FYERS watchlist line(s); long lists are split across <code> blocks."""
+    symbols = [f"NSE:{name.replace(' ', '').upper()}-EQ" for name in today_df["Stock Name"]]
+    lines = chunk_records(symbols, limit=MESSAGE_LIMIT - 200, separator=",")
+    return "📋 <b>FYERS Copy:</b>\n" + "\n".join(f"<code>{html.escape(line)}</code>" for line in lines)
+
+
+def ema_momentum_messages(today_df):
+    """Full signal list → messages within Telegram's limit, split between signals."""
+    if today_df is None or today_df.empty:
+        return ["📊 EMA Scan Completed\nNo momentum signals found."]
+
+    return chunk_records(
+        render_records(today_df, SIGNAL_CARD),
+        header="📊 <b>EMA Momentum Stocks (BUY Setup)</b>\n\n",
+        footer=_fyers_copy(today_df),
+        limit=MESSAGE_LIMIT,
+    )
+
+
+def stream_ema_momentum(part_df, ctx):
+    """Hits from one chunk, STREAM_BATCH per message, as soon as they are found."""
+    cards = render_records(part_df, SIGNAL_CARD)
+    for start in range(0, len(cards), STREAM_BATCH):
+        message = "📊 <b>EMA Momentum — new signals</b>\n\n" + "".join(cards[start:start + STREAM_BATCH])
+        broadcast_telegram_message(message.rstrip())
+
+
+def notify_ema_momentum(today_df, ctx):
+    if ctx.streamed.get("ema_momentum"):
+        # Signals already went out as they were found → close with the summary
+        messages = chunk_records(
+            [_fyers_copy(today_df)],
+            header=f"📊 <b>EMA Scan Completed</b> | {len(today_df)} signal(s)\n\n",
+            limit=MESSAGE_LIMIT,
+        )
+    else:
+        messages = ema_momentum_messages(today_df)
+    for message in messages:
+        chats = broadcast_telegram_message(message)
+    logger.info(f"✅ EMA alert queued | {len(messages)} message(s) → {chats} chat(s)")
+
+
+register_scanner(Scanner(
+    "ema_momentum",
+    evaluate=evaluate_ema_momentum,
+    publish=publish_ema_momentum,
+    notify=notify_ema_momentum,
+    stream=stream_ema_momentum,
+    history_rows=CANDLE_WINDOW,
+    history_ids=ema_history_ids,
+    preload={"ema_state": load_ema_state} if EMA_STATE_ENABLED else None,
+))
+
+
+def ema_price_cross():
+    """Run just this scanner (app.scanners.runner.run_scanners runs them all in one pass)."""
+    from app.scanners.runner import run_scanners
+    return run_scanners(["ema_momentum"])["ema_momentum"]
+
+
 # ==============================
 # ENTRY POINT
 # ==============================
@@ -0,0 +1,199 @@
+# ==========================================================
+# File: app/scanners/ema_engine.py
+# ==========================================================
+"""
+Cross-sectional EMA engine.
+
+All instruments are evaluated together over 2-D matrices
+(instrument × candle, oldest → newest, right-aligned, NaN left padding).
+The EMA recurrence is replayed exactly as pandas ewm(adjust=False) /
+ta.trend.EMAIndicator computes it, so results match the per-stock path.
+"""
+import numpy as np
+import pandas as pd
+
+from app.data.eod_panel import OHLCV_COLUMNS
+
+FIELDS = OHLCV_COLUMNS
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+CANDLE_WINDOW = 120   # candles per instrument the scan looks at (incl. today)
+EMA_SPANS = (10, 20, 50)
+MIN_CANDLES = 50
+MIN_MARKET_CAP = 500
+MIN_VOLUME = 70000
+
+
+# ------------------------------
+# Live candle
+# ------------------------------
+def live_candles(live_data, instrument_ids):
+    """
+    Dhan quotes → today's candle per row ([N, 5], NaN where no usable quote).
+    Mirrors update_today_candle: quotes without "ohlc" are ignored.
+    """
+    candles = np.full((len(instrument_ids), len(FIELDS)), np.nan)
+
+    for row, iid in enumerate(instrument_ids):
+        live = live_data.get(str(iid))
+        if not live or "ohlc" not in live:
+            continue
+        ohlc = live["ohlc"]
+        candles[row] = (
+            ohlc.get("open", 0),
+            ohlc.get("high", 0),
+            ohlc.get("low", 0),
+            live.get("last_price", 0),
+            live.get("volume", 0),
+        )
+    return candles
+
+
+def apply_live_candles(ohlcv, last_dates, candles, today):
+    """
+    In place: today's candle overwrites the last column when the history
+    already ends today, otherwise it is appended (window shifts left by one).
+    """
+    today = np.datetime64(pd.Timestamp(today).date(), "D")
+    has_live = ~np.isnan(candles).all(axis=1)
+
+    same_day = has_live & (last_dates == today)
+    append = has_live & ~same_day
+
+    ohlcv[append, :-1, :] = ohlcv[append, 1:, :]
+    ohlcv[has_live, -1, :] = candles[has_live]
+    last_dates[has_live] = today
+    return ohlcv
+
+
+# ------------------------------
+# EMA
+# ------------------------------
+def ewm_weights(span):
+    """(alpha, 1 - alpha) derived the way pandas ewm(span=...) does."""
+    com = (span - 1) / 2.0
+    alpha = 1.0 / (1.0 + com)
+    return alpha, 1.0 - alpha
+
+
+def ema_step(weighted, cur, span):
+    """
+    One more candle on top of an EMA state: today's EMA from yesterday's
+    (unmasked) EMA and today's close. Same arithmetic as ema_matrix, so
+    ema_step(ema_matrix(x[:-1])[-1], x[-1]) == ema_matrix(x)[-1].
+    """
+    alpha, old_wt_factor = ewm_weights(span)
+    weighted = np.asarray(weighted, dtype=np.float64)
+    cur = np.asarray(cur, dtype=np.float64)
+
+    has = ~np.isnan(weighted)
+    is_obs = ~np.isnan(cur)
+    with np.errstate(invalid="ignore"):
+        blended = (old_wt_factor * weighted + alpha * cur) / (old_wt_factor + alpha)
+    out = np.where(has & is_obs & (weighted != cur), blended, weighted)
+    return np.where(~has & is_obs, cur, out)
+
+
+def ema_matrix(close, span, min_periods=None):
+    """
+    EMA for every row of a [N, T] close matrix.
+
+    Same recurrence as pandas ewm(span=span, adjust=False, min_periods=span)
+    — including its handling of leading / interior NaNs — evaluated one
+    candle at a time across all instruments.
+    """
+    min_periods = span if min_periods is None else min_periods
+    alpha, old_wt_factor = ewm_weights(span)
+
+    n_rows, n_cols = close.shape
+    out = np.full((n_rows, n_cols), np.nan)
+    if n_cols == 0:
+        return out
+
+    weighted = close[:, 0].copy()
+    nobs = (~np.isnan(weighted)).astype(np.int64)
+    old_wt = np.ones(n_rows)
+    out[:, 0] = np.where(nobs >= min_periods, weighted, np.nan)
+
+    for t in range(1, n_cols):
+        cur = close[:, t]
+        is_obs = ~np.isnan(cur)
+        nobs += is_obs
+        has = ~np.isnan(weighted)
+
+        old_wt = np.where(has, old_wt * old_wt_factor, old_wt)
+        update = has & is_obs & (weighted != cur)
+        with np.errstate(invalid="ignore"):
+            blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(has & is_obs, 1.0, old_wt)
+        weighted = np.where(~has & is_obs, cur, weighted)
+
+        out[:, t] = np.where(nobs >= min_periods, weighted, np.nan)
+
+    return out
+
+
+# ------------------------------
+# Signal rules
+# ------------------------------
+def evaluate_rules(prev_close, prev_ema10, prev_ema20,
+                   close, ema10, ema20, ema50, volume, market_cap, bars):
+    """
+    EMA momentum rules over 1-D arrays (one entry per instrument).
+    NaN inputs compare False, exactly like the scalar checks did.
+    """
+    with np.errstate(invalid="ignore"):
+        cross_ema10 = (prev_close <= prev_ema10) & (close > ema10)
+        cross_ema20 = (prev_close <= prev_ema20) & (close > ema20)
+        cond_price_cross = cross_ema10 | cross_ema20
+        cond_alignment = (ema10 > ema20) & (ema20 > ema50)
+        cond_filters = (market_cap > MIN_MARKET_CAP) & (volume > MIN_VOLUME)
+        enough = bars >= MIN_CANDLES
+
+    return {
+        "cross_ema10": cross_ema10,
+        "cross_ema20": cross_ema20,
+        "cond_price_cross": cond_price_cross,
+        "cond_alignment": cond_alignment,
+        "cond_filters": cond_filters,
+        "enough_candles": enough,
+        "signal": enough & cond_price_cross & cond_alignment & cond_filters,
+    }
+
+
+def ema_cross_signals(ohlcv, market_cap):
+    """
+    Evaluate the EMA price-cross scan for the whole universe at once.
+
+    Args:
+        ohlcv      : [N, T, 5] candles (open, high, low, close, volume)
+        market_cap : [N] market cap per row
+
+    Returns:
+        dict -> boolean masks (see evaluate_rules) plus latest
+        open/high/low/close/volume and ema10/ema20/ema50, each shape [N]
+    """
+    close = ohlcv[:, :, FIELD_INDEX["close"]]
+    ema = {span: ema_matrix(close, span) for span in EMA_SPANS}
+    bars = (~np.isnan(close)).sum(axis=1)
+
+    result = evaluate_rules(
+        prev_close=close[:, -2],
+        prev_ema10=ema[10][:, -2],
+        prev_ema20=ema[20][:, -2],
+        close=close[:, -1],
+        ema10=ema[10][:, -1],
+        ema20=ema[20][:, -1],
+        ema50=ema[50][:, -1],
+        volume=ohlcv[:, -1, FIELD_INDEX["volume"]],
+        market_cap=np.asarray(market_cap, dtype=np.float64),
+        bars=bars,
+    )
+
+    for name in FIELDS:
+        result[name] = ohlcv[:, -1, FIELD_INDEX[name]]
+    for span in EMA_SPANS:
+        result[f"ema{span}"] = ema[span][:, -1]
+    result["bars"] = bars
+    return result
@@ -0,0 +1,180 @@
+# ==========================================================
+# File: app/scanners/ema_state.py
+# ==========================================================
+"""
+Persisted EMA state — one row per instrument, refreshed after every EOD
+update (python -m app.scanners.ema_state):
+
+    instrument_id | date | open | high | low | close | volume | bars | ema10 | ema20 | ema50
+
+The EMAs are the scan's own view of yesterday: ewm over the last
+CANDLE_WINDOW - 1 candles, stored unmasked. Appending today's live candle
+is a single ema_step, which reproduces the full 120-candle scan exactly
+without reading any per-instrument history.
+"""
+import io
+import logging
+import numpy as np
+import pandas as pd
+
+from app.config.aws_s3 import read_bytes_from_s3, upload_bytes_to_s3
+from app.config.settings import S3_BUCKET, EMA_STATE_KEY
+from app.data.eod_history import load_eod_ohlcv
+from app.data.eod_panel import list_eod_instruments
+from app.scanners.ema_engine import (
+    CANDLE_WINDOW,
+    EMA_SPANS,
+    FIELDS,
+    FIELD_INDEX,
+    ema_matrix,
+    ema_step,
+    evaluate_rules,
+)
+
+logger = logging.getLogger(__name__)
+
+STATE_WINDOW = CANDLE_WINDOW - 1   # today's candle completes the window
+STATE_COLUMNS = (
+    ["instrument_id", "date"] + FIELDS + ["bars"] + [f"ema{span}" for span in EMA_SPANS]
+)
+
+
+# ==============================
+# BUILD
+# ==============================
+def compute_ema_state(instrument_ids, ohlcv, last_dates) -> pd.DataFrame:
+    """EOD matrix (see load_eod_ohlcv) → state DataFrame."""
+    close = ohlcv[:, :, FIELD_INDEX["close"]]
+
+    state = pd.DataFrame({"instrument_id": np.asarray(instrument_ids, dtype=np.int64)})
+    state["date"] = pd.to_datetime(last_dates)
+    for name in FIELDS:
+        state[name] = ohlcv[:, -1, FIELD_INDEX[name]]
+    state["bars"] = (~np.isnan(close)).sum(axis=1)
+    for span in EMA_SPANS:
+        state[f"ema{span}"] = ema_matrix(close, span, min_periods=1)[:, -1]
+
+    # Rows without a real last candle can't be stepped forward
+    return state[state["date"].notna() & state["close"].notna()].reset_index(drop=True)
+
+
+def build_ema_state(instrument_ids=None, key=EMA_STATE_KEY) -> pd.DataFrame:
+    if instrument_ids is None:
+        instrument_ids = list_eod_instruments()
+
+    ohlcv, last_dates = load_eod_ohlcv(instrument_ids, rows=STATE_WINDOW)
+    state = compute_ema_state(instrument_ids, ohlcv, last_dates)
+
+    if state.empty:
+        logger.error("❌ EMA state empty — nothing uploaded")
+        return state
+
+    buffer = io.BytesIO()
+    state.to_parquet(buffer, index=False)
+    upload_bytes_to_s3(buffer.getvalue(), S3_BUCKET, key)
+
+    logger.info(
+        f"🧮 EMA state saved | instruments={len(state)} | "
+        f"as of {state['date'].max().date()}"
+    )
+    return state
+
+
+# ==============================
+# READ
+# ==============================
+def load_ema_state(key=EMA_STATE_KEY) -> pd.DataFrame:
+    body = read_bytes_from_s3(S3_BUCKET, key)
+    if not body:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+
+    try:
+        return pd.read_parquet(io.BytesIO(body))
+    except Exception as e:
+        logger.error(f"❌ EMA state unreadable ({key}): {e}")
+        return pd.DataFrame(columns=STATE_COLUMNS)
+
+
+# ==============================
+# SCAN
+# ==============================
+def _snapshot(state, instrument_ids, today):
+    """
+    (state rows in instrument_ids order, mask of rows whose snapshot can be
+    stepped to `today`): the row is from the latest stored session, that
+    session is before today and at least the previous weekday.
+    """
+    today = np.datetime64(pd.Timestamp(today).date(), "D")
+    state = state.drop_duplicates("instrument_id", keep="last").set_index("instrument_id")
+    snap = state.reindex([int(i) for i in instrument_ids])
+
+    snap_dates = snap["date"].to_numpy(dtype="datetime64[D]")
+    as_of = state["date"].max().to_datetime64().astype("datetime64[D]")
+    prev_session = np.busday_offset(today, -1, roll="backward")
+
+    usable = (snap_dates == as_of) & (as_of < today) & (as_of >= prev_session)
+    return snap, usable
+
+
+def state_coverage(state, instrument_ids, today):
+    """[N] mask of instruments the state can serve today, given a live candle."""
+    if state.empty:
+        return np.zeros(len(instrument_ids), dtype=bool)
+    return _snapshot(state, instrument_ids, today)[1]
+
+
+def ema_signals_from_state(state, instrument_ids, candles, market_cap, today):
+    """
+    Today's EMAs and cross rules from the snapshot + live candles, O(1)
+    per instrument.
+
+    A row is only usable when its snapshot is from the latest stored
+    session, that session is before today and at least the previous
+    weekday, and a live candle exists. Everything else is left for the
+    history path.
+
+    Returns:
+        (result, usable) — result has the same keys as ema_cross_signals;
+        usable is the [N] mask of rows it is valid for.
+    """
+    n = len(instrument_ids)
+    if state.empty:
+        return {}, np.zeros(n, dtype=bool)
+
+    snap, usable = _snapshot(state, instrument_ids, today)
+    usable &= ~np.isnan(candles).all(axis=1)
+
+    bars = snap["bars"].fillna(0).to_numpy(dtype=np.int64) + 1
+    close = candles[:, FIELD_INDEX["close"]]
+
+    prev_ema, ema = {}, {}
+    for span in EMA_SPANS:
+        raw = snap[f"ema{span}"].to_numpy(dtype=np.float64)
+        prev_ema[span] = np.where(bars - 1 >= span, raw, np.nan)
+        ema[span] = np.where(bars >= span, ema_step(raw, close, span), np.nan)
+
+    result = evaluate_rules(
+        prev_close=snap["close"].to_numpy(dtype=np.float64),
+        prev_ema10=prev_ema[10],
+        prev_ema20=prev_ema[20],
+        close=close,
+        ema10=ema[10],
+        ema20=ema[20],
+        ema50=ema[50],
+        volume=candles[:, FIELD_INDEX["volume"]],
+        market_cap=np.asarray(market_cap, dtype=np.float64),
+        bars=bars,
+    )
+    result["signal"] &= usable
+
+    for name in FIELDS:
+        result[name] = candles[:, FIELD_INDEX[name]]
+    for span in EMA_SPANS:
+        result[f"ema{span}"] = ema[span]
+    result["bars"] = bars
+    return result, usable
+
+
+if __name__ == "__main__":
+    from app.config import logging_config  # noqa: F401
+    build_ema_state()
@@ -0,0 +1,73 @@
+# ==========================================================
+# File: app/scanners/registry.py
+# ==========================================================
+"""
+Scanner registry.
+
+A scanner only declares its rules; the runner (app/scanners/runner.py)
+owns all I/O. Each one registers:
+
+    name          key in SCANNERS and in run_scanners() results
+    evaluate      (ctx, universe_chunk_df) -> partial result
+                  pure rules over shared data; called once per chunk of
+                  instruments as their quotes / history arrive
+    combine       [partial results] -> result       (default: concat)
+    publish       (result, ctx) -> output           its own sink (S3 file, log, ...)
+    report        (result, ctx) -> output           same output without side effects,
+                  used by runs that must not publish (on-demand commands);
+                  default: the combined result
+    notify        (output, ctx) -> None             optional alert (Telegram, ...)
+    stream        (partial result, ctx) -> None     optional: alert a chunk's hits
+                  as soon as they are found (ctx.streamed counts them)
+    universe      (mapping_df) -> mapping_df        rows of the mapping it scans
+    history_rows  EOD candles it needs per instrument (None = no history)
+    history_ids   (ctx, instrument_ids) -> ids whose history the runner should
+                  prefetch (default: all); the rest stay lazy behind
+                  ctx.history, e.g. instruments a persisted state serves
+    preload       {name: loader()} run-wide inputs fetched at the start
+                  alongside quotes / history; read with ctx.shared(name)
+
+so adding a strategy adds rules, not another mapping read, quote sweep
+or EOD load.
+"""
+import pandas as pd
+
+
+def concat_results(parts):
+    """Default combine: DataFrames are concatenated, lists chained."""
+    if parts and isinstance(parts[0], pd.DataFrame):
+        return pd.concat(parts, ignore_index=True)
+    return [row for part in parts for row in part]
+
+
+class Scanner:
+    def __init__(self, name, evaluate, publish=None, report=None, notify=None, stream=None,
+                 combine=concat_results, universe=None, history_rows=None, history_ids=None, preload=None):
+        self.name = name
+        self.evaluate = evaluate
+        self.combine = combine
+        self.publish = publish
+        self.report = report
+        self.notify = notify
+        self.stream = stream
+        self.universe = universe
+        self.history_rows = history_rows
+        self.history_ids = history_ids
+        self.preload = preload or {}
+
+    def select(self, mapping):
+        return mapping if self.universe is None else self.universe(mapping)
+
+    def prefetch_ids(self, ctx, instrument_ids):
+        if not self.history_rows:
+            return []
+        return instrument_ids if self.history_ids is None else self.history_ids(ctx, instrument_ids)
+
+
+SCANNERS = {}
+
+
+def register_scanner(scanner: Scanner) -> Scanner:
+    """Add (or replace, by name) a scanner; later registrations win."""
+    SCANNERS[scanner.name] = scanner
+    return scanner
@@ -0,0 +1,185 @@
+# ==========================================================
+# File: app/scanners/result_cache.py
+# ==========================================================
+"""
+Dated cache of the latest scan run, for on-demand Telegram commands
+(/ema, /alerts, /stock SYMBOL).
+
+A result is keyed by (trading date, data version). The data version is
+the ETags of the scan's inputs in S3 — mapping, EMA state, EOD panel —
+a digest of the eod_data/ ETags (read when the panel is stale or lacks an
+instrument; listed at most once per SCAN_RESULT_TTL_SECS), plus, while the
+market is open, a SCAN_RESULT_TTL_SECS bucket for the live quotes.
+
+A request whose key matches the cached result is answered from memory;
+otherwise one scan runs and every concurrent request waits on that single
+in-flight scan (single-flight), then re-checks its key.
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import numpy as np
+
+from app.config.aws_s3 import head_s3_etag
+from app.config.settings import (
+    IST,
+    S3_BUCKET,
+    MAP_FILE_KEY,
+    EMA_STATE_KEY,
+    EOD_PANEL_KEY,
+    MARKET_OPEN_TIME,
+    MARKET_CLOSE_TIME,
+    SCAN_RESULT_TTL_SECS,
+)
+from app.data.eod_loader import eod_versions
+from app.scanners.runner import run_scan
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEYS = (MAP_FILE_KEY, EMA_STATE_KEY, EOD_PANEL_KEY)
+
+_EOD_DATA = {"listed_at": None, "version": None}   # last eod_data/ digest and when it was listed
+_EOD_DATA_LOCK = threading.Lock()
+
+
+def normalize_symbol(symbol) -> str:
+    return str(symbol).replace(" ", "").upper()
+
+
+# ------------------------------
+# Cache key
+# ------------------------------
+def trading_date(now=None):
+    """Today on weekdays, else the last weekday (the session the data describes)."""
+    now = now or datetime.now(IST)
+    return np.busday_offset(np.datetime64(now.date(), "D"), 0, roll="backward").item()
+
+
+def eod_data_version() -> str:
+    """Digest of every eod_data/ ETag — one LIST, reused for SCAN_RESULT_TTL_SECS."""
+    with _EOD_DATA_LOCK:
+        now = time.monotonic()
+        if _EOD_DATA["listed_at"] is None or now - _EOD_DATA["listed_at"] >= SCAN_RESULT_TTL_SECS:
+            listing = "\n".join(f"{key}:{etag}" for key, etag in sorted(eod_versions().items()))
+            _EOD_DATA.update(listed_at=now, version=hashlib.md5(listing.encode()).hexdigest())
+        return _EOD_DATA["version"]
+
+
+def data_version(now=None) -> tuple:
+    now = now or datetime.now(IST)
+    etags = tuple(head_s3_etag(S3_BUCKET, key) for key in VERSION_KEYS) + (eod_data_version(),)
+
+    market_open = now.weekday() < 5 and MARKET_OPEN_TIME <= now.time() <= MARKET_CLOSE_TIME
+    quotes = int(now.timestamp() // SCAN_RESULT_TTL_SECS) if market_open else "closed"
+    return etags + (quotes,)
+
+
+def current_key():
+    now = datetime.now(IST)
+    return trading_date(now), data_version(now)
+
+
+# ------------------------------
+# Result
+# ------------------------------
+class ScanResult:
+    def __init__(self, key, outputs, ctx, took):
+        self.key = key
+        self.trading_date = key[0]
+        self.outputs = outputs              # {scanner name: output}
+        self.indicators = ctx.indicators    # {instrument_id: {name: value}}
+        self.computed_at = ctx.scan_time
+        self.took = took
+        self._by_symbol = {
+            normalize_symbol(row["Stock Name"]): row
+            for row in ctx.mapping.to_dict("records")
+        }
+
+    def output(self, name):
+        return self.outputs.get(name)
+
+    def stock(self, symbol):
+        """(mapping row, indicator values) for a Stock Name, or None if unknown."""
+        row = self._by_symbol.get(normalize_symbol(symbol))
+        if row is None:
+            return None
+        return row, self.indicators.get(int(row["Instrument ID"]), {})
+
+
+# ------------------------------
+# Cache (single-flight)
+# ------------------------------
+class ScanResultCache:
+    def __init__(self):
+        self._result = None
+        self._inflight = None    # Future of the scan being computed (at most one at a time)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "scans": 0, "shared": 0}
+
+    def latest(self):
+        """Last computed result, whatever its key (None before the first scan)."""
+        return self._result
+
+    def get(self, notify=False, publish=False, force=False) -> ScanResult:
+        """
+        Result for the current (trading date, data version); scans only if
+        that key has not been computed yet. Blocking — call from a thread.
+
+        On-demand scans do not publish (no S3 writes, no intraday candles
+        in the weekly file); the scheduled startup scan passes publish=True
+        and always runs its own scan. Only one scan runs at a time: a caller
+        that finds one in flight joins it — whatever key it was started for
+        — and then re-checks freshness.
+        """
+        must_scan = force or notify or publish
+        while True:
+            key = current_key()
+            with self._lock:
+                if not must_scan and self._result is not None and self._result.key == key:
+                    self.stats["hits"] += 1
+                    return self._result
+                future = self._inflight
+                if future is None:
+                    self.stats["scans"] += 1
+                    future = self._inflight = Future()
+                    break
+                self.stats["shared"] += 1
+
+            try:
+                result = future.result()
+            except Exception:
+                if not must_scan:
+                    raise
+                continue
+            if not must_scan and result.key == key:
+                return result
+
+        return self._scan(key, future, notify, publish)
+
+    def _scan(self, key, future, notify, publish):
+        start = time.perf_counter()
+        try:
+            outputs, ctx = run_scan(notify=notify, publish=publish)
+            result = ScanResult(key, outputs, ctx, time.perf_counter() - start)
+        except BaseException as e:
+            with self._lock:
+                self._inflight = None
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._result = result
+            self._inflight = None
+        future.set_result(result)
+        logger.info(
+            f"🗂️ Scan result cached | date={result.trading_date} | took {result.took:.1f}s | {self.stats}"
+        )
+        return result
+
+
+# One per process
+SCAN_RESULTS = ScanResultCache()
@@ -0,0 +1,362 @@
+# ==========================================================
+# File: app/scanners/runner.py
+# ==========================================================
+"""
+Single-pass, pipelined runner for every registered scanner.
+
+Stages:
+    mapping  → read once; universes of all scanners are unioned
+    quotes   ┐ per chunk of SCAN_CHUNK_SIZE instruments, fetched in the
+    history  ┘ background concurrently with each other (and with preloads
+               such as the EMA state)
+    evaluate → each scanner's rules run on a chunk as soon as that chunk's
+               quotes and history are in, while later chunks still load
+    combine  → partial results per scanner
+    publish  ┐ every scanner's merge / upload and notification run
+    notify   ┘ concurrently
+
+so a run takes roughly as long as its slowest stage (usually the
+rate-limited quote sweep) instead of the sum of all of them. A failing
+scanner is logged and skipped; the others still publish.
+
+Run:  python -m app.scanners.runner [scanner ...]
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+import pandas as pd
+
+from app.config.aws_s3 import read_csv_from_s3
+from app.config.settings import IST, S3_BUCKET, MAP_FILE_KEY, SCAN_CHUNK_SIZE, DHAN_QUOTE_MAX_IN_FLIGHT
+from app.broker.market_data import get_quotes_with_retry
+from app.data.eod_history import load_eod_history, load_eod_ohlcv
+from app.data.eod_loader import eod_versions
+from app.data.eod_panel import get_eod_panel
+from app.scanners.registry import SCANNERS
+
+# Scanner modules register themselves on import
+from app.scanners import EMA_10_20_breakout  # noqa: F401
+from app.utils import alert_goodresult  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+MAPPING_COLUMNS = ["Stock Name", "Instrument ID", "Market Cap", "Setup_Case"]
+
+
+# ------------------------------
+# Shared scan data
+# ------------------------------
+class ScanContext:
+    def __init__(self, scan_time, mapping, history_rows, preloads=None):
+        self.scan_time = scan_time
+        self.scan_time_str = scan_time.strftime("%Y-%m-%d %H:%M:%S")
+        self.today = pd.Timestamp(scan_time.date())
+        self.is_trading_day = scan_time.weekday() < 5   # Monday=0 ... Friday=4
+        self.mapping = mapping
+        self.live_data = {}                 # {str(security_id): quote}, filled chunk by chunk
+        self.history_rows = history_rows    # default depth for history() without rows
+        self._frames = {}                   # instrument_id -> EOD frame
+        self._depth = {}                    # instrument_id -> candles its frame was loaded for
+        self._preloads = preloads or {}     # name -> Future
+        self.streamed = {}                  # scanner name -> hits already streamed to notify
+        self.indicators = {}                # instrument_id -> {name: value}, filled by scanners
+        self._once = {}                     # name -> run-wide value computed on first use
+        self._once_lock = threading.Lock()
+
+    def record(self, instrument_id, **values):
+        """Per-instrument indicator values a scanner wants to expose (e.g. /stock)."""
+        self.indicators.setdefault(int(instrument_id), {}).update(values)
+
+    def once(self, name, loader, *args):
+        """loader(*args), computed at most once per run (later calls reuse it)."""
+        with self._once_lock:
+            if name not in self._once:
+                self._once[name] = loader(*args)
+            return self._once[name]
+
+    def eod_versions(self, manifest=None):
+        """eod_data/ ETags for the frame cache — one LIST per run, not per chunk."""
+        return self.once("eod_versions", eod_versions, manifest)
+
+    def eod_panel(self):
+        """EOD panel, checked / fetched once per run and shared by every chunk."""
+        return self.once("eod_panel", get_eod_panel)
+
+    def load_history(self, instrument_ids, rows):
+        """load_eod_history over this run's shared inputs."""
+        return load_eod_history(
+            instrument_ids, rows=rows, load_panel=self.eod_panel, load_versions=self.eod_versions
+        )
+
+    def shared(self, name):
+        """Result of a scanner's preload (waits for it if still loading)."""
+        return self._preloads[name].result()
+
+    def history(self, instrument_ids, rows=None) -> dict:
+        """
+        {instrument_id: EOD frame (last `rows` candles)}. Each instrument is
+        loaded once per run at the depth asked for; a deeper request reloads
+        only the instruments held shallower, so one scanner's long window
+        never widens another's loads.
+        """
+        rows = rows or self.history_rows
+        missing = [int(i) for i in instrument_ids if self._depth.get(int(i), 0) < rows]
+        if missing:
+            self.add_history(self.load_history(missing, rows), rows)
+
+        return {int(i): self._frames[int(i)].tail(rows) for i in instrument_ids}
+
+    def add_history(self, frames, rows):
+        """Frames loaded ahead of time (`rows` candles deep) for later history() calls."""
+        for iid, frame in frames.items():
+            if self._depth.get(iid, 0) < rows:
+                self._frames[iid] = frame
+                self._depth[iid] = rows
+
+    @property
+    def history_loaded(self):
+        """Instruments whose history is held for this run."""
+        return len(self._frames)
+
+    def ohlcv(self, instrument_ids, rows):
+        """load_eod_ohlcv over the run's shared history."""
+        return load_eod_ohlcv(instrument_ids, rows, load_history=self.history)
+
+
+def load_mapping() -> pd.DataFrame:
+    df_map = read_csv_from_s3(S3_BUCKET, MAP_FILE_KEY)
+    if df_map.empty:
+        return pd.DataFrame(columns=MAPPING_COLUMNS)
+
+    df_map = df_map[MAPPING_COLUMNS].dropna()
+    df_map["Instrument ID"] = df_map["Instrument ID"].astype(int)
+    return df_map.reset_index(drop=True)
+
+
+# ------------------------------
+# Run
+# ------------------------------
+def _chunks(ids, size):
+    return [ids[i:i + size] for i in range(0, len(ids), size)] or [[]]
+
+
+def _fetch_quotes(chunk):
+    if not chunk:
+        return {}
+    try:
+        return get_quotes_with_retry(chunk, "NSE_EQ") or {}
+    except Exception as e:
+        logger.error(f"❌ Quote chunk failed ({len(chunk)} instruments): {e}")
+        return {}
+
+
+def _fetch_history(ctx, ids_by_rows):
+    """{rows: ids} → {rows: frames}; each group is loaded only as deep as it needs."""
+    loaded = {}
+    for rows, ids in ids_by_rows.items():
+        if not ids:
+            continue
+        try:
+            loaded[rows] = ctx.load_history(ids, rows)
+        except Exception as e:
+            logger.error(f"❌ History chunk failed ({len(ids)} instruments, {rows} rows): {e}")
+    return loaded
+
+
+def run_scanners(names=None, notify=False, chunk_size=SCAN_CHUNK_SIZE) -> dict:
+    """run_scan, returning just the outputs."""
+    outputs, _ = run_scan(names, notify, chunk_size)
+    return outputs
+
+
+def run_scan(names=None, notify=False, chunk_size=SCAN_CHUNK_SIZE, publish=True):
+    """
+    Args:
+        names (list): registered scanner names to run (None = all)
+        notify (bool): also run each scanner's notify step, and stream its
+                       hits chunk by chunk as they are found (scanner.stream)
+        chunk_size (int): instruments per quote / history / evaluate chunk
+        publish (bool): run each scanner's publish (S3 merge / upload);
+                        False → its side-effect-free report instead
+
+    Returns:
+        (outputs, ctx) -> outputs is {name: publish / report output (or
+        combined result when it has neither)}, None for a scanner that
+        failed; ctx is the run's ScanContext (mapping, quotes, recorded
+        indicators).
+    """
+    scanners = [SCANNERS[name] for name in (names or SCANNERS)]
+    start = time.perf_counter()
+    timings = {}
+    logger.info(f"🚀 Scan run started | scanners={[s.name for s in scanners]}")
+
+    # ---- Stage: mapping ----
+    scan_time = datetime.now(IST)
+    mapping = load_mapping()
+    if mapping.empty:
+        logger.error("Mapping file empty or not found")
+
+    universes = {s.name: s.select(mapping) for s in scanners}
+    selected = {iid for u in universes.values() for iid in u["Instrument ID"].tolist()}
+    instrument_ids = list(dict.fromkeys(iid for iid in mapping["Instrument ID"].tolist() if iid in selected))
+    timings["mapping"] = time.perf_counter() - start
+    logger.info(f"Mapping loaded | Total stocks: {len(instrument_ids)}")
+
+    history_rows = max((s.history_rows for s in scanners if s.history_rows), default=None)
+    trading_day = scan_time.weekday() < 5
+    if not trading_day:
+        logger.info("Weekend detected — using only EOD data")
+
+    quote_pool = ThreadPoolExecutor(max_workers=DHAN_QUOTE_MAX_IN_FLIGHT, thread_name_prefix="scan-quotes")
+    history_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-history")
+    io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="scan-io")
+    try:
+        # ---- Stages: quotes ∥ history ∥ preloads (all started up front) ----
+        preloads = {
+            name: io_pool.submit(loader)
+            for s in scanners for name, loader in s.preload.items()
+        }
+        ctx = ScanContext(scan_time, mapping, history_rows, preloads)
+
+        chunks = _chunks(instrument_ids, chunk_size)
+        quote_futures = [quote_pool.submit(_fetch_quotes, chunk) if trading_day else None for chunk in chunks]
+
+        # Eager history only where a scanner will need it (e.g. not for
+        # instruments the EMA state serves), each instrument as deep as the
+        # deepest scanner that prefetches it; anything else stays lazy
+        history_ids = {}                    # instrument_id -> rows
+        for scanner in scanners:
+            ids = universes[scanner.name]["Instrument ID"].tolist()
+            try:
+                prefetch = scanner.prefetch_ids(ctx, ids)
+            except Exception as e:
+                logger.warning(f"⚠️ Scanner {scanner.name} history selection failed ({e}); prefetching all")
+                prefetch = ids if scanner.history_rows else []
+            for iid in prefetch:
+                history_ids[iid] = max(history_ids.get(iid, 0), scanner.history_rows)
+
+        def by_rows(chunk):
+            groups = {}
+            for iid in chunk:
+                if iid in history_ids:
+                    groups.setdefault(history_ids[iid], []).append(iid)
+            return groups
+
+        history_futures = [history_pool.submit(_fetch_history, ctx, by_rows(chunk)) for chunk in chunks]
+
+        # ---- Stage: evaluate, chunk by chunk as inputs arrive ----
+        parts = {s.name: [] for s in scanners}
+        failed = set()
+        waited = {"quotes": 0.0, "history": 0.0}
+        evaluate_secs = 0.0
+        for chunk, quote_future, history_future in zip(chunks, quote_futures, history_futures):
+            t0 = time.perf_counter()
+            if quote_future is not None:
+                ctx.live_data.update(quote_future.result())
+            t1 = time.perf_counter()
+            for rows, frames in history_future.result().items():
+                ctx.add_history(frames, rows)
+            t2 = time.perf_counter()
+            waited["quotes"] += t1 - t0
+            waited["history"] += t2 - t1
+
+            members = set(chunk)
+            for scanner in scanners:
+                if scanner.name in failed:
+                    continue
+                universe = universes[scanner.name]
+                sub = universe[universe["Instrument ID"].isin(members)].reset_index(drop=True)
+                if sub.empty:
+                    continue
+                try:
+                    part = scanner.evaluate(ctx, sub)
+                    parts[scanner.name].append(part)
+                except Exception as e:
+                    logger.exception(f"❌ Scanner {scanner.name} failed: {e}")
+                    failed.add(scanner.name)
+                    continue
+                if notify and scanner.stream and len(part):
+                    _stream(scanner, part, ctx)
+            evaluate_secs += time.perf_counter() - t2
+
+        # Nothing in a scanner's universe → one empty evaluation for a well-formed result
+        for scanner in scanners:
+            if scanner.name not in failed and not parts[scanner.name]:
+                try:
+                    parts[scanner.name].append(scanner.evaluate(ctx, universes[scanner.name].iloc[0:0]))
+                except Exception as e:
+                    logger.exception(f"❌ Scanner {scanner.name} failed: {e}")
+                    failed.add(scanner.name)
+
+        timings["quotes_wait"] = waited["quotes"]
+        timings["history_wait"] = waited["history"]
+        timings["evaluate"] = evaluate_secs
+        logger.info(f"Total live quotes received: {len(ctx.live_data)}")
+
+        # ---- Stages: combine → publish ∥ notify ----
+        t0 = time.perf_counter()
+        outputs = {name: None for name in failed}
+        pending = {}
+        for scanner in scanners:
+            if scanner.name not in failed:
+                pending[scanner.name] = io_pool.submit(_finish, scanner, parts[scanner.name], ctx, notify, publish)
+        wait(pending.values())
+        for name, future in pending.items():
+            outputs[name] = future.result()
+        timings["publish"] = time.perf_counter() - t0
+    finally:
+        for pool in (quote_pool, history_pool, io_pool):
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    timings["total"] = time.perf_counter() - start
+    logger.info(
+        f"🏁 Scan run finished | scanners={len(scanners)} | stocks={len(instrument_ids)} | "
+        f"chunks={len(chunks)} | quotes={len(ctx.live_data)} | "
+        f"history prefetched={len(history_ids)} loaded={ctx.history_loaded} | "
+        + " ".join(f"{stage}={secs:.1f}s" for stage, secs in timings.items())
+    )
+    return {s.name: outputs.get(s.name) for s in scanners}, ctx
+
+
+def _stream(scanner, part, ctx):
+    """Hand one chunk's hits to the scanner's stream hook (never fails the run)."""
+    try:
+        scanner.stream(part, ctx)
+        ctx.streamed[scanner.name] = ctx.streamed.get(scanner.name, 0) + len(part)
+    except Exception as e:
+        logger.error(f"❌ Scanner {scanner.name} stream failed: {e}")
+
+
+def _finish(scanner, parts, ctx, notify, publish=True):
+    """combine → publish (or report), then notify; the whole step for one scanner."""
+    try:
+        result = scanner.combine(parts)
+        if publish and scanner.publish:
+            output = scanner.publish(result, ctx)
+        elif scanner.report:
+            output = scanner.report(result, ctx)
+        else:
+            output = result
+    except Exception as e:
+        logger.exception(f"❌ Scanner {scanner.name} publish failed: {e}")
+        return None
+
+    if notify and scanner.notify:
+        try:
+            scanner.notify(output, ctx)
+        except Exception as e:
+            logger.error(f"❌ Scanner {scanner.name} notify failed: {e}")
+    logger.info(f"✅ Scanner {scanner.name} done")
+    return output
+
+
+if __name__ == "__main__":
+    import sys
+    from app.config import logging_config  # noqa: F401
+
+    for name, output in run_scanners(sys.argv[1:] or None).items():
+        print(f"=== {name} ===")
+        print(output)
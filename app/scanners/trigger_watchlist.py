@@ -0,0 +1,304 @@
+# ==========================================================
+# File: app/scanners/trigger_watchlist.py
+# ==========================================================
+"""
+Pre-market trigger levels.
+
+Today's EMA is a fixed blend of yesterday's EMA and today's close:
+
+    ema(P) = (f·E + a·P) / (f + a)
+
+so every EMA rule of the momentum scan is a linear inequality in the live
+price P and can be solved before the open:
+
+    close > ema10          ⇔  P > ema10_yday
+    ema10 > ema20          ⇔  P > level_10_20
+    ema20 > ema50          ⇔  P > level_20_50
+
+The EMA momentum trigger is max(min(eligible crosses), level_10_20,
+level_20_50), from the EMA state. The good-result breakout trigger is
+max(prev_high, level_20_50) from the alert's own inputs instead: its
+ALERT_HISTORY_ROWS-candle history and ewm EMAs (the state's EMA50 only
+covers CANDLE_WINDOW candles, so its crossover level would differ).
+Either side only arms on data from the previous session. A quote batch
+is then one vectorised comparison; hits are re-confirmed with the exact
+rules before they are reported.
+"""
+import asyncio
+import bisect
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from app.config.aws_s3 import read_csv_from_s3
+from app.config.settings import IST, S3_BUCKET, MAP_FILE_KEY
+from app.broker.market_data import get_quotes_async
+from app.data.eod_history import load_eod_history
+from app.scanners.ema_engine import (
+    EMA_SPANS,
+    FIELD_INDEX,
+    MIN_MARKET_CAP,
+    MIN_VOLUME,
+    ewm_weights,
+    ema_step,
+    live_candles,
+)
+from app.scanners.ema_state import load_ema_state, ema_signals_from_state, state_coverage
+from app.utils.alert_goodresult import ALERT_HISTORY_ROWS, ALERT_MIN_ROWS, SETUP_CASES as BREAKOUT_SETUPS
+
+logger = logging.getLogger(__name__)
+
+LEVEL_COLUMNS = ["cross_ema10", "cross_ema20", "level_10_20", "level_20_50", "prev_high"]
+BREAKOUT_COLUMNS = ["open", "high", "close", "rows"] + [f"ema{span}" for span in EMA_SPANS]
+
+
+# ------------------------------
+# Level maths
+# ------------------------------
+def alignment_level(fast_ema, slow_ema, fast_span, slow_span):
+    """Price above which today's fast EMA ends above today's slow EMA."""
+    a1, f1 = ewm_weights(fast_span)
+    a2, f2 = ewm_weights(slow_span)
+    d1, d2 = f1 + a1, f2 + a2
+    return (f2 * slow_ema / d2 - f1 * fast_ema / d1) / (a1 / d1 - a2 / d2)
+
+
+def prev_high_level(o, h, c):
+    """Breakout reference from alert_goodresult: body top of yesterday's candle."""
+    return np.where(c > o, c, np.where(c < o, o, h))
+
+
+def breakout_snapshot(frames: dict, today) -> pd.DataFrame:
+    """
+    alert_goodresult's view of yesterday, from the same history it reads:
+    last candle's open / high / close, row count and ewm EMAs, indexed by
+    instrument_id. Only instruments whose last candle is the previous
+    session and that have ALERT_MIN_ROWS candles with today's are kept;
+    instruments without EOD data (empty frame) are skipped.
+    """
+    today = np.datetime64(pd.Timestamp(today).date(), "D")
+    prev_session = pd.Timestamp(np.busday_offset(today, -1, roll="backward"))
+    today = pd.Timestamp(today)
+
+    snapshot = {}
+    for iid, df in frames.items():
+        if df.empty:
+            continue
+        df = df[["open", "high", "low", "close", "volume"]].dropna()
+        if len(df) + 1 < ALERT_MIN_ROWS or not prev_session <= df.index[-1] < today:
+            continue
+        last = df.iloc[-1]
+        snapshot[int(iid)] = {
+            "open": last["open"],
+            "high": last["high"],
+            "close": last["close"],
+            "rows": len(df),
+            **{f"ema{span}": df["close"].ewm(span=span, adjust=False).mean().iloc[-1] for span in EMA_SPANS},
+        }
+    return pd.DataFrame.from_dict(snapshot, orient="index", columns=BREAKOUT_COLUMNS)
+
+
+def build_trigger_levels(state: pd.DataFrame, df_map: pd.DataFrame, breakout: pd.DataFrame, today) -> pd.DataFrame:
+    """
+    EMA state + breakout snapshot + mapping → one row of trigger levels per
+    instrument. NaN / inf level means "cannot fire today".
+    """
+    df_map = df_map.dropna(subset=["Stock Name", "Instrument ID", "Market Cap", "Setup_Case"]).copy()
+    df_map["Instrument ID"] = df_map["Instrument ID"].astype(int)
+    df_map = df_map.drop_duplicates("Instrument ID")
+    ids = df_map["Instrument ID"].to_numpy()
+
+    snap = state.drop_duplicates("instrument_id", keep="last").set_index("instrument_id")
+    snap = snap.reindex(ids)
+    fresh = state_coverage(state, ids, today)
+    bsnap = breakout.reindex(ids)
+    has_breakout = bsnap["close"].notna().to_numpy()
+    ok = (snap["close"].notna().to_numpy() & fresh) | has_breakout
+
+    bars = snap["bars"].fillna(0).to_numpy() + 1
+    close = snap["close"].to_numpy(dtype=np.float64)
+    ema = {span: snap[f"ema{span}"].to_numpy(dtype=np.float64) for span in EMA_SPANS}
+    prev_ema = {span: np.where(bars - 1 >= span, ema[span], np.nan) for span in EMA_SPANS}
+
+    with np.errstate(invalid="ignore"):
+        levels = pd.DataFrame({
+            "stock": df_map["Stock Name"].to_numpy(),
+            "setup_case": df_map["Setup_Case"].to_numpy(),
+            "market_cap": df_map["Market Cap"].astype(float).to_numpy(),
+            "bars": bars,
+            "fresh": fresh,
+            "cross_ema10": np.where(close <= prev_ema[10], ema[10], np.inf),
+            "cross_ema20": np.where(close <= prev_ema[20], ema[20], np.inf),
+            "level_10_20": alignment_level(ema[10], ema[20], 10, 20),
+            "level_20_50": alignment_level(ema[20], ema[50], 20, 50),
+            "prev_high": prev_high_level(
+                bsnap["open"].to_numpy(dtype=np.float64),
+                bsnap["high"].to_numpy(dtype=np.float64),
+                bsnap["close"].to_numpy(dtype=np.float64),
+            ),
+            "breakout_20_50": alignment_level(
+                bsnap["ema20"].to_numpy(dtype=np.float64),
+                bsnap["ema50"].to_numpy(dtype=np.float64),
+                20, 50,
+            ),
+            "has_breakout": has_breakout,
+        }, index=pd.Index(ids, name="instrument_id"))
+
+    levels = levels[ok]
+    eligible = levels["fresh"] & (levels["bars"] >= max(EMA_SPANS)) & (levels["market_cap"] > MIN_MARKET_CAP)
+
+    levels["ema_trigger"] = np.where(
+        eligible,
+        np.maximum.reduce([
+            np.minimum(levels["cross_ema10"], levels["cross_ema20"]),
+            levels["level_10_20"],
+            levels["level_20_50"],
+        ]),
+        np.inf,
+    )
+    levels["breakout_trigger"] = np.where(
+        levels["has_breakout"] & levels["setup_case"].isin(BREAKOUT_SETUPS),
+        np.maximum(levels["prev_high"], levels["breakout_20_50"]),
+        np.inf,
+    )
+    levels[["ema_trigger", "breakout_trigger"]] = levels[["ema_trigger", "breakout_trigger"]].fillna(np.inf)
+    return levels
+
+
+# ------------------------------
+# Watchlist
+# ------------------------------
+class TriggerWatchlist:
+    """
+    Holds today's trigger levels and checks quote batches against them.
+    Each instrument also keeps its levels as a sorted ladder so a single
+    price can be resolved to "levels crossed" with bisect.
+    """
+
+    def __init__(self, levels: pd.DataFrame, state: pd.DataFrame, breakout: pd.DataFrame, today):
+        self.levels = levels
+        self.state = state
+        self.today = today
+        self.instrument_ids = levels.index.to_numpy()
+        self.breakout = breakout.reindex(self.instrument_ids)
+        self.ema_trigger = levels["ema_trigger"].to_numpy()
+        self.breakout_trigger = levels["breakout_trigger"].to_numpy()
+        self.fired = {"ema": set(), "breakout": set()}
+
+        self.ladder = {}
+        for iid, row in levels[LEVEL_COLUMNS].iterrows():
+            pairs = sorted((price, name) for name, price in row.items() if np.isfinite(price))
+            self.ladder[int(iid)] = ([p for p, _ in pairs], [n for _, n in pairs])
+
+        armed = np.isfinite(self.ema_trigger) | np.isfinite(self.breakout_trigger)
+        logger.info(
+            f"🎯 Trigger watchlist ready | instruments={len(levels)} | armed={int(armed.sum())}"
+        )
+
+    def levels_crossed(self, instrument_id, price):
+        """Names of the levels `price` is above, lowest first."""
+        prices, names = self.ladder.get(int(instrument_id), ([], []))
+        return names[:bisect.bisect_left(prices, price)]
+
+    def check(self, quotes: dict) -> dict:
+        """
+        One quote snapshot ({security_id: quote}) → newly fired instruments.
+
+        Returns:
+            {"ema": [instrument_id, ...], "breakout": [instrument_id, ...]}
+        """
+        candles = live_candles(quotes, self.instrument_ids)
+        ltp = candles[:, FIELD_INDEX["close"]]
+        volume = candles[:, FIELD_INDEX["volume"]]
+
+        with np.errstate(invalid="ignore"):
+            ema_hit = (ltp > self.ema_trigger) & (volume > MIN_VOLUME)
+            breakout_hit = ltp > self.breakout_trigger
+
+        hits = {"ema": [], "breakout": []}
+
+        # Exact confirmation for EMA candidates (guards float edges)
+        rows = np.flatnonzero(ema_hit)
+        if rows.size:
+            ids = self.instrument_ids[rows]
+            result, usable = ema_signals_from_state(
+                self.state, ids, candles[rows],
+                self.levels["market_cap"].to_numpy()[rows], self.today,
+            )
+            hits["ema"] = [int(i) for i in ids[result["signal"] & usable]]
+
+        # Breakout: alert_goodresult's exact rule on its own snapshot (EMAs
+        # rounded as the alert compares them); today's low must also have
+        # tagged EMA10 or EMA20. Rows without a fresh snapshot never confirm.
+        rows = np.flatnonzero(breakout_hit)
+        if rows.size:
+            snap = self.breakout.iloc[rows]
+            price = ltp[rows]
+            ema = {
+                span: np.round(ema_step(snap[f"ema{span}"].to_numpy(dtype=np.float64), price, span), 2)
+                for span in EMA_SPANS
+            }
+            prev_high = prev_high_level(
+                snap["open"].to_numpy(dtype=np.float64),
+                snap["high"].to_numpy(dtype=np.float64),
+                snap["close"].to_numpy(dtype=np.float64),
+            )
+            low = candles[rows, FIELD_INDEX["low"]]
+            with np.errstate(invalid="ignore"):
+                confirmed = (price > prev_high) & (ema[20] > ema[50]) & ((low < ema[10]) | (low < ema[20]))
+            hits["breakout"] = [int(i) for i in self.instrument_ids[rows][confirmed]]
+
+        for kind in hits:
+            new = [iid for iid in hits[kind] if iid not in self.fired[kind]]
+            self.fired[kind].update(new)
+            hits[kind] = new
+        return hits
+
+
+def build_trigger_watchlist(today=None):
+    """
+    Pre-market stage: mapping + EMA state (EMA triggers) + the breakout
+    universe's ALERT_HISTORY_ROWS history (breakout triggers) →
+    TriggerWatchlist (or None).
+    """
+    today = pd.Timestamp(today or datetime.now(IST).date())
+
+    df_map = read_csv_from_s3(S3_BUCKET, MAP_FILE_KEY)
+    if df_map.empty:
+        logger.error("❌ Trigger watchlist not built — mapping missing")
+        return None
+
+    state = load_ema_state()
+    if state.empty:
+        logger.warning("⚠️ EMA state missing — EMA triggers not armed")
+
+    breakout_ids = df_map.loc[df_map["Setup_Case"].isin(BREAKOUT_SETUPS), "Instrument ID"].dropna().astype(int)
+    breakout = breakout_snapshot(load_eod_history(breakout_ids.tolist(), ALERT_HISTORY_ROWS), today)
+
+    levels = build_trigger_levels(state, df_map, breakout, today)
+    return TriggerWatchlist(levels, state, breakout, today)
+
+
+async def watch_triggers(watchlist, on_hits, interval=5, should_stop=lambda: False):
+    """
+    Re-check the whole universe every `interval` seconds during market hours.
+    on_hits(hits) is awaited whenever something new fires.
+    """
+    ids = [int(i) for i in watchlist.instrument_ids]
+
+    while not should_stop():
+        quotes = await get_quotes_async(ids, "NSE_EQ")
+        if quotes:
+            hits = watchlist.check(quotes)
+            if hits["ema"] or hits["breakout"]:
+                logger.info(f"🎯 Triggers fired | EMA={hits['ema']} | Breakout={hits['breakout']}")
+                await on_hits(hits)
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    from app.config import logging_config  # noqa: F401
+    wl = build_trigger_watchlist()
+    if wl is not None:
+        print(wl.levels.sort_values("ema_trigger").head(20))
@@ -1,87 +1,25 @@
-import pandas as pd
-import time
 import logging
-import os
-import sys
+import pandas as pd
 from datetime import datetime
-from dhanhq import DhanContext, dhanhq
-from logging.handlers import RotatingFileHandler
-import boto3
-from io import StringIO
-from app.config.settings import S3_BUCKET, AWS_REGION, IST, MAP_FILE_KEY
-from app.config.aws_ssm import get_param
-
-# === Logging Setup ===
-log_file = "logs/goodresult_alerts.log"
-os.makedirs("logs", exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,  # Change to INFO to reduce debug noise
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        RotatingFileHandler(log_file, maxBytes=5_000_000, backupCount=5, encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-logging.info("🚀 Good Result Alerts module loaded")
-
-# === AWS S3 Setup ===
-s3 = boto3.client("s3", region_name=AWS_REGION)
-
-# === Load credentials from SSM ===
-DHAN_CLIENT_ID = get_param("/dhan/client_id")
-DHAN_ACCESS_TOKEN = get_param("/dhan/access_token")
-
-# === Dhan API Setup ===
-dhan_context = DhanContext(DHAN_CLIENT_ID, DHAN_ACCESS_TOKEN)
-dhan = dhanhq(dhan_context)
-
-# === Utilities ===
-def batch_list(lst, size):
-    for i in range(0, len(lst), size):
-        yield lst[i:i + size]
-
-def fetch_live_data(instrument_ids):
-    live_data = {}
-    logging.info(f"📡 Fetching live data for {len(instrument_ids)} instruments...")
-    for batch in batch_list(instrument_ids, 1000):
-        try:
-            response = dhan.quote_data(securities={"NSE_EQ": batch})
-            if isinstance(response, dict) and "data" in response and "data" in response["data"]:
-                batch_data = response["data"]["data"].get("NSE_EQ", {})
-                live_data.update({int(k): v for k, v in batch_data.items()})
-                logging.info(f"✅ Received {len(batch_data)} quotes in batch")
-            else:
-                logging.warning("⚠️ Unexpected response structure from Dhan API")
-        except Exception as e:
-            logging.warning(f"⚠️ Batch fetch error: {e}")
-        time.sleep(0.5)
-    logging.info(f"📊 Total live quotes fetched: {len(live_data)}")
-    return live_data
-
-# === Load CSV from S3 ===
-def read_csv_from_s3(key):
-    try:
-        obj = s3.get_object(Bucket=S3_BUCKET, Key=key)
-        return pd.read_csv(StringIO(obj['Body'].read().decode('utf-8')))
-    except Exception as e:
-        logging.error(f"❌ Failed to read CSV from S3 ({key}): {e}")
-        return pd.DataFrame()
-
-# === Load EOD data from S3 ===
-def load_today_data_with_ema(instrument_id, live):
-    key = f"eod_data/{instrument_id}.csv"
-    df = read_csv_from_s3(key)
-    if df.empty:
-        logging.warning(f"⚠️ Missing EOD file for {instrument_id}")
+from app.config.settings import EOD_PANEL_DAYS
+from app.scanners.registry import Scanner, register_scanner
+
+logger = logging.getLogger(__name__)
+
+# EMA50 via ewm needs a long tail to settle — panel depth is plenty
+ALERT_HISTORY_ROWS = EOD_PANEL_DAYS
+ALERT_MIN_ROWS = 10   # candles, today's included
+
+SETUP_CASES = ["Case A", "Case B", "Case C"]
+
+
+# === Build today's candle + EMAs on top of EOD history ===
+def load_today_data_with_ema(instrument_id, live, df):
+    if df is None or df.empty:
+        logger.warning(f"⚠️ Missing EOD file for {instrument_id}")
         return None
 
-    df = df.rename(columns=str.lower)
-    df = df[["date", "open", "high", "low", "close", "volume"]].dropna()
-    df["date"] = pd.to_datetime(df["date"])
-    df.set_index("date", inplace=True)
-    df.sort_index(inplace=True)
+    df = df[["open", "high", "low", "close", "volume"]].dropna()
 
     today = pd.Timestamp(datetime.today().date())
     ohlc = live["ohlc"]
@@ -94,8 +32,8 @@ def load_today_data_with_ema(instrument_id, live):
     }
     df.sort_index(inplace=True)
 
-    if len(df) < 10:
-        logging.warning(f"⚠️ Not enough data for EMA calculation: {instrument_id}")
+    if len(df) < ALERT_MIN_ROWS:
+        logger.warning(f"⚠️ Not enough data for EMA calculation: {instrument_id}")
         return None
 
     df["ema10"] = df["close"].ewm(span=10, adjust=False).mean()
@@ -119,32 +57,28 @@ def load_today_data_with_ema(instrument_id, live):
         "ema50": latest["ema50"]
     }
 
-# === Main Alert Function ===
-def strong_quarterly_alert():
-    df_map = read_csv_from_s3(MAP_FILE_KEY)
-    if df_map.empty:
-        logging.info("ℹ️ Mapping CSV is empty")
-        return [], []
+# === Scanner rules ===
+def alert_universe(df_map):
+    return df_map[df_map["Setup_Case"].isin(SETUP_CASES)]
+
 
-    df_map = df_map[["Stock Name", "Instrument ID", "Market Cap", "Setup_Case"]].dropna()
-    df_map["Instrument ID"] = df_map["Instrument ID"].astype(int)
-    df_map = df_map[df_map["Setup_Case"].isin(["Case A", "Case B", "Case C"])]
+def evaluate_quarterly_alert(ctx, df_map):
     if df_map.empty:
-        logging.info("ℹ️ No instruments with Setup_Case found.")
-        return [], []
+        logger.info("ℹ️ No instruments with Setup_Case found.")
+        return []
 
-    instrument_ids = df_map["Instrument ID"].tolist()
-    live_data = fetch_live_data(instrument_ids)
+    instrument_ids = [iid for iid in df_map["Instrument ID"].tolist() if str(iid) in ctx.live_data]
+    eod_frames = ctx.history(instrument_ids, ALERT_HISTORY_ROWS)
 
     breakout_rows = []
     for _, row in df_map.iterrows():
         iid = row["Instrument ID"]
         symbol = row["Stock Name"]
-        live = live_data.get(iid)
-        if not live:
+        live = ctx.live_data.get(str(iid))
+        if not live or "ohlc" not in live:
             continue
 
-        eod = load_today_data_with_ema(iid, live)
+        eod = load_today_data_with_ema(iid, live, eod_frames.get(iid))
         if not eod:
             continue
 
@@ -153,7 +87,9 @@ def strong_quarterly_alert():
         ema10, ema20, ema50 = round(eod["ema10"], 2), round(eod["ema20"], 2), round(eod["ema50"], 2)
         ltp = live.get("last_price", 0)
 
-        if ltp > prev_high and ema20 > ema50 and (today_low < ema10 or today_low < ema20):
+        breakout = ltp > prev_high and ema20 > ema50 and (today_low < ema10 or today_low < ema20)
+        ctx.record(iid, prev_high=float(prev_high), quarterly_breakout=bool(breakout))
+        if breakout:
             change = round((ltp - prev_high) / prev_high * 100, 2)
             breakout_rows.append({
                 "symbol": symbol,
@@ -165,19 +101,46 @@ def strong_quarterly_alert():
                 "ema20": ema20
             })
 
-    breakout_rows.sort(key=lambda x: x["change"], reverse=True)
-    top_15 = breakout_rows[:15]
+    return breakout_rows
+
+
+def rank_quarterly_alert(breakout_rows, ctx):
+    """Top 15 breakouts by change → (alert lines, rows)."""
+    top_15 = sorted(breakout_rows, key=lambda x: x["change"], reverse=True)[:15]
     alerts = [f"🔔 {b['symbol']} LTP {b['ltp']} > Prev High {b['prev_high']} (+{b['change']}%)" for b in top_15]
+    return alerts, top_15
+
 
+def publish_quarterly_alert(breakout_rows, ctx):
+    alerts, top_15 = rank_quarterly_alert(breakout_rows, ctx)
     if alerts:
-        logging.info(f"🔔 Top {len(alerts)} alerts prepared")
+        logger.info(f"🔔 Top {len(alerts)} alerts prepared")
     else:
-        logging.info("ℹ️ No breakout alerts today")
-
+        logger.info("ℹ️ No breakout alerts today")
     return alerts, top_15
 
+
+register_scanner(Scanner(
+    "quarterly_alert",
+    evaluate=evaluate_quarterly_alert,
+    publish=publish_quarterly_alert,
+    report=rank_quarterly_alert,
+    universe=alert_universe,
+    history_rows=ALERT_HISTORY_ROWS,
+))
+
+
+# === Main Alert Function ===
+def strong_quarterly_alert():
+    """Run just this scanner (app.scanners.runner.run_scanners runs them all in one pass)."""
+    from app.scanners.runner import run_scanners
+    return run_scanners(["quarterly_alert"])["quarterly_alert"] or ([], [])
+
+
 # === Run Script ===
 if __name__ == "__main__":
-    logging.info("🚀 Running strong quarterly alert check...")
+    from app.config import logging_config  # noqa: F401
+
+    logger.info("🚀 Running strong quarterly alert check...")
     alerts, popups = strong_quarterly_alert()
-    logging.info(f"Alerts: {alerts}")
+    logger.info(f"Alerts: {alerts}")
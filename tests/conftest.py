@@ -0,0 +1,11 @@
+"""
+Offline test setup: app.config.settings reads the Telegram / Dhan secrets
+from SSM at import, so the SSM lookup is replaced with placeholders before
+any app module is imported.
+"""
+import sys
+import types
+
+_ssm = types.ModuleType("app.config.aws_ssm")
+_ssm.get_param = lambda name, decrypt=True: "0"
+sys.modules["app.config.aws_ssm"] = _ssm
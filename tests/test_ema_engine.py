@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.trend import EMAIndicator
+
+from app.scanners.ema_engine import EMA_SPANS, ema_matrix
+
+LENGTHS = [1, 5, 9, 10, 11, 20, 49, 50, 51, 120]
+
+
+def _universe(seed=7, width=120):
+    """Random-walk closes of varying length, right-aligned with NaN left padding."""
+    rng = np.random.default_rng(seed)
+    close = np.full((len(LENGTHS), width), np.nan)
+    series = []
+    for row, length in enumerate(LENGTHS):
+        values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+        close[row, width - length:] = values
+        series.append(values)
+    return close, series
+
+
+@pytest.mark.parametrize("span", EMA_SPANS)
+def test_ema_matrix_matches_ta_ema_indicator(span):
+    close, series = _universe()
+
+    ema = ema_matrix(close, span)
+
+    for row, values in enumerate(series):
+        expected = EMAIndicator(pd.Series(values), window=span).ema_indicator().to_numpy()
+        # Bit-identical, with the same NaN pattern (series shorter than the span are all NaN)
+        np.testing.assert_array_equal(ema[row, close.shape[1] - len(values):], expected)
+        assert np.isnan(ema[row, :close.shape[1] - len(values)]).all()
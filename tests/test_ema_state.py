@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from app.scanners.ema_engine import CANDLE_WINDOW, EMA_SPANS, ema_cross_signals
+from app.scanners.ema_state import STATE_WINDOW, _snapshot, compute_ema_state, ema_signals_from_state
+
+TODAY = pd.Timestamp("2026-10-16")
+PREV_SESSION = np.datetime64("2026-10-15", "D")
+LENGTHS = [5, 15, 30, 60, 119]
+
+
+def _history(seed=11):
+    """[N, STATE_WINDOW, 5] random candles, right-aligned with NaN padding."""
+    rng = np.random.default_rng(seed)
+    ohlcv = np.full((len(LENGTHS), STATE_WINDOW, 5), np.nan)
+    for row, length in enumerate(LENGTHS):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+        ohlcv[row, STATE_WINDOW - length:] = np.column_stack(
+            [close * 0.99, close * 1.01, close * 0.98, close, rng.uniform(5e4, 2e5, length)]
+        )
+    return ohlcv
+
+
+def _live(ohlcv, seed=12):
+    rng = np.random.default_rng(seed)
+    close = ohlcv[:, -1, 3] * (1 + rng.normal(0, 0.03, len(ohlcv)))
+    return np.column_stack([close * 0.99, close * 1.01, close * 0.98, close, rng.uniform(5e4, 2e5, len(ohlcv))])
+
+
+def _state(ids, dates):
+    ohlcv = _history()[:len(ids)]
+    return compute_ema_state(ids, ohlcv, np.array(dates, dtype="datetime64[D]"))
+
+
+def test_state_rolled_forward_matches_full_recompute():
+    ids = list(range(1, len(LENGTHS) + 1))
+    ohlcv = _history()
+    candles = _live(ohlcv)
+    market_cap = np.full(len(ids), 10_000.0)
+    state = compute_ema_state(ids, ohlcv, np.full(len(ids), PREV_SESSION))
+
+    result, usable = ema_signals_from_state(state, ids, candles, market_cap, TODAY)
+    full = ema_cross_signals(np.concatenate([ohlcv, candles[:, None, :]], axis=1), market_cap)
+
+    assert ohlcv.shape[1] + 1 == CANDLE_WINDOW
+    assert usable.all()
+    for span in EMA_SPANS:
+        np.testing.assert_array_equal(result[f"ema{span}"], full[f"ema{span}"])
+    for name in ("cross_ema10", "cross_ema20", "cond_alignment", "signal", "bars"):
+        np.testing.assert_array_equal(result[name], full[name])
+
+
+def test_snapshot_rejects_stale_rows():
+    # Row 2 stopped a session earlier than the rest of the state
+    state = _state([1, 2], [PREV_SESSION, PREV_SESSION - 1])
+    assert _snapshot(state, [1, 2], TODAY)[1].tolist() == [True, False]
+
+    # Whole state two sessions old: nothing can be stepped to today
+    state = _state([1], [np.busday_offset(PREV_SESSION, -1)])
+    assert _snapshot(state, [1], TODAY)[1].tolist() == [False]
+
+
+def test_snapshot_rejects_same_day_as_of():
+    state = _state([1], [np.datetime64(TODAY.date(), "D")])
+    assert _snapshot(state, [1], TODAY)[1].tolist() == [False]
@@ -0,0 +1,79 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from app.broker.feed_stub_server import StubFeedServer
+from app.broker.live_feed import LiveFeed
+from app.execution.position_monitor import PositionMonitor
+
+SECURITY_ID = "1333"
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.trailed = []
+
+    def trail_sl(self, order_id, price):
+        self.trailed.append((order_id, price))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def stub_server():
+    """StubFeedServer on its own loop / thread, dropping every connection after 0.3s."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = StubFeedServer(port=_free_port(), interval=0.02, drop_every=0.3,
+                            prices={("NSE_EQ", SECURITY_ID): 120.0})
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+    yield server
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def test_live_feed_reconnects_resubscribes_and_feeds_the_monitor(stub_server):
+    feed = LiveFeed(url=f"ws://127.0.0.1:{stub_server.port}", reconnect_delay=0.05).start()
+    # Long interval: monitor cycles only run when a tick wakes them, never on a quote fallback
+    monitor = PositionMonitor(interval=60, use_feed=False)
+    monitor.feed = feed
+    broker = RecordingBroker()
+
+    # Ticks seen on each connection: only a resubscribed connection streams any
+    per_connection = {}
+
+    def on_tick(sec_id, ltp, ltt):
+        per_connection[stub_server.connections] = per_connection.get(stub_server.connections, 0) + 1
+
+    try:
+        feed.subscribe(SECURITY_ID, on_tick)
+        stock = {"Stock Name": "TEST", "Security ID": SECURITY_ID, "Signal": "BUY"}
+        monitor.add(stock, broker, {"order_id": "A1", "entry": 100.0, "sl": 99.0, "qty": 10})
+
+        assert _wait_for(lambda: feed.reconnects >= 2 and any(n >= 3 for n in per_connection))
+        # 1R (101) is long passed at ~120 → process_ltp's TRAIL_SL, acted on once
+        assert _wait_for(lambda: broker.trailed)
+        assert broker.trailed == [("A1", 100.0)]
+        assert monitor.stats["feed_ticks"] > 0
+        assert monitor.stats["quote_calls"] == 0
+    finally:
+        monitor.stop()
+        feed.stop()
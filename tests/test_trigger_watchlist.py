@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from app.scanners.ema_engine import ema_cross_signals
+from app.scanners.ema_state import STATE_WINDOW, compute_ema_state
+from app.scanners.trigger_watchlist import TriggerWatchlist, breakout_snapshot, build_trigger_levels
+
+TODAY = pd.Timestamp("2026-10-16")
+PREV_SESSION = "2026-10-15"
+
+EMA_ID, PREV_HIGH_ID, ALIGN_ID = 101, 202, 303
+
+
+def _history(last_day, rows=30, close=None):
+    index = pd.bdate_range(end=last_day, periods=rows)
+    close = np.linspace(100.0, 130.0, rows) if close is None else np.asarray(close, dtype=np.float64)
+    return pd.DataFrame(
+        {"open": close - 1, "high": close + 2, "low": close - 2, "close": close, "volume": 1e6},
+        index=index,
+    )
+
+
+def _quote(price, low=None, volume=1e6):
+    low = price if low is None else low
+    return {"ohlc": {"open": price, "high": price, "low": low, "close": price},
+            "last_price": price, "volume": volume}
+
+
+def _fixture():
+    # EMA instrument: long uptrend, then a dip below EMA10 → a cross can fire today
+    ema_close = np.concatenate([np.linspace(100.0, 160.0, STATE_WINDOW - 3), [152.0, 150.0, 149.0]])
+    ema_frame = _history(PREV_SESSION, STATE_WINDOW, ema_close)
+    ohlcv = ema_frame.to_numpy()[None, :, :]
+    state = compute_ema_state([EMA_ID], ohlcv, np.array([np.datetime64(PREV_SESSION, "D")]))
+
+    # Breakout instruments: one gated by the previous body top (uptrend),
+    # one by the EMA20 / EMA50 alignment level (downtrend)
+    frames = {
+        PREV_HIGH_ID: _history(PREV_SESSION, 60, np.linspace(100.0, 130.0, 60)),
+        ALIGN_ID: _history(PREV_SESSION, 60, np.linspace(160.0, 120.0, 60)),
+    }
+    breakout = breakout_snapshot(frames, TODAY)
+
+    df_map = pd.DataFrame({
+        "Stock Name": ["EMA", "PREVHIGH", "ALIGN"],
+        "Instrument ID": [EMA_ID, PREV_HIGH_ID, ALIGN_ID],
+        "Market Cap": [10_000, 10_000, 10_000],
+        "Setup_Case": ["Case Z", "Case A", "Case B"],
+    })
+    levels = build_trigger_levels(state, df_map, breakout, TODAY)
+    return levels, state, breakout, ema_frame, frames
+
+
+def _ema_rule(ema_frame, price):
+    """The history path's full-window scan with today's candle appended."""
+    candle = np.array([[price, price, price, price, 1e6]])
+    ohlcv = np.concatenate([ema_frame.to_numpy(), candle])[None, :, :]
+    return bool(ema_cross_signals(ohlcv, [10_000])["signal"][0])
+
+
+def _breakout_rule(frame, price, low):
+    """alert_goodresult's rule: ewm EMAs over history + today, rounded."""
+    close = pd.concat([frame["close"], pd.Series([price])], ignore_index=True)
+    ema = {span: round(close.ewm(span=span, adjust=False).mean().iloc[-1], 2) for span in (10, 20, 50)}
+    prev = frame.iloc[-1]
+    prev_high = prev["close"] if prev["close"] > prev["open"] else prev["open"] if prev["close"] < prev["open"] else prev["high"]
+    return bool(price > prev_high and ema[20] > ema[50] and (low < ema[10] or low < ema[20]))
+
+
+def test_breakout_snapshot_skips_instruments_without_eod_data():
+    frames = {101: _history(PREV_SESSION), 202: pd.DataFrame()}
+
+    snapshot = breakout_snapshot(frames, TODAY)
+
+    assert list(snapshot.index) == [101]
+    assert snapshot.loc[101, "close"] == 130.0
+
+
+def test_ema_trigger_is_where_the_exact_rule_flips():
+    levels, state, breakout, ema_frame, _ = _fixture()
+    trigger = levels.loc[EMA_ID, "ema_trigger"]
+    assert np.isfinite(trigger)
+
+    for price, expected in ((trigger * (1 - 1e-6), False), (trigger * (1 + 1e-6), True)):
+        watchlist = TriggerWatchlist(levels, state, breakout, TODAY)
+        hits = watchlist.check({str(EMA_ID): _quote(price)})
+        assert _ema_rule(ema_frame, price) is expected
+        assert (EMA_ID in hits["ema"]) is expected
+
+
+def test_breakout_trigger_is_where_the_exact_rule_flips():
+    levels, state, breakout, _, frames = _fixture()
+    # One level per side of the max(prev_high, alignment) trigger
+    assert levels.loc[PREV_HIGH_ID, "breakout_trigger"] == levels.loc[PREV_HIGH_ID, "prev_high"]
+    assert levels.loc[ALIGN_ID, "breakout_trigger"] == levels.loc[ALIGN_ID, "breakout_20_50"]
+
+    for iid in (PREV_HIGH_ID, ALIGN_ID):
+        trigger = levels.loc[iid, "breakout_trigger"]
+        # EMAs are compared rounded to 2 dp, so step far enough to clear the rounding
+        for price, expected in ((trigger * (1 - 5e-3), False), (trigger * (1 + 5e-3), True)):
+            low = price * 0.5
+            watchlist = TriggerWatchlist(levels, state, breakout, TODAY)
+            hits = watchlist.check({str(iid): _quote(price, low=low)})
+            assert _breakout_rule(frames[iid], price, low) is expected
+            assert (iid in hits["breakout"]) is expected